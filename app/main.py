@@ -30,27 +30,118 @@ def root():
     return {"message": "CrisisClarity AI backend running!"}
 '''
 # app/main.py
+"""
+App factory. A deployment profile picks the routers a worker serves:
 
+    APP_PROFILE=link uvicorn app.main:app --workers 16     # never imports torch/transformers
+    APP_PROFILE=text,factcard uvicorn app.main:app
+    uvicorn --factory app.main:create_app                  # same, profile from APP_PROFILE
+
+Router modules are imported only when the profile includes them, so link,
+image and fact-card workers start in a fraction of the time and memory of a
+classifier worker. Measure with `python -m benchmarks.startup`.
+"""
+
+import asyncio
+import importlib
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Dict, List, Tuple
+
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import verify_link, verify_text, factcard
+from app.utils.aio import close_http_client, monitor_loop_lag
+from app.utils.config import settings
+from app.utils.http_cache import CompressionMiddleware
+from app.utils.logging_config import RequestLogMiddleware, setup_logging
+from app.utils.metrics import MetricsMiddleware
+from app.utils.verdict_store import get_store
 
-app = FastAPI(title="CrisisClarity AI Backend")
+# Routers (modules of app.routers) per profile; profiles combine with commas
+PROFILES: Dict[str, Tuple[str, ...]] = {
+    "text": ("verify_text",),
+    "link": ("verify_link",),
+    "image": ("verify_image",),
+    "factcard": ("factcard",),
+    "jobs": ("jobs",),  # loads the classifier with the first text job
+    "all": ("verify_link", "verify_text", "verify_image", "factcard", "jobs"),
+}
+# monitoring and verdict history are cheap and mounted in every profile
+COMMON_ROUTERS = ("metrics", "history")
+# serves stack dumps, so it is mounted only where the profiler runs (PROFILE_ENABLED)
+PROFILING_ROUTERS = ("profiles",)
 
-# Enable CORS so frontend can call backend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:8080"],  # frontend URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# Routers
-app.include_router(verify_link.router)
-app.include_router(verify_text.router)
-app.include_router(factcard.router)
+def router_names(profile: str) -> List[str]:
+    names: List[str] = []
+    for part in profile.split(","):
+        part = part.strip()
+        if part not in PROFILES:
+            raise ValueError(f"Unknown APP_PROFILE {part!r}; expected one of {sorted(PROFILES)}")
+        names.extend(name for name in PROFILES[part] if name not in names)
+    return names + list(COMMON_ROUTERS) + list(PROFILING_ROUTERS if settings.PROFILE_ENABLED else ())
 
-@app.get("/")
-def root():
-    return {"message": "CrisisClarity AI backend running!"}
+
+def create_app(profile: str = settings.APP_PROFILE) -> FastAPI:
+    modules = [importlib.import_module(f"app.routers.{name}") for name in router_names(profile)]
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # queue-based: request threads never block on log file I/O. Set up when
+        # the server starts, not at import, so importing the app writes no log files
+        setup_logging()
+        # remaining sync routes (factcard, metrics) share this threadpool; verification is async
+        anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+        lag_probe = asyncio.create_task(monitor_loop_lag())
+        async with AsyncExitStack() as stack:
+            # recent verdicts from the store survive restarts and are shared across workers
+            # (verify_text seeds its near-duplicate index; other routers have no warm_start)
+            for module in modules:
+                if hasattr(module, "warm_start"):
+                    module.warm_start()
+                # background work tied to the app's lifetime (the jobs router's workers)
+                if hasattr(module, "lifespan"):
+                    await stack.enter_async_context(module.lifespan())
+            yield
+        lag_probe.cancel()
+        await close_http_client()
+        store = get_store()
+        if store is not None:
+            store.flush()
+
+    app = FastAPI(title="CrisisClarity AI Backend", lifespan=lifespan)
+    app.state.profile = profile
+
+    # Enable CORS so frontend can call backend
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:8080"],  # frontend URL
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # brotli/gzip for JSON bodies above COMPRESS_MIN_BYTES (streams pass through)
+    app.add_middleware(CompressionMiddleware)
+
+    # Per-route latency histograms, served on /metrics
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(RequestLogMiddleware)
+
+    # X-Profile header / sampling / slow-request profiles, listed on /profiles
+    if settings.PROFILE_ENABLED:
+        from app.utils.profiling import ProfilingMiddleware
+        app.add_middleware(ProfilingMiddleware)
+
+    # Routers
+    for module in modules:
+        app.include_router(module.router)
+
+    @app.get("/")
+    def root():
+        return {"message": "CrisisClarity AI backend running!", "profile": profile}
+
+    return app
+
+
+app = create_app()
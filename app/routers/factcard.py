@@ -1,10 +1,20 @@
-from fastapi import APIRouter
+import io
+import zipfile
+from fastapi import APIRouter, Header, HTTPException, Response
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
+from app.utils import http_cache
+from app.utils.config import settings
 from app.utils.factcard_generator import create_factcard
+from app.utils.factcard_renderer import CARD_CACHE, FORMATS, TEMPLATES, card_key, render_cached, render_many
 
 router = APIRouter()
 
+ImageFormat = Literal["png", "webp"]
+
+# cards are content-addressed: a key never maps to a different image
+IMMUTABLE = "public, max-age=31536000, immutable"
+
 # Define request schema
 class FactCardRequest(BaseModel):
     claim: str
@@ -12,12 +22,85 @@ class FactCardRequest(BaseModel):
     confidence: Optional[float] = None
     evidence_links: Optional[List[str]] = []
 
-@router.post("/generate_factcard/")
-async def generate_factcard(payload: FactCardRequest):
-    factcard = create_factcard(
+class BulkFactCardRequest(BaseModel):
+    cards: List[FactCardRequest]
+    format: ImageFormat = "png"
+    template: str = "default"
+
+
+def _card(payload: FactCardRequest) -> dict:
+    return create_factcard(
         claim=payload.claim,
         verdict=payload.verdict,
         confidence=payload.confidence,
         evidence_links=payload.evidence_links
     )
-    return factcard
+
+
+def _check_template(template: str) -> None:
+    if template not in TEMPLATES:
+        raise HTTPException(status_code=422, detail=f"Unknown template {template!r}; expected one of {sorted(TEMPLATES)}")
+
+
+def _headers(key: str, fmt: str) -> dict:
+    return {"ETag": f'"{key}"', "Cache-Control": IMMUTABLE, "Content-Location": f"/factcards/{key}.{fmt}"}
+
+
+def _not_modified(key: str, fmt: str, if_none_match: Optional[str]) -> Optional[Response]:
+    """A 304 when the client already has this card; checked before any cache lookup or render."""
+    if http_cache.matches(if_none_match, f'"{key}"'):
+        return Response(status_code=304, headers=_headers(key, fmt))
+    return None
+
+
+def _image_response(key: str, data: bytes, fmt: str) -> Response:
+    return Response(content=data, media_type=FORMATS[fmt][1], headers=_headers(key, fmt))
+
+
+@router.post("/generate_factcard/")
+def generate_factcard(payload: FactCardRequest, format: Optional[ImageFormat] = None, template: str = "default",
+                      if_none_match: Optional[str] = Header(None)):
+    """The fact card as JSON, or rendered as an image with ?format=png|webp."""
+    factcard = _card(payload)
+    if format is None:
+        return factcard
+    _check_template(template)
+    not_modified = _not_modified(card_key(factcard, format, template), format, if_none_match)
+    if not_modified is not None:
+        return not_modified
+    key, data = render_cached(factcard, format, template)
+    return _image_response(key, data, format)
+
+
+@router.post("/generate_factcard/bulk")
+def generate_factcards_bulk(payload: BulkFactCardRequest):
+    """Render many cards on the process pool; a zip of images named <index>_<key>.<format>."""
+    if len(payload.cards) > settings.FACTCARD_BULK_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {settings.FACTCARD_BULK_MAX} cards per request")
+    _check_template(payload.template)
+    rendered = render_many([_card(card) for card in payload.cards], payload.format, payload.template)
+
+    archive = io.BytesIO()
+    # images are already compressed; store them as-is
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED) as zf:
+        for i, (key, data) in enumerate(rendered):
+            zf.writestr(f"{i:04d}_{key}.{payload.format}", data)
+    return Response(
+        content=archive.getvalue(),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="factcards.zip"'},
+    )
+
+
+@router.get("/factcards/{key}.{format}")
+def get_factcard(key: str, format: ImageFormat, if_none_match: Optional[str] = Header(None)):
+    """A previously rendered card by its key (shareable, cacheable URL)."""
+    if not key.isalnum():
+        raise HTTPException(status_code=404, detail="Fact card not found")
+    not_modified = _not_modified(key, format, if_none_match)
+    if not_modified is not None:
+        return not_modified
+    data = CARD_CACHE.get(key, format)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Fact card not found")
+    return _image_response(key, data, format)
@@ -0,0 +1,45 @@
+# app/routers/history.py
+import time
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.utils.serialization import FastJSONResponse
+from app.utils.verdict_store import get_store
+
+# up to 1000 rows per response: encoded in one orjson pass
+router = APIRouter(prefix="/history", tags=["History"], default_response_class=FastJSONResponse)
+
+
+def _store():
+    store = get_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Verdict store is disabled")
+    return store
+
+
+@router.get("/claims")
+def claims(
+    text: Optional[str] = Query(None, description="Claim text; matched after normalization"),
+    claim_hash: Optional[str] = Query(None, description="Normalized claim hash"),
+    pipeline: Optional[str] = Query(None, description='"model" (/verify_text) or "evidence" (/verify_text/)'),
+    since_s: Optional[float] = Query(None, ge=0, description="Only results from the last N seconds"),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """Latest stored verification of a claim (text or hash), else the most recent claims."""
+    store = _store()
+    if text or claim_hash:
+        claim = store.latest_claim(text, pipeline=pipeline, max_age_s=since_s, digest=claim_hash)
+        if claim is None:
+            raise HTTPException(status_code=404, detail="Claim not verified yet")
+        return claim
+    since = time.time() - since_s if since_s is not None else None
+    return {"claims": store.recent_claims(limit=limit, since=since, pipeline=pipeline)}
+
+
+@router.get("/links")
+def links(
+    domain: Optional[str] = Query(None),
+    since_s: Optional[float] = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    since = time.time() - since_s if since_s is not None else None
+    return {"links": _store().links(domain=domain, limit=limit, since=since)}
@@ -0,0 +1,130 @@
+# app/routers/jobs.py
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Optional
+from app.services.bulk_verify import entry_kind
+from app.utils.config import settings
+from app.utils.deadline import Deadline
+from app.utils.job_queue import JobQueue, QueueFull
+from app.utils.serialization import FastJSONResponse
+
+router = APIRouter(tags=["Jobs"])
+
+# Request model
+class JobRequest(BaseModel):
+    kind: Literal["text", "link", "batch"]
+    text: Optional[str] = None                   # kind "text": the claim, verified as by /verify_text/
+    url: Optional[str] = None                    # kind "link": checked as by /verify_link/
+    items: Optional[List[Dict[str, Any]]] = None  # kind "batch": {"text"} / {"url"} objects
+
+# Response model
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str                        # "queued" | "running" | "done" | "failed"
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    result: Optional[Any] = None       # the endpoint's body; a list of items for a batch
+    error: Optional[str] = None
+
+
+# -------- Runners (imported lazily: a link-only deployment never loads the classifier) --------
+def _deadline() -> Deadline:
+    return Deadline(settings.JOB_BUDGET_MS / 1000.0)
+
+
+async def _run_text(payload: Dict[str, Any]) -> dict:
+    from app.routers.verify_text import verify_with_evidence
+    return await verify_with_evidence(payload["text"], _deadline())
+
+
+async def _run_link(payload: Dict[str, Any]) -> dict:
+    from app.routers.verify_link import _link_body, check_link
+    return _link_body(await check_link(payload["url"], _deadline()))
+
+
+async def _run_batch(payload: Dict[str, Any]) -> List[dict]:
+    """One result per item, in order; a failing item records its error and the rest carry on."""
+    limit = asyncio.Semaphore(settings.JOB_BATCH_CONCURRENCY)
+
+    async def run_item(item: Dict[str, Any]) -> dict:
+        record = {"id": item.get("id"), "kind": None, "input": None}
+        try:
+            record["kind"], record["input"] = entry_kind(item)
+            async with limit:
+                run = _run_link if record["kind"] == "link" else _run_text
+                record["result"] = await run({"url" if record["kind"] == "link" else "text": record["input"]})
+        except Exception as e:
+            record["error"] = str(e)
+        return record
+
+    return list(await asyncio.gather(*(run_item(item) for item in payload["items"])))
+
+
+RUNNERS = {"text": _run_text, "link": _run_link, "batch": _run_batch}
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> JobQueue:
+    """Process-wide queue (opened on first use)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(settings.JOBS_PATH, RUNNERS, workers=settings.JOB_WORKERS,
+                              max_queued=settings.JOB_MAX_QUEUED, timeout_s=settings.JOB_TIMEOUT_S,
+                              max_attempts=settings.JOB_MAX_ATTEMPTS, poll_s=settings.JOB_POLL_MS / 1000.0,
+                              retention_s=settings.JOB_RETENTION_S)
+        return _queue
+
+
+@asynccontextmanager
+async def lifespan():
+    """Run the job workers for as long as the app is up (see create_app)."""
+    queue = get_queue()
+    queue.start()
+    try:
+        yield
+    finally:
+        await queue.stop()
+
+
+def _payload(req: JobRequest) -> Dict[str, Any]:
+    if req.kind == "text":
+        if not (req.text or "").strip():
+            raise HTTPException(status_code=422, detail='A "text" job needs "text"')
+        return {"text": req.text}
+    if req.kind == "link":
+        if not (req.url or "").strip():
+            raise HTTPException(status_code=422, detail='A "link" job needs "url"')
+        return {"url": req.url}
+    if not req.items:
+        raise HTTPException(status_code=422, detail='A "batch" job needs "items"')
+    if len(req.items) > settings.JOB_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {settings.JOB_BATCH_MAX} items per batch job")
+    return {"items": req.items}
+
+
+@router.post("/jobs", status_code=202, response_model=JobResponse)
+async def submit_job(req: JobRequest):
+    """Queue a verification and return its ID at once; poll GET /jobs/{id} for the result."""
+    try:
+        job = await get_queue().submit_async(req.kind, _payload(req))
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return FastJSONResponse(job, status_code=202, headers={"Location": f"/jobs/{job['id']}"})
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, wait: float = Query(0, ge=0, description="Seconds to wait for the job to finish")):
+    """Status and result; with ?wait=N, answers as soon as the job finishes or after N seconds (long polling)."""
+    job = await get_queue().wait(job_id, min(wait, settings.JOB_MAX_WAIT_S))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return FastJSONResponse(job)
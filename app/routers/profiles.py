@@ -0,0 +1,17 @@
+# app/routers/profiles.py
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from app.utils.profiling import profile_path, recent_profiles
+
+router = APIRouter(tags=["Monitoring"])
+
+@router.get("/profiles")
+def list_profiles():
+    return {"profiles": recent_profiles()}
+
+@router.get("/profiles/{name}")
+def get_profile(name: str):
+    path = profile_path(name)
+    if path is None or not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=name)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
-from app.services.text_verifier import verify_text_claim
+from app.services.text_verifier import verify_text_claim_async
 
 router = APIRouter()
 
@@ -9,5 +9,5 @@ class TextRequest(BaseModel):
 
 @router.post("/verify_text")
 async def verify_text(request: TextRequest):
-    result = verify_text_claim(request.claim)
+    result = await verify_text_claim_async(request.claim)
     return result
@@ -0,0 +1,51 @@
+# app/routers/verify_image.py
+import asyncio
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel
+from typing import List, Optional
+from app.services.image_ingest import UploadTooLarge, spool_upload
+from app.services.image_verifier import ImageError, verify_image
+from app.utils.config import settings
+from app.utils.serialization import FastJSONResponse
+
+router = APIRouter()
+
+# Response model
+class ImageMatch(BaseModel):
+    id: int
+    distance: int          # pHash bits differing from the upload
+    dhash_distance: int
+    first_seen: Optional[str] = None
+    factcheck_url: Optional[str] = None
+    source: Optional[str] = None
+    verdict: Optional[str] = None
+    description: Optional[str] = None
+
+class ImageResponse(BaseModel):
+    phash: str
+    dhash: str
+    status: str                                    # "recycled" | "no_match"
+    earliest_occurrence: Optional[ImageMatch] = None
+    factcheck: Optional[ImageMatch] = None         # closest match with a fact-check link
+    matches: List[ImageMatch] = []
+
+
+@router.post("/verify_image", response_model=ImageResponse)
+async def verify_image_endpoint(request: Request):
+    """The image file is the raw request body (Content-Type: image/*), spooled to disk if large."""
+    if int(request.headers.get("content-length") or 0) > settings.IMAGE_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Images are limited to {settings.IMAGE_MAX_BYTES} bytes")
+    try:
+        upload = await spool_upload(request.stream())
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    with upload:
+        if not upload.read(1):
+            raise HTTPException(status_code=422, detail="Send the image file as the request body")
+        upload.seek(0)
+        try:
+            # decoding and hashing are CPU-bound; keep them off the event loop
+            result = await asyncio.to_thread(verify_image, upload)
+        except ImageError as e:
+            raise HTTPException(status_code=415, detail=str(e))
+    return FastJSONResponse(result)
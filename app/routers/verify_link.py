@@ -24,10 +24,17 @@ def verify_link(req: LinkRequest):
     return analyze_url(req.url)
 '''
 # app/routers/verify_link.py
-from fastapi import APIRouter, HTTPException
+import asyncio
+import time
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
-from app.services.link_verifier import analyze_url
+from app.services.link_verifier import analyze_url_async
+from app.utils import http_cache
+from app.utils.config import settings
+from app.utils.deadline import Deadline, request_deadline
+from app.utils.serialization import FastJSONResponse
+from app.utils.verdict_store import get_store
 
 router = APIRouter()
 
@@ -35,6 +42,9 @@ router = APIRouter()
 class LinkRequest(BaseModel):
     url: str  # free-form to allow http/https/internal URLs
 
+class BulkLinkRequest(BaseModel):
+    urls: List[str]
+
 # Response model
 class LinkResponse(BaseModel):
     url: str
@@ -45,11 +55,82 @@ class LinkResponse(BaseModel):
     trusted: bool
     urlscan: Optional[Dict[str, Any]] = None  # integration with UrlScan.io
     dns: Optional[Dict[str, Any]] = None      # fallback DNS info
+    skipped_checks: List[str] = []            # not run: latency budget spent
+    truncated_checks: List[str] = []
+    final_url: Optional[str] = None           # where a shortened link leads
+    redirect_chain: List[Dict[str, Any]] = [] # every hop: url, domain, status, trusted, reasons
+
+# optional LinkResponse fields absent from an analyze_url() result
+_LINK_DEFAULTS = {
+    name: field.get_default(call_default_factory=True)
+    for name, field in LinkResponse.model_fields.items() if not field.is_required()
+}
+
+
+def _link_body(result: Dict[str, Any]) -> Dict[str, Any]:
+    """analyze_url() output in the LinkResponse shape, without re-validating it."""
+    return {name: result.get(name, _LINK_DEFAULTS.get(name)) for name in LinkResponse.model_fields}
+
+def _cache_headers(url: str, result: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "ETag": http_cache.link_etag(url, result),
+        "Cache-Control": http_cache.cache_control(http_cache.link_max_age(result)),
+    }
+
+
+def _still_fresh(url: str, if_none_match: Optional[str]) -> Optional[Response]:
+    """304 without re-checking when the client's ETag matches a stored result that is still fresh."""
+    store = get_store()
+    previous = store.latest_link(url) if store is not None and if_none_match else None
+    if previous is None:
+        return None
+    max_age = http_cache.link_max_age(previous)
+    if max_age is None or previous["created_at"] < time.time() - max_age:
+        return None
+    headers = _cache_headers(url, previous)
+    return Response(status_code=304, headers=headers) if http_cache.matches(if_none_match, headers["ETag"]) else None
+
+
+async def check_link(url: str, deadline: Deadline) -> Dict[str, Any]:
+    """analyze_url_async() with the deadline report, recorded in the verdict history."""
+    result = await analyze_url_async(url, deadline=deadline)
+    result.update(deadline.report())
+    store = get_store()
+    if store is not None:
+        store.record_link(result)
+    return result
+
 
 @router.post("/verify_link/", response_model=LinkResponse)
-def verify_link(req: LinkRequest):
+async def verify_link(req: LinkRequest, deadline: Deadline = Depends(request_deadline),
+                      if_none_match: Optional[str] = Header(None)):
+    # the stored result is a SQLite read: off the event loop, and only for conditional requests
+    not_modified = await asyncio.to_thread(_still_fresh, req.url, if_none_match) if if_none_match else None
+    if not_modified is not None:
+        return not_modified
+    try:
+        result = await check_link(req.url, deadline)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    headers = _cache_headers(req.url, result)
+    if http_cache.matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(_link_body(result), headers=headers)
+
+
+@router.post("/verify_link/bulk", response_model=List[LinkResponse])
+async def verify_links_bulk(payload: BulkLinkRequest, deadline: Deadline = Depends(request_deadline)):
+    """Check several links at once under one budget; their redirect chains are expanded concurrently."""
+    if len(payload.urls) > settings.LINK_BULK_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {settings.LINK_BULK_MAX} URLs per request")
     try:
-        result = analyze_url(req.url)
-        return result
+        results = await asyncio.gather(*(analyze_url_async(url, deadline=deadline) for url in payload.urls))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    report = deadline.report()
+    store = get_store()
+    for result in results:
+        result.update(report)
+        if store is not None:
+            store.record_link(result)
+    return FastJSONResponse([_link_body(result) for result in results])
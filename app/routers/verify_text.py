@@ -1,7 +1,18 @@
-from fastapi import APIRouter
+import asyncio
+import time
+from fastapi import APIRouter, Depends, Header, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from app.services.text_verifier import verify_text_claim
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+from app.services.text_verifier import predict_claim_async, verify_text_claim_async
+from app.utils.claim_index import ClaimIndex
+from app.utils.config import settings
+from app.utils.deadline import Deadline, request_deadline
+from app.utils import http_cache
+from app.utils.evidence import cascade_evidence_async, gather_evidence_async, iter_evidence_async
+from app.utils.metrics import CACHE_REQUESTS
+from app.utils.serialization import FastJSONResponse, ndjson_line
+from app.utils.verdict_store import get_store
 
 router = APIRouter()
 
@@ -20,40 +31,219 @@ class TextResponse(BaseModel):
     verdict: str
     confidence: float
     evidence_links: List[EvidenceItem]
+    skipped_checks: List[str] = []    # not run: latency budget spent
+    truncated_checks: List[str] = []  # ran partially within the budget
+    reused: bool = False               # verdict of a near-duplicate claim verified recently
+    reused_from: Optional[str] = None
+    similarity: Optional[float] = None
 
-# -------- Route --------
-@router.post("/verify_text", response_model=TextResponse)
-def verify_text_endpoint(request: TextInput):
-    result = verify_text_claim(request.text)
+# -------- Near-duplicate reuse --------
+# /verify_text (model + news + scrapers) and /verify_text/ + stream (all evidence
+# sources) produce different results, so each pipeline reuses only its own
+_claim_indexes = {
+    pipeline: ClaimIndex(settings.CLAIM_DEDUP_THRESHOLD, ttl_s=settings.CLAIM_DEDUP_TTL_S,
+                         max_entries=settings.CLAIM_DEDUP_MAX_ENTRIES)
+    for pipeline in ("model", "evidence")
+}
 
-    # normalize evidence links into {source, url, verdict}
-    evidence_items: List[EvidenceItem] = []
-    for link in result.get("evidence_links", []):
+# -------- Helpers --------
+# Bodies are plain dicts in the TextResponse shape: the evidence collectors
+# already normalized every entry, so the route encodes them directly
+# (FastJSONResponse) instead of building and re-validating a model per link.
+def _to_evidence_items(entries: list) -> List[dict]:
+    """Normalize evidence entries into {source, url, verdict}."""
+    evidence_items: List[dict] = []
+    for link in entries:
         if isinstance(link, dict):
-            evidence_items.append(
-                EvidenceItem(
-                    source=link.get("source"),
-                    url=link.get("url"),
-                    verdict=link.get("verdict")
-                )
-            )
+            evidence_items.append({
+                "source": link.get("source"),
+                "url": link.get("url") or "",
+                "verdict": link.get("verdict"),
+            })
         else:  # legacy string-only links
-            evidence_items.append(EvidenceItem(url=link))
+            evidence_items.append({"source": None, "url": link, "verdict": None})
+    return evidence_items
+
+
+def _text_body(claim: str, verdict: str, confidence: float, evidence_links: List[dict],
+               skipped_checks: Sequence[str] = (), truncated_checks: Sequence[str] = ()) -> dict:
+    """A TextResponse-shaped dict."""
+    return {
+        "claim": claim,
+        "verdict": verdict,
+        "confidence": float(confidence),
+        "evidence_links": evidence_links,
+        "skipped_checks": list(skipped_checks),
+        "truncated_checks": list(truncated_checks),
+        "reused": False,
+        "reused_from": None,
+        "similarity": None,
+    }
+
 
+def _override_verdict(verdict: str, confidence: float, evidence_items: List[dict]) -> Tuple[str, float]:
     # -------- Verdict Override Logic --------
-    final_verdict = result["verdict"]
-    final_confidence = result["confidence"]
-
-    if any(ev.verdict and ev.verdict.lower() == "fake" for ev in evidence_items):
-        final_verdict = "Fake"
-        final_confidence = 1.0
-    elif any(ev.verdict and ev.verdict.lower() == "true" for ev in evidence_items):
-        final_verdict = "True"
-        final_confidence = 1.0
-
-    return TextResponse(
-        claim=request.text,
-        verdict=final_verdict,
-        confidence=final_confidence,
-        evidence_links=evidence_items
+    if any(ev["verdict"] and ev["verdict"].lower() == "fake" for ev in evidence_items):
+        return "Fake", 1.0
+    if any(ev["verdict"] and ev["verdict"].lower() == "true" for ev in evidence_items):
+        return "True", 1.0
+    return verdict, confidence
+
+def _from_stored(row: dict) -> dict:
+    return _text_body(row["claim"], row["verdict"], row["confidence"], _to_evidence_items(row["evidence_links"]))
+
+
+# _reuse and _remember hash the claim (MinHash) and use the verdict store's
+# SQLite connection; async routes call them through asyncio.to_thread.
+def _reuse(pipeline: str, claim: str) -> Optional[dict]:
+    """
+    A recent verification of this claim: a near-duplicate from this process's
+    index, else an exact (normalized) match stored by any worker.
+    """
+    if not settings.CLAIM_DEDUP_ENABLED:
+        return None
+    match = _claim_indexes[pipeline].lookup(claim)
+    store = get_store()
+    if match is None and store is not None:
+        row = store.latest_claim(claim, pipeline=pipeline, max_age_s=settings.CLAIM_DEDUP_TTL_S, complete_only=True)
+        if row is not None:
+            previous = _from_stored(row)
+            _claim_indexes[pipeline].add(previous["claim"], previous)
+            match = (1.0, previous)
+    CACHE_REQUESTS.inc("claim_dedup", "hit" if match else "miss")
+    if match is None:
+        return None
+    similarity, previous = match
+    return {**previous, "claim": claim, "reused": True, "reused_from": previous["claim"],
+            "similarity": round(similarity, 3)}
+
+
+def _remember(pipeline: str, body: dict, model: dict) -> dict:
+    store = get_store()
+    if store is not None:
+        store.record_claim(body["claim"], pipeline, body, model=model)
+    # results cut short by the latency budget are not worth reusing
+    if settings.CLAIM_DEDUP_ENABLED and not body["skipped_checks"] and not body["truncated_checks"]:
+        _claim_indexes[pipeline].add(body["claim"], body)
+    return body
+
+
+def _conditional(pipeline: str, claim: str, body: dict, if_none_match: Optional[str]) -> Response:
+    """ETag / Cache-Control headers; 304 if the client already holds this result."""
+    etag = http_cache.text_etag(pipeline, claim, body)
+    headers = {"ETag": etag, "Cache-Control": http_cache.cache_control(http_cache.text_max_age(body))}
+    if http_cache.matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(body, headers=headers)
+
+
+def warm_start() -> int:
+    """Seed the near-duplicate indexes with complete verifications still within the TTL."""
+    store = get_store()
+    if store is None or not settings.CLAIM_DEDUP_ENABLED:
+        return 0
+    since = time.time() - settings.CLAIM_DEDUP_TTL_S
+    loaded = 0
+    for pipeline, index in _claim_indexes.items():
+        rows = store.recent_claims(limit=settings.CLAIM_DEDUP_MAX_ENTRIES, since=since, pipeline=pipeline,
+                                   complete_only=True)
+        for row in reversed(rows):  # oldest first, so expiry order is preserved
+            index.add(row["claim"], _from_stored(row))
+        loaded += len(rows)
+    return loaded
+
+# -------- Route --------
+@router.post("/verify_text", response_model=TextResponse)
+async def verify_text_endpoint(request: TextInput, deadline: Deadline = Depends(request_deadline),
+                               if_none_match: Optional[str] = Header(None)):
+    reused = await asyncio.to_thread(_reuse, "model", request.text)
+    if reused:
+        return _conditional("model", request.text, reused, if_none_match)
+
+    result = await verify_text_claim_async(request.text, deadline=deadline)
+
+    evidence_items = _to_evidence_items(result.get("evidence_links", []))
+    final_verdict, final_confidence = _override_verdict(
+        result["verdict"], result["confidence"], evidence_items
     )
+
+    final = await asyncio.to_thread(_remember, "model", _text_body(
+        request.text, final_verdict, final_confidence, evidence_items, **deadline.report()
+    ), result)
+    return _conditional("model", request.text, final, if_none_match)
+
+
+async def verify_with_evidence(claim: str, deadline: Deadline) -> dict:
+    """The /verify_text/ body: model and evidence sources (or a recent near-duplicate's result)."""
+    reused = await asyncio.to_thread(_reuse, "evidence", claim)
+    if reused:
+        return reused
+
+    # classifier + evidence, concurrently; the evidence sources already cover the news and
+    # fact-check lookups verify_text_claim_async would make, so the model runs alone
+    if settings.EVIDENCE_MODE == "cascade":
+        model_result, (evidence_result, _) = await asyncio.gather(
+            predict_claim_async(claim),
+            cascade_evidence_async(claim, deadline=deadline),
+        )
+    else:
+        model_result, evidence_result = await asyncio.gather(
+            predict_claim_async(claim),
+            gather_evidence_async(claim, deadline=deadline),
+        )
+
+    # Collect fact-checks, news, Google fact-checks (in that order)
+    evidence_items: List[dict] = []
+    for key in ("fact_checks", "news", "google_factcheck"):
+        evidence_items.extend(_to_evidence_items(evidence_result.get(key, [])))
+
+    final_verdict, final_confidence = _override_verdict(
+        model_result["verdict"], model_result["confidence"], evidence_items
+    )
+
+    return await asyncio.to_thread(_remember, "evidence", _text_body(
+        claim, final_verdict, final_confidence, evidence_items, **deadline.report()
+    ), model_result)
+
+
+@router.post("/verify_text/", response_model=TextResponse)
+async def verify_text_with_evidence_endpoint(request: TextInput, deadline: Deadline = Depends(request_deadline),
+                                             if_none_match: Optional[str] = Header(None)):
+    body = await verify_with_evidence(request.text, deadline)
+    return _conditional("evidence", request.text, body, if_none_match)
+
+
+async def _stream_verification(claim: str, deadline: Deadline) -> AsyncIterator[bytes]:
+    """
+    NDJSON events, one per line:
+      {"event": "model", ...}     classifier verdict, sent before any network I/O
+      {"event": "evidence", ...}  one per evidence source, in completion order
+      {"event": "final", ...}     TextResponse body after the override logic
+    A near-duplicate of a recent claim gets one "evidence" event (source "reused") and "final".
+    """
+    reused = await asyncio.to_thread(_reuse, "evidence", claim)
+    if reused:
+        yield ndjson_line({"event": "evidence", "source": "reused", "evidence_links": reused["evidence_links"]})
+        yield ndjson_line({"event": "final", **reused})
+        return
+
+    prediction = await predict_claim_async(claim)
+    yield ndjson_line({"event": "model", "claim": claim, **prediction})
+
+    evidence_items: List[dict] = []
+    async for source, entries in iter_evidence_async(claim, deadline=deadline):
+        items = _to_evidence_items(entries)
+        evidence_items.extend(items)
+        yield ndjson_line({"event": "evidence", "source": source, "evidence_links": items})
+
+    final_verdict, final_confidence = _override_verdict(
+        prediction["verdict"], prediction["confidence"], evidence_items
+    )
+    final = _text_body(claim, final_verdict, final_confidence, evidence_items, **deadline.report())
+    await asyncio.to_thread(_remember, "evidence", final, prediction)
+    yield ndjson_line({"event": "final", **final})
+
+
+@router.post("/verify_text/stream")
+async def verify_text_stream_endpoint(request: TextInput, deadline: Deadline = Depends(request_deadline)):
+    return StreamingResponse(_stream_verification(request.text, deadline), media_type="application/x-ndjson")
@@ -0,0 +1,253 @@
+# app/services/bulk_verify.py
+"""
+Offline re-scoring of claim and link archives, JSONL in, JSONL out.
+
+    python -m app.services.bulk_verify claims.jsonl -o scored.jsonl --workers 4
+    python -m app.services.bulk_verify requests.jsonl -o scored.jsonl --text-field body
+
+Each input line is a link ({"url": ...}) or a claim ({"text": ...} or
+{"claim": ...}, or the field named by --text-field). Every output line is
+{"position", "id", "kind", "input", "result"} or {..., "error"}, in input
+order. "id" is the entry's "id" or "request_id", if any.
+
+Lines are sent in batches of BULK_BATCH to a process pool. Within a batch,
+claims are classified together (predict_claims: one padded forward pass per
+BULK_MODEL_BATCH claims, or the inference server). News and fact-check
+lookups and link checks run concurrently on the shared async client, up to
+BULK_CONCURRENCY at a time, each under its own request budget. Caches such as
+PIB titles, short-link expansions and the reputation table are shared across
+processes on disk.
+
+After each batch is written, the output is flushed and fsynced and
+<output>.checkpoint records the input position and output size. A re-run
+truncates the output back to the checkpoint and carries on from there; if
+the output is missing or shorter than that, it starts over.
+Throughput is logged as it goes, and a JSON summary is printed at the end.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.utils.config import settings
+from app.utils.serialization import ndjson_line
+
+logger = logging.getLogger(__name__)
+
+TEXT_FIELDS = ("text", "claim")
+PROGRESS_INTERVAL_S = 10.0
+
+
+class CheckpointMismatch(ValueError):
+    """The output's checkpoint belongs to a different input file."""
+
+
+# ---------------- input ----------------
+def iter_lines(source: str) -> Iterator[str]:
+    """Non-blank input lines, unparsed (a bad line fails alone, in its worker)."""
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def _batches(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(lines)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def entry_kind(entry: dict, text_field: Optional[str] = None) -> Tuple[str, str]:
+    """("link" | "claim", url or claim text); ValueError if the entry is neither."""
+    if isinstance(entry.get("url"), str) and entry["url"].strip():
+        return "link", entry["url"].strip()
+    for field in (text_field,) if text_field else TEXT_FIELDS:
+        if isinstance(entry.get(field), str) and entry[field].strip():
+            return "claim", entry[field].strip()
+    raise ValueError(f"No url or {text_field or '/'.join(TEXT_FIELDS)} field")
+
+
+# ---------------- pool worker ----------------
+def verify_batch(start: int, lines: List[str], text_field: Optional[str] = None) -> List[dict]:
+    """Output records for input lines start, start+1, ...; runs in a pool worker."""
+    return asyncio.run(_verify_batch_async(start, lines, text_field))
+
+
+async def _verify_batch_async(start: int, lines: List[str], text_field: Optional[str]) -> List[dict]:
+    from app.services.link_verifier import analyze_url_async
+    from app.utils.aio import close_http_client, run_model
+    from app.utils.deadline import Deadline
+
+    records, tasks = [], []
+    for position, line in enumerate(lines, start):
+        record = {"position": position, "id": None, "kind": None, "input": None}
+        records.append(record)
+        try:
+            entry = json.loads(line)
+            if not isinstance(entry, dict):
+                raise ValueError("Expected a JSON object")
+            record["id"] = entry.get("id", entry.get("request_id"))
+            record["kind"], record["input"] = entry_kind(entry, text_field)
+        except ValueError as e:  # json.JSONDecodeError included
+            record["error"] = str(e)
+            continue
+        tasks.append((record, record["kind"], record["input"]))
+
+    claims = list(dict.fromkeys(value for _, kind, value in tasks if kind == "claim"))
+    if claims:
+        # text_verifier loads the classifier at import (unless INFERENCE_SOCKET is set), so it is
+        # imported only when a batch has claims: link-only runs never pay for it
+        from app.services.text_verifier import predict_claims, verify_text_claim_async
+        predictions = asyncio.ensure_future(run_model(predict_claims, claims))
+        index = {claim: i for i, claim in enumerate(claims)}
+
+        async def prediction(text: str) -> dict:
+            return (await predictions)[index[text]]
+
+    limit = asyncio.Semaphore(settings.BULK_CONCURRENCY)
+
+    async def check(record: dict, kind: str, value: str) -> None:
+        async with limit:
+            deadline = Deadline(settings.REQUEST_BUDGET_MS / 1000.0)
+            try:
+                if kind == "link":
+                    result = await analyze_url_async(value, deadline=deadline)
+                else:
+                    result = await verify_text_claim_async(value, deadline=deadline, prediction=prediction(value))
+            except Exception as e:
+                logger.warning("Bulk %s check failed at line %d: %s", kind, record["position"], e)
+                record["error"] = str(e)
+                return
+            result.update(deadline.report())
+            record["result"] = result
+
+    try:
+        await asyncio.gather(*(check(*task) for task in tasks))
+    finally:
+        await close_http_client()
+    return records
+
+
+def _ordered_map(pool: Executor, fn: Callable, batches: Iterable[Tuple[int, List[str]]],
+                 window: int) -> Iterator[Tuple[List[str], List[dict]]]:
+    """(batch, fn(start, batch)) in input order, with at most `window` batches in flight."""
+    pending: deque = deque()
+    for start, batch in batches:
+        pending.append((batch, pool.submit(fn, start, batch)))
+        if len(pending) >= window:
+            batch, future = pending.popleft()
+            yield batch, future.result()
+    while pending:
+        batch, future = pending.popleft()
+        yield batch, future.result()
+
+
+# ---------------- checkpoint ----------------
+def _checkpoint_path(output: str) -> str:
+    return output + ".checkpoint"
+
+
+def load_checkpoint(source: str, output: str) -> Tuple[int, int]:
+    """
+    (input lines done, output bytes written) of a previous run; (0, 0) to start
+    over, also when the output is gone or shorter than the checkpoint says.
+    """
+    try:
+        with open(_checkpoint_path(output), encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return 0, 0
+    if state["source"] != os.path.abspath(source):
+        raise CheckpointMismatch(f"{output} is the output of {state['source']}; choose another output file")
+    try:
+        size = os.path.getsize(output)
+    except FileNotFoundError:
+        size = -1
+    if size < state["output_bytes"]:
+        logger.warning("%s is missing or shorter than its checkpoint (%d of %d bytes); starting over",
+                       output, max(size, 0), state["output_bytes"])
+        return 0, 0
+    return state["position"], state["output_bytes"]
+
+
+def save_checkpoint(source: str, output: str, position: int, output_bytes: int) -> None:
+    tmp = _checkpoint_path(output) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"source": os.path.abspath(source), "position": position, "output_bytes": output_bytes}, f)
+    os.replace(tmp, _checkpoint_path(output))
+
+
+# ---------------- driver ----------------
+def run(source: str, output: str, workers: int = settings.BULK_WORKERS, batch_size: int = settings.BULK_BATCH,
+        text_field: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Verify every line of `source` into `output`, resuming after the last
+    checkpointed batch of a previous run with the same output.
+    """
+    start, output_bytes = load_checkpoint(source, output)
+    stats = {"resumed_at": start, "processed": 0, "claims": 0, "links": 0, "failed": 0}
+    started = last_report = time.perf_counter()
+    position = start
+    with open(output, "r+b" if start else "wb") as out:
+        out.truncate(output_bytes)  # drop lines written after the last checkpoint
+        out.seek(output_bytes)
+        batches = ((start + i * batch_size, batch)
+                   for i, batch in enumerate(_batches(islice(iter_lines(source), start, None), batch_size)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fn = partial(verify_batch, text_field=text_field)
+            for batch, records in _ordered_map(pool, fn, batches, window=workers * 2):
+                for record in records:
+                    out.write(ndjson_line(record))
+                    if "error" in record:
+                        stats["failed"] += 1
+                    else:
+                        stats["claims" if record["kind"] == "claim" else "links"] += 1
+                out.flush()
+                os.fsync(out.fileno())
+                position += len(batch)
+                stats["processed"] += len(batch)
+                save_checkpoint(source, output, position, out.tell())
+
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_INTERVAL_S:
+                    last_report = now
+                    logger.info("%d lines done (%d claims, %d links, %d failed), %.1f lines/s",
+                                position, stats["claims"], stats["links"], stats["failed"],
+                                stats["processed"] / (now - started))
+    seconds = time.perf_counter() - started
+    stats["seconds"] = round(seconds, 1)
+    stats["lines_per_s"] = round(stats["processed"] / seconds, 1) if seconds > 0 else None
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Verify a JSONL archive of claims and links")
+    parser.add_argument("source", help='JSONL with one {"url": ...} or {"text": ...} per line')
+    parser.add_argument("-o", "--output", required=True, help="JSONL results (resumed if a checkpoint exists)")
+    parser.add_argument("--workers", type=int, default=settings.BULK_WORKERS)
+    parser.add_argument("--batch", type=int, default=settings.BULK_BATCH)
+    parser.add_argument("--text-field", help=f"field holding the claim (default: {' or '.join(TEXT_FIELDS)})")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    try:
+        stats = run(args.source, args.output, workers=args.workers, batch_size=args.batch, text_field=args.text_field)
+    except CheckpointMismatch as e:
+        parser.error(str(e))
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
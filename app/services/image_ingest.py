@@ -0,0 +1,164 @@
+# app/services/image_ingest.py
+"""
+Bounded-memory image ingestion. Uploads are spooled under a size cap. Bulk
+imports of fact-checked image archives are hashed across a process pool.
+
+    python -m app.services.image_ingest archive/          # every image under a directory
+    python -m app.services.image_ingest debunked.jsonl    # {"path", "first_seen", "factcheck_url", ...} per line
+
+Memory stays flat whatever the image or archive size:
+- uploads above IMAGE_SPOOL_MEMORY_BYTES go to a temp file;
+- JPEGs decode in draft mode (image_verifier.load_image);
+- inputs are read lazily, with only a few batches of paths on the pool at once.
+Each batch of hashes is committed to the index together with the import
+position, so an interrupted import resumes after the last stored batch without
+duplicating rows.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from app.services.image_verifier import ImageIndex, hash_image
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff"}
+METADATA_FIELDS = ("first_seen", "factcheck_url", "source", "verdict", "description")
+
+
+class UploadTooLarge(ValueError):
+    """The upload exceeds the size cap."""
+
+
+# ---------------- uploads ----------------
+async def spool_upload(chunks: AsyncIterator[bytes], max_bytes: int = settings.IMAGE_MAX_BYTES):
+    """
+    Collect a request body into a SpooledTemporaryFile, rewound. The body is
+    kept in memory up to IMAGE_SPOOL_MEMORY_BYTES and on disk beyond that.
+    Raises UploadTooLarge as soon as the body passes max_bytes.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.IMAGE_SPOOL_MEMORY_BYTES)
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Images are limited to {max_bytes} bytes")
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+# ---------------- bulk import ----------------
+def iter_entries(source: str) -> Iterator[dict]:
+    """
+    Import entries in a stable order (positions must mean the same thing on
+    resume). A directory is walked sorted. A JSONL file gives one entry per
+    line: "path" (relative to the file) plus any of METADATA_FIELDS; lines
+    that are not such an object are logged and skipped.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                    yield {"path": os.path.join(root, name)}
+        return
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                logger.warning("Skipping line %d of %s: %s", number, source, e)
+                continue
+            if not isinstance(entry, dict) or not isinstance(entry.get("path"), str) or not entry["path"]:
+                logger.warning("Skipping line %d of %s: expected an object with a \"path\"", number, source)
+                continue
+            entry["path"] = os.path.join(base, entry["path"])
+            yield entry
+
+
+def _hash_file(path: str) -> Tuple[Optional[int], Optional[int], Optional[str]]:
+    """(phash, dhash, None), or (None, None, error); runs in a pool worker."""
+    try:
+        with open(path, "rb") as f:
+            p, d = hash_image(f)
+    except Exception as e:  # Pillow raises ValueError, SyntaxError, struct.error... on malformed files and EXIF
+        return None, None, str(e) or type(e).__name__
+    return p, d, None
+
+
+def _ordered_map(pool: Executor, fn: Callable, entries: Iterable[dict], window: int) -> Iterator[tuple]:
+    """(entry, fn(entry["path"])) in input order, with at most `window` tasks in flight."""
+    pending: deque = deque()
+    for entry in entries:
+        pending.append((entry, pool.submit(fn, entry["path"])))
+        if len(pending) >= window:
+            entry, future = pending.popleft()
+            yield entry, future.result()
+    while pending:
+        entry, future = pending.popleft()
+        yield entry, future.result()
+
+
+def import_images(source: str, index: ImageIndex, workers: int = settings.IMAGE_IMPORT_WORKERS,
+                  batch_size: int = settings.IMAGE_IMPORT_BATCH) -> Dict[str, int]:
+    """
+    Hash every image of `source` (directory or JSONL) into `index`, resuming
+    after the last committed batch of a previous run. Unreadable images are
+    logged and skipped.
+    """
+    key = os.path.abspath(source)
+    start = index.checkpoint(key)
+    stats = {"resumed_at": start, "indexed": 0, "failed": 0}
+    rows, position = [], start
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = _ordered_map(pool, _hash_file, islice(iter_entries(source), start, None), window=workers * 4)
+        for entry, (p, d, error) in results:
+            position += 1
+            if error is None:
+                rows.append((p, d, *(entry.get(field) for field in METADATA_FIELDS)))
+                stats["indexed"] += 1
+            else:
+                logger.warning("Skipping %s: %s", entry["path"], error)
+                stats["failed"] += 1
+            if position % batch_size == 0:
+                index.add_many(rows, checkpoint=(key, position))
+                rows = []
+        index.add_many(rows, checkpoint=(key, position))
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Hash an image archive into the debunked-image index")
+    parser.add_argument("source", help="directory of images, or JSONL of {path, first_seen, factcheck_url, ...}")
+    parser.add_argument("--index", default=settings.IMAGE_INDEX_PATH)
+    parser.add_argument("--workers", type=int, default=settings.IMAGE_IMPORT_WORKERS)
+    parser.add_argument("--batch", type=int, default=settings.IMAGE_IMPORT_BATCH)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    started = time.perf_counter()
+    stats = import_images(args.source, ImageIndex(args.index), workers=args.workers, batch_size=args.batch)
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
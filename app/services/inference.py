@@ -0,0 +1,198 @@
+# app/services/inference.py
+"""
+Inference server: model weights loaded once, shared by a pool of worker processes.
+
+    python -m app.services.inference --socket /run/crisisclarity/infer.sock --workers 2
+    INFERENCE_SOCKET=/run/crisisclarity/infer.sock uvicorn app.main:app --workers 8
+
+The parent process loads the classifier, then forks the workers. Weights are
+never written after loading, so the children share those pages copy-on-write
+and the model is resident once, however many workers run. HTTP workers started
+with INFERENCE_SOCKET set load no weights and call the pool over a Unix socket.
+
+Protocol: one request per connection, one JSON line each way:
+    -> {"op": "predict", "text": "..."}
+    <- {"ok": true, "result": {...}}  |  {"ok": false, "error": "..."}
+The kernel hands each connection to whichever idle worker accepts it first.
+Requires fork + AF_UNIX (Linux/macOS).
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_BYTES = 1 << 20
+
+Op = Callable[[dict], Any]
+
+
+class InferenceError(RuntimeError):
+    """The inference server rejected or failed a request."""
+
+
+# ---------------- client (HTTP workers) ----------------
+def _encode(op: str, payload: dict) -> bytes:
+    return json.dumps({"op": op, **payload}).encode() + b"\n"
+
+
+def _decode(line: bytes) -> Any:
+    if not line:
+        raise InferenceError("inference server closed the connection")
+    reply = json.loads(line)
+    if not reply.get("ok"):
+        raise InferenceError(reply.get("error") or "unknown error")
+    return reply["result"]
+
+
+def call(op: str, socket_path: Optional[str] = None, timeout: float = settings.INFERENCE_TIMEOUT_S, **payload) -> Any:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path or settings.INFERENCE_SOCKET)
+        sock.sendall(_encode(op, payload))
+        with sock.makefile("rb") as rfile:
+            return _decode(rfile.readline(MAX_MESSAGE_BYTES))
+
+
+async def call_async(op: str, socket_path: Optional[str] = None, timeout: float = settings.INFERENCE_TIMEOUT_S,
+                     **payload) -> Any:
+    async def roundtrip() -> bytes:
+        reader, writer = await asyncio.open_unix_connection(socket_path or settings.INFERENCE_SOCKET,
+                                                            limit=MAX_MESSAGE_BYTES)
+        try:
+            writer.write(_encode(op, payload))
+            await writer.drain()
+            return await reader.readline()
+        finally:
+            writer.close()
+
+    return _decode(await asyncio.wait_for(roundtrip(), timeout))
+
+
+# ---------------- server ----------------
+def load_ops() -> Dict[str, Op]:
+    """Load the models in this (parent) process and map op names to handlers."""
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")  # tokenizer threads do not survive fork
+    from app.services import text_verifier
+    text_verifier.load_model()
+    return {
+        "predict": lambda req: text_verifier._predict_local(req["text"]),
+        "predict_many": lambda req: text_verifier._predict_local_many(req["texts"]),
+    }
+
+
+def _handle(conn: socket.socket, ops: Dict[str, Op]) -> None:
+    with conn, conn.makefile("rb") as rfile:
+        try:
+            line = rfile.readline(MAX_MESSAGE_BYTES)
+        except OSError as e:  # socket.timeout included: the client never sent its request
+            logger.warning("Dropped inference connection: %s", e)
+            return
+        try:
+            request = json.loads(line)
+            op = request.get("op")
+            if op == "ping":
+                reply = {"ok": True, "result": {"pid": os.getpid(), "ops": sorted(ops)}}
+            elif op in ops:
+                reply = {"ok": True, "result": ops[op](request)}
+            else:
+                reply = {"ok": False, "error": f"unknown op: {op!r}"}
+        except Exception as e:
+            logger.exception("Inference request failed")
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        try:
+            conn.sendall(json.dumps(reply, default=str).encode() + b"\n")
+        except OSError as e:  # client gone or not reading
+            logger.warning("Dropped inference reply: %s", e)
+
+
+def _worker(sock: socket.socket, ops: Dict[str, Op], threads: int,
+            conn_timeout: float = settings.INFERENCE_CONN_TIMEOUT_S) -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent handles Ctrl-C
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    while True:
+        conn, _ = sock.accept()
+        # bounds each read and write, so a stalled client cannot hold the worker
+        conn.settimeout(conn_timeout)
+        _handle(conn, ops)
+
+
+def serve(socket_path: str, workers: int = settings.INFERENCE_WORKERS, threads: int = settings.INFERENCE_THREADS,
+          ops: Optional[Dict[str, Op]] = None, conn_timeout: float = settings.INFERENCE_CONN_TIMEOUT_S) -> None:
+    """Load models, fork `workers` processes accepting on `socket_path`, and restart any that die."""
+    ops = load_ops() if ops is None else ops
+    # loaded objects are never collected; freezing keeps GC from touching (and un-sharing) their pages
+    gc.freeze()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    sock.listen(128)
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _worker(sock, ops, threads, conn_timeout)
+            finally:
+                os._exit(1)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    for _ in range(workers):
+        spawn()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info("Inference server on %s: %d workers, ops %s", socket_path, workers, sorted(ops))
+
+    try:
+        while children:
+            pid, status = os.wait()
+            children.discard(pid)
+            if not stopping:
+                logger.warning("Inference worker %d exited (status %d); restarting", pid, status)
+                spawn()
+    finally:
+        sock.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve model inference to HTTP workers over a Unix socket")
+    parser.add_argument("--socket", default=settings.INFERENCE_SOCKET or "/tmp/crisisclarity-inference.sock")
+    parser.add_argument("--workers", type=int, default=settings.INFERENCE_WORKERS)
+    parser.add_argument("--threads", type=int, default=settings.INFERENCE_THREADS,
+                        help="torch threads per worker (0 = torch default)")
+    args = parser.parse_args(argv)
+
+    # plain stderr logging: the queue listener thread of setup_logging() does not survive fork
+    logging.basicConfig(level=settings.LOG_LEVEL, format="[%(asctime)s] [%(levelname)s] [%(process)d]: %(message)s")
+    serve(args.socket, args.workers, args.threads, ops=load_ops())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
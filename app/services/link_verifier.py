@@ -92,14 +92,24 @@ def analyze_url(url: str) -> dict:
     return result
 '''
 # app/services/link_verifier.py
+import asyncio
+import logging
 import os
 import socket
 import requests
-import tldextract
 import whois
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from dateutil import parser as date_parser
+from app.utils.aio import http_client
+from app.utils.deadline import Deadline, arun_with_timeout, run_with_timeout, timeout_for
+from app.utils.domains import registered_domain
+from app.utils.metrics import STAGE_SECONDS, UPSTREAM_ERRORS
+from app.utils.config import settings
+from app.utils.reputation import lookup_domain
+from app.utils.url_expander import RedirectChain, expand_url, expand_url_async, is_shortener
+
+logger = logging.getLogger(__name__)
 
 # ---------- Trusted Whitelist ----------
 TRUSTED_DOMAINS = {
@@ -120,13 +130,19 @@ SUSPICIOUS_KEYWORDS = ["login", "verify", "update", "secure", "bank", "account"]
 URLSCAN_API_KEY = os.getenv("URLSCAN_API_KEY")  # Set in env
 URLSCAN_API = "https://urlscan.io/api/v1/scan/"
 
+# per-call caps; a request Deadline can only shorten these
+WHOIS_TIMEOUT = 10
+DNS_TIMEOUT = 5
+URLSCAN_TIMEOUT = 10
+
 
 def get_domain_age(domain: str) -> int | None:
     try:
-        print(f"Running WHOIS lookup for domain: {domain}")
-        w = whois.whois(domain)
+        logger.debug("Running WHOIS lookup for domain: %s", domain)
+        with STAGE_SECONDS.time("whois"):
+            w = whois.whois(domain)
         creation_date = w.creation_date
-        print(f"WHOIS creation_date raw: {creation_date}")
+        logger.debug("WHOIS creation_date raw: %s", creation_date)
 
         if isinstance(creation_date, list):
             # Normalize all dates to UTC naive for comparison
@@ -142,11 +158,12 @@ def get_domain_age(domain: str) -> int | None:
 
         if isinstance(creation_date, datetime):
             age_days = (datetime.utcnow() - creation_date).days
-            print(f"Domain age in days: {age_days}")
+            logger.debug("Domain age in days: %s", age_days)
             return age_days
 
     except Exception as e:
-        print(f"WHOIS lookup failed for {domain}: {e}")
+        UPSTREAM_ERRORS.inc("whois")
+        logger.warning("WHOIS lookup failed for %s: %s", domain, e)
 
     return None
 
@@ -155,33 +172,36 @@ def get_domain_age(domain: str) -> int | None:
 def fallback_dns_check(domain: str) -> bool:
     """Fallback DNS resolution if WHOIS fails."""
     try:
-        socket.gethostbyname(domain)
+        with STAGE_SECONDS.time("dns"):
+            socket.gethostbyname(domain)
         return True
     except socket.gaierror:
         return False
 
 
-def scan_with_urlscan(url: str) -> Optional[Dict[str, Any]]:
+def scan_with_urlscan(url: str, timeout: float = URLSCAN_TIMEOUT) -> Optional[Dict[str, Any]]:
     """Submit a URL to urlscan.io and return analysis."""
     if not URLSCAN_API_KEY:
         return None  # Skip if not configured
 
     headers = {"API-Key": URLSCAN_API_KEY, "Content-Type": "application/json"}
     try:
-        resp = requests.post(URLSCAN_API, headers=headers, json={"url": url, "public": "on"}, timeout=10)
+        with STAGE_SECONDS.time("urlscan"):
+            resp = requests.post(URLSCAN_API, headers=headers, json={"url": url, "public": "on"}, timeout=timeout)
         if resp.status_code == 200:
             return resp.json()
         else:
-            print(f"[URLSCAN ERROR] Status {resp.status_code}: {resp.text}")
+            UPSTREAM_ERRORS.inc("urlscan")
+            logger.warning("[URLSCAN ERROR] Status %s: %s", resp.status_code, resp.text)
     except Exception as e:
-        print(f"[URLSCAN ERROR] {e}")
+        UPSTREAM_ERRORS.inc("urlscan")
+        logger.warning("[URLSCAN ERROR] %s", e)
     return None
 
 
-def analyze_url(url: str) -> Dict[str, Any]:
-    """Main analysis function for link verification."""
-    extracted = tldextract.extract(url)
-    domain = ".".join(part for part in [extracted.domain, extracted.suffix] if part)
+def _static_checks(url: str) -> Dict[str, Any]:
+    """Domain extraction, trusted whitelist, keyword and protocol checks (no network I/O)."""
+    domain = registered_domain(url)
 
     result = {
         "url": url,
@@ -207,15 +227,34 @@ def analyze_url(url: str) -> Dict[str, Any]:
     if url.lower().startswith("http://"):
         result["reasons"].append("Insecure protocol (http)")
 
-    # --- WHOIS check ---
-    age = get_domain_age(domain)
-    result["domain_age_days"] = age
-    if age is None:
-        if not fallback_dns_check(domain):
-            result["reasons"].append("Domain does not resolve in DNS")
+    return result
 
-    # --- URLScan check (extra layer) ---
-    urlscan_data = scan_with_urlscan(url)
+
+def _apply_reputation(result: Dict[str, Any]) -> Tuple[bool, bool]:
+    """
+    Fill domain signals from the precomputed reputation table (a memory-mapped
+    lookup, no network I/O). Returns (WHOIS/DNS answered, urlscan answered);
+    a domain not in the table, or with a stale entry, answers neither.
+    """
+    entry = lookup_domain(result["domain"])
+    if entry is None:
+        return False, False
+    if entry.trusted:
+        result["status"] = "Trusted"
+        result["trusted"] = True
+        return True, True
+    result["domain_age_days"] = entry.age_days
+    # same rule as the live path: DNS only matters when WHOIS has no creation date
+    if entry.age_days is None and entry.resolves is False:
+        result["reasons"].append("Domain does not resolve in DNS")
+    if entry.blocked:
+        result["reasons"].append("Domain is on the blocklist")
+    if entry.urlscan_malicious:
+        result["reasons"].append("URLScan flagged this as malicious")
+    return True, entry.urlscan_malicious is not None
+
+
+def _finalize(result: Dict[str, Any], urlscan_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     if urlscan_data:
         verdicts = urlscan_data.get("verdicts", {})
         malicious = verdicts.get("overall", {}).get("malicious", False)
@@ -230,3 +269,164 @@ def analyze_url(url: str) -> Dict[str, Any]:
         result["status"] = "Flagged"
 
     return result
+
+
+def _shortener_hop(url: str) -> Dict[str, Any]:
+    """A link service partway down a redirect chain: only its own URL is judged (keywords, protocol)."""
+    result = _static_checks(url)
+    if not result["trusted"]:
+        result["status"] = "Flagged" if result["reasons"] else "Shortener"
+    return result
+
+
+def _refused_hop(url: str, reason: str) -> Dict[str, Any]:
+    """A hop that was never requested (internal address): flagged on the spot, no lookups."""
+    result = _static_checks(url)
+    result["reasons"].append(reason)
+    result.update(status="Flagged", trusted=False)
+    return result
+
+
+def _follow_chain(url: str, chain: RedirectChain, hops: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    The verdict for the destination, reported under the original URL along
+    with every hop. A flagged hop on the way, or a chain that never ends,
+    flags the link even when the destination is trusted.
+    """
+    result = dict(hops[-1])
+    result["url"] = url
+    result["final_url"] = chain.final_url
+    result["redirect_chain"] = [
+        {key: hop[key] for key in ("url", "domain", "status", "trusted", "reasons")} for hop in hops
+    ]
+    reasons = list(result["reasons"])
+    for hop in hops[:-1]:
+        reason = f"Redirects through flagged link on {hop['domain']}"
+        if hop["reasons"] and reason not in reasons:
+            reasons.append(reason)
+    if chain.exhausted:
+        reasons.append(f"Redirect chain loops or exceeds {settings.REDIRECT_MAX_HOPS} hops")
+    if reasons:
+        result.update(reasons=reasons, status="Flagged", trusted=False)
+    return result
+
+
+def analyze_url(url: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """
+    Main analysis function for link verification.
+    Shortened links are expanded first and every hop is checked (see
+    _follow_chain). WHOIS/DNS/urlscan each get at most what is left of
+    `deadline`; checks that cannot run in time are recorded on it and skipped.
+    """
+    chain = expand_url(url, deadline=deadline)
+    if len(chain.urls) == 1 and not chain.refused:
+        return _analyze_hop(url, deadline)
+    hops = [_shortener_hop(hop) if is_shortener(hop) else _analyze_hop(hop, deadline) for hop in chain.urls[:-1]]
+    last = _refused_hop(chain.final_url, chain.refused) if chain.refused else _analyze_hop(chain.final_url, deadline)
+    return _follow_chain(url, chain, hops + [last])
+
+
+def _analyze_hop(url: str, deadline: Optional[Deadline]) -> Dict[str, Any]:
+    result = _static_checks(url)
+    if result["trusted"]:
+        return result
+    domain = result["domain"]
+
+    # --- Precomputed reputation (replaces WHOIS/DNS, and urlscan if it has a verdict) ---
+    known, urlscan_known = _apply_reputation(result)
+    if result["trusted"]:
+        return result
+
+    # --- WHOIS check (python-whois has no overall timeout) ---
+    if not known:
+        age = run_with_timeout("whois", get_domain_age, domain, deadline=deadline, cap=WHOIS_TIMEOUT)
+        result["domain_age_days"] = age
+        if age is None:
+            # None means the lookup was skipped, not that the domain is unresolvable
+            resolves = run_with_timeout("dns", fallback_dns_check, domain, deadline=deadline, cap=DNS_TIMEOUT)
+            if resolves is False:
+                result["reasons"].append("Domain does not resolve in DNS")
+
+    # --- URLScan check (extra layer) ---
+    if urlscan_known:
+        urlscan_data = None
+    elif URLSCAN_API_KEY and deadline and deadline.expired():
+        deadline.skip("urlscan")
+        urlscan_data = None
+    else:
+        urlscan_data = scan_with_urlscan(url, timeout=timeout_for(deadline, URLSCAN_TIMEOUT))
+
+    return _finalize(result, urlscan_data)
+
+
+async def scan_with_urlscan_async(url: str, timeout: float = URLSCAN_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """scan_with_urlscan() on the shared async client."""
+    if not URLSCAN_API_KEY:
+        return None  # Skip if not configured
+
+    headers = {"API-Key": URLSCAN_API_KEY, "Content-Type": "application/json"}
+    try:
+        with STAGE_SECONDS.time("urlscan"):
+            resp = await http_client().post(URLSCAN_API, headers=headers, json={"url": url, "public": "on"}, timeout=timeout)
+        if resp.status_code == 200:
+            return resp.json()
+        else:
+            UPSTREAM_ERRORS.inc("urlscan")
+            logger.warning("[URLSCAN ERROR] Status %s: %s", resp.status_code, resp.text)
+    except Exception as e:
+        UPSTREAM_ERRORS.inc("urlscan")
+        logger.warning("[URLSCAN ERROR] %s", e)
+    return None
+
+
+async def _whois_then_dns(result: Dict[str, Any], deadline: Optional[Deadline]) -> None:
+    domain = result["domain"]
+    age = await arun_with_timeout("whois", get_domain_age, domain, deadline=deadline, cap=WHOIS_TIMEOUT)
+    result["domain_age_days"] = age
+    if age is None:
+        resolves = await arun_with_timeout("dns", fallback_dns_check, domain, deadline=deadline, cap=DNS_TIMEOUT)
+        if resolves is False:
+            result["reasons"].append("Domain does not resolve in DNS")
+
+
+async def analyze_url_async(url: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """
+    analyze_url() for the event loop: WHOIS/DNS run on the blocking pool while
+    urlscan.io is awaited concurrently on the shared async client. The hops
+    of an expanded link are checked concurrently.
+    """
+    chain = await expand_url_async(url, deadline=deadline)
+    if len(chain.urls) == 1 and not chain.refused:
+        return await _analyze_hop_async(url, deadline)
+
+    async def static_hop(check, *args) -> Dict[str, Any]:
+        return check(*args)
+
+    last = (static_hop(_refused_hop, chain.final_url, chain.refused) if chain.refused
+            else _analyze_hop_async(chain.final_url, deadline))
+    hops = await asyncio.gather(*(
+        static_hop(_shortener_hop, hop) if is_shortener(hop) else _analyze_hop_async(hop, deadline)
+        for hop in chain.urls[:-1]
+    ), last)
+    return _follow_chain(url, chain, list(hops))
+
+
+async def _analyze_hop_async(url: str, deadline: Optional[Deadline]) -> Dict[str, Any]:
+    result = _static_checks(url)
+    if result["trusted"]:
+        return result
+    known, urlscan_known = _apply_reputation(result)
+    if result["trusted"]:
+        return result
+
+    if urlscan_known:
+        urlscan = asyncio.sleep(0, result=None)
+    elif URLSCAN_API_KEY and deadline and deadline.expired():
+        deadline.skip("urlscan")
+        urlscan = asyncio.sleep(0, result=None)
+    else:
+        urlscan = scan_with_urlscan_async(url, timeout=timeout_for(deadline, URLSCAN_TIMEOUT))
+    whois_dns = asyncio.sleep(0) if known else _whois_then_dns(result, deadline)
+    _, urlscan_data = await asyncio.gather(whois_dns, urlscan)
+
+    return _finalize(result, urlscan_data)
@@ -1,16 +1,39 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
-from app.utils.news_api import search_news
-from app.utils.scraper import fetch_factchecks
+import asyncio
+import logging
+from typing import Awaitable, List, Optional, Sequence
+from app.services import inference
+from app.utils.aio import run_model
+from app.utils.config import settings
+from app.utils.deadline import Deadline
+from app.utils.metrics import STAGE_SECONDS
+from app.utils.news_api import search_news, search_news_async
+from app.utils.scraper import fetch_factchecks, fetch_factchecks_async
+
+logger = logging.getLogger(__name__)
 
 MODEL_NAME = "Pulk17/Fake-News-Detection"
 
-# Load model once
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
-
 labels = ["Fake", "Real"]
 
+tokenizer = None
+model = None
+
+
+def load_model():
+    """Load the classifier into this process (idempotent)."""
+    global tokenizer, model
+    if model is None:
+        # imported here, not at module level: workers using the inference server never pay for torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+        tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+        model.eval()
+
+
+# Load model once, unless inference is delegated to the inference server processes
+if not settings.INFERENCE_SOCKET:
+    load_model()
+
 """def verify_text_claim(text: str):
     # ---- Step 1: ML prediction ----
     inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
@@ -52,46 +75,98 @@ labels = ["Fake", "Real"]
     }
 """
 
-def verify_text_claim(text: str):
-    # ---- Step 1: ML prediction ----
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    with torch.no_grad():
+def _predict_local(text: str) -> dict:
+    import torch  # already loaded by load_model()
+
+    with STAGE_SECONDS.time("tokenize"):
+        inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
+    with STAGE_SECONDS.time("model_forward"), torch.no_grad():
         outputs = model(**inputs)
         predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
 
     verdict_index = torch.argmax(predictions).item()
-    verdict = labels[verdict_index]
-    confidence = float(predictions[0][verdict_index])
+    return {
+        "verdict": labels[verdict_index],
+        "confidence": float(predictions[0][verdict_index]),
+    }
+
+
+def _predict_local_many(texts: Sequence[str]) -> List[dict]:
+    import torch
+
+    with STAGE_SECONDS.time("tokenize"):
+        inputs = tokenizer(list(texts), return_tensors="pt", truncation=True, padding=True)
+    with STAGE_SECONDS.time("model_forward"), torch.no_grad():
+        predictions = torch.nn.functional.softmax(model(**inputs).logits, dim=-1)
+
+    confidences, indices = predictions.max(dim=-1)
+    return [
+        {"verdict": labels[i], "confidence": float(c)} for i, c in zip(indices.tolist(), confidences.tolist())
+    ]
+
+
+def predict_claims(texts: Sequence[str], batch_size: int = settings.BULK_MODEL_BATCH) -> List[dict]:
+    """
+    predict_claim() for many claims, batch_size per forward pass. Claims are
+    grouped by length, so each batch pads to a similar length, and the results
+    come back in input order.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    results: List[Optional[dict]] = [None] * len(texts)
+    for start in range(0, len(order), batch_size):
+        chunk = order[start:start + batch_size]
+        batch = [texts[i] for i in chunk]
+        if settings.INFERENCE_SOCKET:
+            with STAGE_SECONDS.time("model_remote"):
+                predictions = inference.call("predict_many", texts=batch)
+        else:
+            predictions = _predict_local_many(batch)
+        for i, prediction in zip(chunk, predictions):
+            results[i] = prediction
+    return results
+
+
+def predict_claim(text: str) -> dict:
+    """Classifier-only verdict for a claim (no evidence lookups)."""
+    if settings.INFERENCE_SOCKET:
+        with STAGE_SECONDS.time("model_remote"):
+            return inference.call("predict", text=text)
+    return _predict_local(text)
+
+
+async def predict_claim_async(text: str) -> dict:
+    """predict_claim() off the event loop: model executor, or the inference server if configured."""
+    if settings.INFERENCE_SOCKET:
+        with STAGE_SECONDS.time("model_remote"):
+            return await inference.call_async("predict", text=text)
+    return await run_model(_predict_local, text)
+
+
+def _combine(text: str, prediction: dict, articles: List[dict], factcheck_hits: List[dict]) -> dict:
+    verdict = prediction["verdict"]
+    confidence = prediction["confidence"]
 
     evidence_links = []
 
-    # ---- Step 2: News API evidence ----
-    try:
-        articles = search_news(text) or []
-        # Keep full dict with url + source
-        for a in articles:
+    # ---- News API evidence ----
+    # Keep full dict with url + source
+    for a in articles:
+        evidence_links.append({
+            "url": a.get("url"),
+            "source": a.get("source", {}).get("name") if isinstance(a.get("source"), dict) else a.get("source"),
+            "verdict": None   # News API doesn’t give verdicts
+        })
+
+    # ---- Fact-check scraper (trusted override) ----
+    if factcheck_hits:
+        verdict = factcheck_hits[0]["verdict"]  # trusted override
+        confidence = 0.99
+        for hit in factcheck_hits:
             evidence_links.append({
-                "url": a.get("url"),
-                "source": a.get("source", {}).get("name") if isinstance(a.get("source"), dict) else a.get("source"),
-                "verdict": None   # News API doesn’t give verdicts
+                "url": hit.get("url"),
+                "source": hit.get("source", "Fact-check"),
+                "verdict": hit.get("verdict")
             })
-    except Exception as e:
-        print(f"[WARN] NewsAPI failed: {e}")
-
-    # ---- Step 3: Fact-check scraper (trusted override) ----
-    try:
-        factcheck_hits = fetch_factchecks(text) or []
-        if factcheck_hits:
-            verdict = factcheck_hits[0]["verdict"]  # trusted override
-            confidence = 0.99
-            for hit in factcheck_hits:
-                evidence_links.append({
-                    "url": hit.get("url"),
-                    "source": hit.get("source", "Fact-check"),
-                    "verdict": hit.get("verdict")
-                })
-    except Exception as e:
-        print(f"[WARN] Scraper failed: {e}")
 
     # ---- Deduplicate links (by URL) ----
     seen = set()
@@ -108,3 +183,47 @@ def verify_text_claim(text: str):
         "evidence_links": unique_links
     }
 
+
+def verify_text_claim(text: str, deadline: Optional[Deadline] = None):
+    # ---- Step 1: ML prediction ----
+    prediction = predict_claim(text)
+
+    # ---- Step 2: News API evidence ----
+    try:
+        articles = search_news(text, deadline=deadline) or []
+    except Exception as e:
+        logger.warning("NewsAPI failed: %s", e)
+        articles = []
+
+    # ---- Step 3: Fact-check scraper ----
+    try:
+        factcheck_hits = fetch_factchecks(text, deadline=deadline) or []
+    except Exception as e:
+        logger.warning("Scraper failed: %s", e)
+        factcheck_hits = []
+
+    return _combine(text, prediction, articles, factcheck_hits)
+
+
+async def verify_text_claim_async(text: str, deadline: Optional[Deadline] = None,
+                                  prediction: Optional[Awaitable[dict]] = None):
+    """
+    verify_text_claim() without blocking the event loop: inference runs on the
+    model executor while news and fact-check lookups are awaited alongside it.
+    `prediction` replaces the model call (e.g. a share of a batched forward pass).
+    """
+    prediction, articles, factcheck_hits = await asyncio.gather(
+        prediction if prediction is not None else predict_claim_async(text),
+        search_news_async(text, deadline=deadline),
+        fetch_factchecks_async(text, deadline=deadline),
+        return_exceptions=True,
+    )
+    if isinstance(prediction, BaseException):
+        raise prediction
+    if isinstance(articles, BaseException):
+        logger.warning("NewsAPI failed: %s", articles)
+        articles = []
+    if isinstance(factcheck_hits, BaseException):
+        logger.warning("Scraper failed: %s", factcheck_hits)
+        factcheck_hits = []
+    return _combine(text, prediction, articles or [], factcheck_hits or [])
@@ -0,0 +1,75 @@
+# app/utils/aio.py
+"""
+Event-loop plumbing for the async request path:
+  - one pooled httpx.AsyncClient per event loop for all upstream HTTP calls
+  - a dedicated, sized executor for model inference, so torch never runs on
+    the event loop or competes with Starlette's threadpool
+  - an event-loop lag probe feeding crisisclarity_event_loop_lag_seconds
+"""
+import asyncio
+import functools
+import logging
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import httpx
+
+from app.utils.config import settings
+from app.utils.metrics import LOOP_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MODEL_EXECUTOR = ThreadPoolExecutor(max_workers=settings.MODEL_WORKERS, thread_name_prefix="model")
+
+
+def _new_model_executor() -> None:
+    # forked pool workers (bulk_verify) inherit the executor without its threads
+    global MODEL_EXECUTOR
+    MODEL_EXECUTOR = ThreadPoolExecutor(max_workers=settings.MODEL_WORKERS, thread_name_prefix="model")
+
+
+os.register_at_fork(after_in_child=_new_model_executor)
+
+# httpx connection pools are bound to the loop that opened them (tests and CLIs may run several)
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def http_client() -> httpx.AsyncClient:
+    """Shared client for the running loop (keep-alive across requests, redirects followed like requests)."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=settings.HTTP_MAX_CONNECTIONS),
+        )
+    return client
+
+
+async def close_http_client() -> None:
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def run_model(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run CPU-bound inference on MODEL_EXECUTOR without blocking the loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(MODEL_EXECUTOR, functools.partial(fn, *args, **kwargs))
+
+
+async def monitor_loop_lag(interval_s: float = settings.LOOP_LAG_INTERVAL_MS / 1000.0) -> None:
+    """
+    Sleep for interval_s and record how late the loop woke up. Anything that
+    blocks the loop (sync I/O, parsing, inference) shows up as lag here.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval_s)
+        lag = loop.time() - start - interval_s
+        LOOP_LAG_SECONDS.observe(max(0.0, lag))
+        if lag > 0.5:
+            logger.warning("Event loop blocked for %.0f ms", lag * 1000)
@@ -0,0 +1,163 @@
+# app/utils/claim_index.py
+"""
+Near-duplicate claim lookup with MinHash + LSH banding.
+
+Forwarded messages mutate (emojis, "Forwarded as received" prefixes, shuffled
+sentences), so exact-text caching rarely hits. Claims are normalized, split
+into word 1- and 2-gram shingles, and summarized by a MinHash signature. The
+signature is cut into bands, and claims sharing any band become candidates.
+Candidates are kept only if their estimated Jaccard similarity reaches the
+threshold.
+
+With 16 bands x 8 rows, pairs at Jaccard 0.7 share a band ~60% of the time
+and pairs at 0.8 ~95%, so thresholds around 0.8 keep high recall.
+"""
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_FORWARD_PREFIX = re.compile(r"^\s*(?:fwd?\s*:|forwarded(?:\s+as\s+received)?|forwarded\s+many\s+times)\s*", re.IGNORECASE)
+
+
+class _StripTable(dict):
+    """
+    str.translate() table filled per code point on first sight: punctuation
+    and symbols (emoji included) become spaces, format characters (ZWJ) and
+    emoji variation selectors are dropped. Letters, digits and combining
+    marks stay, so Devanagari vowel signs (Mn/Mc) are part of their word.
+    """
+
+    def __missing__(self, codepoint: int) -> Optional[str]:
+        char = chr(codepoint)
+        category = unicodedata.category(char)
+        if category[0] in "PS":
+            value: Optional[str] = " "
+        elif category == "Cf" or 0xFE00 <= codepoint <= 0xFE0F or 0xE0100 <= codepoint <= 0xE01EF:
+            value = None
+        else:
+            value = char
+        self[codepoint] = value
+        return value
+
+
+_STRIP = _StripTable()
+
+
+def normalize_claim(text: str) -> str:
+    """Lowercase, drop forward prefixes, emojis and punctuation, collapse whitespace."""
+    text = text or ""
+    while True:
+        stripped = _FORWARD_PREFIX.sub("", text, count=1)
+        if stripped == text:
+            break
+        text = stripped
+    return " ".join(text.lower().translate(_STRIP).split())
+
+
+def shingles(text: str) -> Set[str]:
+    words = normalize_claim(text).split()
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+class ClaimIndex:
+    """
+    MinHash LSH index of recently verified claims -> payload, with a TTL.
+    Entries expire in insertion order, so expiry is a pop from the front.
+    Thread-safe.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16, ttl_s: float = 6 * 3600,
+                 max_entries: int = 50000, seed: int = 1, clock: Callable[[], float] = time.monotonic):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._clock = clock
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(bands)]
+        # id -> (expires_at, signature, band keys, payload), oldest first
+        self._entries: "OrderedDict[int, Tuple[float, np.ndarray, List[bytes], Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature; None when nothing is left after normalization (emoji or punctuation only)."""
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles(text)), dtype=np.uint64)
+        if hashes.size == 0:
+            return None
+        # (a*h + b) mod p, one row per shingle; uint64 wraparound is fine for hashing
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            entry_id, (expires_at, _, _, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._remove(entry_id)
+
+    def _remove(self, entry_id: int) -> None:
+        _, _, keys, _ = self._entries.pop(entry_id)
+        for bucket, key in zip(self._buckets, keys):
+            ids = bucket.get(key)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del bucket[key]
+
+    def add(self, text: str, payload: Any) -> None:
+        sig = self.signature(text)
+        if sig is None:  # all such claims would share one signature
+            return
+        keys = self._band_keys(sig)
+        with self._lock:
+            now = self._clock()
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (now + self.ttl_s, sig, keys, payload)
+            for bucket, key in zip(self._buckets, keys):
+                bucket.setdefault(key, set()).add(entry_id)
+            self._expire(now)
+
+    def lookup(self, text: str) -> Optional[Tuple[float, Any]]:
+        """(estimated Jaccard, payload) of the most similar live claim at or above the threshold."""
+        sig = self.signature(text)
+        if sig is None:
+            return None
+        keys = self._band_keys(sig)
+        with self._lock:
+            self._expire(self._clock())
+            candidates: Set[int] = set()
+            for bucket, key in zip(self._buckets, keys):
+                candidates.update(bucket.get(key, ()))
+            if not candidates:
+                return None
+            ids = list(candidates)
+            others = np.stack([self._entries[entry_id][1] for entry_id in ids])
+            similarities = np.count_nonzero(others == sig, axis=1) / self.num_perm
+            best = int(similarities.argmax())
+            if similarities[best] < self.threshold:
+                return None
+            return float(similarities[best]), self._entries[ids[best]][3]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -1,16 +1,136 @@
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-class Settings:
-    ENV = os.getenv("ENV", "development")
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-
-    
-    NEWS_API_KEY = os.getenv("NEWS_API_KEY")
-    GNEWS_API_KEY = os.getenv("GNEWS_API_KEY")
-    GOOGLE_FACTCHECK_API_KEY = os.getenv("GOOGLE_FACTCHECK_API_KEY")
-
-settings = Settings()
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class Settings:
+    ENV = os.getenv("ENV", "development")
+    APP_PROFILE = os.getenv("APP_PROFILE", "all")  # text | link | image | factcard | all, comma-separated
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # per-logger, e.g. "urllib3=INFO,app.utils.scraper=DEBUG"
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+    LOG_DEBUG_SAMPLE_RATES = os.getenv("LOG_DEBUG_SAMPLE_RATES", "")  # per-logger, e.g. "urllib3=0.01,app.utils.scraper=1"
+    LOG_FILE = os.getenv("LOG_FILE", "app.log")
+    LOG_REQUESTS_FILE = os.getenv("LOG_REQUESTS_FILE", "requests_log.jsonl")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "")  # e.g. "midnight" for time-based rotation
+
+    
+    NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+    GNEWS_API_KEY = os.getenv("GNEWS_API_KEY")
+    GOOGLE_FACTCHECK_API_KEY = os.getenv("GOOGLE_FACTCHECK_API_KEY")
+
+    # Request-level latency budget (overridable per request, capped at the max)
+    REQUEST_BUDGET_MS = int(os.getenv("REQUEST_BUDGET_MS", "15000"))
+    REQUEST_BUDGET_MAX_MS = int(os.getenv("REQUEST_BUDGET_MAX_MS", "60000"))
+
+    # Async request path
+    MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", "1"))  # inference threads (torch already uses intra-op threads)
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))  # shared upstream client pool
+    THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))  # Starlette threadpool for remaining sync routes
+    LOOP_LAG_INTERVAL_MS = int(os.getenv("LOOP_LAG_INTERVAL_MS", "500"))
+
+    # Near-duplicate claims reuse a recent verdict instead of re-verifying
+    CLAIM_DEDUP_ENABLED = os.getenv("CLAIM_DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+    CLAIM_DEDUP_THRESHOLD = float(os.getenv("CLAIM_DEDUP_THRESHOLD", "0.8"))  # estimated Jaccard of shingles
+    CLAIM_DEDUP_TTL_S = float(os.getenv("CLAIM_DEDUP_TTL_S", str(6 * 3600)))
+    CLAIM_DEDUP_MAX_ENTRIES = int(os.getenv("CLAIM_DEDUP_MAX_ENTRIES", "50000"))
+
+    # Verdict history (SQLite, WAL); writes are batched on a background thread
+    VERDICT_STORE_ENABLED = os.getenv("VERDICT_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+    VERDICT_STORE_PATH = os.getenv("VERDICT_STORE_PATH", "verdicts.db")
+    VERDICT_STORE_BATCH = int(os.getenv("VERDICT_STORE_BATCH", "200"))
+    VERDICT_STORE_FLUSH_MS = int(os.getenv("VERDICT_STORE_FLUSH_MS", "200"))
+
+    # HTTP caching of verify responses (Cache-Control max-age by verdict freshness) and compression
+    CACHE_MAX_AGE_DECIDED_S = int(os.getenv("CACHE_MAX_AGE_DECIDED_S", "3600"))  # fact-checked / trusted
+    CACHE_MAX_AGE_UNDECIDED_S = int(os.getenv("CACHE_MAX_AGE_UNDECIDED_S", "300"))  # model-only / heuristics
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+
+    # Evidence for /verify_text/: "all" queries every source; "cascade" goes cheapest and most
+    # trusted first and stops at the first decisive match scoring at least the minimum
+    EVIDENCE_MODE = os.getenv("EVIDENCE_MODE", "all")
+    EVIDENCE_CASCADE_MIN_SCORE = float(os.getenv("EVIDENCE_CASCADE_MIN_SCORE", "0.85"))
+
+    # Fact-card images (PNG/WebP), cached by content hash
+    FACTCARD_CACHE_DIR = os.getenv("FACTCARD_CACHE_DIR", "factcards")  # "" = in-memory only
+    FACTCARD_CACHE_MAX_BYTES = int(os.getenv("FACTCARD_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # FACTCARD_CACHE_DIR is pruned (oldest files first) back under this size; 0 = unbounded
+    FACTCARD_CACHE_DIR_MAX_BYTES = int(os.getenv("FACTCARD_CACHE_DIR_MAX_BYTES", str(1024 * 1024 * 1024)))
+    FACTCARD_RENDER_WORKERS = int(os.getenv("FACTCARD_RENDER_WORKERS", "2"))  # bulk render processes
+    FACTCARD_BULK_MAX = int(os.getenv("FACTCARD_BULK_MAX", "100"))
+    FACTCARD_FONT = os.getenv("FACTCARD_FONT", "")  # TTF path; Pillow's bundled font has no Indic scripts
+
+    # Registered-domain extraction from the bundled public-suffix snapshot (app/utils/domains.py)
+    PSL_INCLUDE_PRIVATE = os.getenv("PSL_INCLUDE_PRIVATE", "false").lower() in ("1", "true", "yes")  # e.g. github.io
+    DOMAIN_CACHE_SIZE = int(os.getenv("DOMAIN_CACHE_SIZE", "65536"))  # hosts
+
+    # Precomputed domain reputation (python -m app.utils.reputation build ...), consulted before WHOIS/DNS
+    REPUTATION_TABLE_PATH = os.getenv("REPUTATION_TABLE_PATH", "reputation.bin")  # "" = always check live
+    REPUTATION_MAX_AGE_DAYS = int(os.getenv("REPUTATION_MAX_AGE_DAYS", "30"))  # older entries are ignored
+    REPUTATION_RELOAD_S = float(os.getenv("REPUTATION_RELOAD_S", "60"))  # how often to look for a rebuilt file
+    REPUTATION_BUILD_WORKERS = int(os.getenv("REPUTATION_BUILD_WORKERS", "32"))
+
+    # Shortened links are expanded hop by hop and every hop is checked (app/utils/url_expander.py)
+    REDIRECT_EXPAND = os.getenv("REDIRECT_EXPAND", "shorteners")  # shorteners | all | off
+    REDIRECT_MAX_HOPS = int(os.getenv("REDIRECT_MAX_HOPS", "5"))
+    REDIRECT_HOP_TIMEOUT_S = float(os.getenv("REDIRECT_HOP_TIMEOUT_S", "3"))
+    REDIRECT_CACHE_PATH = os.getenv("REDIRECT_CACHE_PATH", "redirects.db")  # "" = in-memory only
+    # hops resolving to private, loopback, link-local or reserved addresses are never requested
+    REDIRECT_ALLOW_PRIVATE = os.getenv("REDIRECT_ALLOW_PRIVATE", "false").lower() in ("1", "true", "yes")
+    LINK_BULK_MAX = int(os.getenv("LINK_BULK_MAX", "100"))  # URLs per /verify_link/bulk request
+
+    # PIB article titles: fetched concurrently, parsed only up to the first heading, cached for good
+    TITLE_FETCH_WORKERS = int(os.getenv("TITLE_FETCH_WORKERS", "8"))
+    TITLE_MAX_BYTES = int(os.getenv("TITLE_MAX_BYTES", str(256 * 1024)))  # stop reading a page after this
+    TITLE_CACHE_PATH = os.getenv("TITLE_CACHE_PATH", "titles.db")  # "" = in-memory only
+
+    # Recycled-photo detection: perceptual hashes of debunked images (/verify_image)
+    IMAGE_INDEX_PATH = os.getenv("IMAGE_INDEX_PATH", "images.db")
+    IMAGE_MATCH_MAX_DISTANCE = int(os.getenv("IMAGE_MATCH_MAX_DISTANCE", "8"))  # of 64 hash bits
+    IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+    IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(40_000_000)))  # after JPEG draft downscaling
+    IMAGE_SPOOL_MEMORY_BYTES = int(os.getenv("IMAGE_SPOOL_MEMORY_BYTES", str(1024 * 1024)))  # larger uploads go to disk
+    IMAGE_IMPORT_WORKERS = int(os.getenv("IMAGE_IMPORT_WORKERS", str(os.cpu_count() or 2)))  # hashing processes
+    IMAGE_IMPORT_BATCH = int(os.getenv("IMAGE_IMPORT_BATCH", "500"))  # rows per commit/checkpoint
+
+    # Offline re-scoring of claim/link archives (python -m app.services.bulk_verify)
+    BULK_WORKERS = int(os.getenv("BULK_WORKERS", "2"))  # processes; each loads the model unless INFERENCE_SOCKET
+    BULK_BATCH = int(os.getenv("BULK_BATCH", "64"))  # input lines per task and per checkpoint
+    BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "16"))  # evidence/link checks in flight per process
+    BULK_MODEL_BATCH = int(os.getenv("BULK_MODEL_BATCH", "16"))  # claims per forward pass
+
+    # Background jobs (POST /jobs): persistent SQLite queue, JOB_WORKERS concurrent jobs per process
+    JOBS_PATH = os.getenv("JOBS_PATH", "jobs.db")  # "" = in-memory, single process
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))  # beyond this, POST /jobs answers 503
+    JOB_BUDGET_MS = int(os.getenv("JOB_BUDGET_MS", "60000"))  # latency budget of each verification in a job
+    JOB_TIMEOUT_S = float(os.getenv("JOB_TIMEOUT_S", "300"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # runs of a job interrupted by a crash
+    JOB_BATCH_MAX = int(os.getenv("JOB_BATCH_MAX", "100"))  # items per batch job
+    JOB_BATCH_CONCURRENCY = int(os.getenv("JOB_BATCH_CONCURRENCY", "8"))  # items of a batch job in flight
+    JOB_MAX_WAIT_S = float(os.getenv("JOB_MAX_WAIT_S", "30"))  # longest GET /jobs/{id}?wait=
+    JOB_POLL_MS = int(os.getenv("JOB_POLL_MS", "500"))  # how soon other processes' jobs are noticed
+    JOB_RETENTION_S = float(os.getenv("JOB_RETENTION_S", str(24 * 3600)))
+
+    # Inference server: when INFERENCE_SOCKET is set, HTTP workers send model calls
+    # to `python -m app.services.inference` instead of loading weights themselves
+    INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET", "")
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+    INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0"))  # torch threads per worker (0 = torch default)
+    INFERENCE_TIMEOUT_S = float(os.getenv("INFERENCE_TIMEOUT_S", "30"))
+    INFERENCE_CONN_TIMEOUT_S = float(os.getenv("INFERENCE_CONN_TIMEOUT_S", "10"))  # server side: silent clients dropped
+
+    # Opt-in request profiling (middleware is not installed unless enabled)
+    PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "false").lower() in ("1", "true", "yes")
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # fraction of requests
+    PROFILE_SLOW_MS = int(os.getenv("PROFILE_SLOW_MS", "0"))  # keep profiles of requests slower than this
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))  # recent profiles listed on /profiles
+
+settings = Settings()
@@ -0,0 +1,126 @@
+# app/utils/deadline.py
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, List, Optional
+
+from fastapi import Header, Query
+
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Calls without their own timeout (WHOIS, DNS) run here so the caller can stop waiting.
+_blocking_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="deadline")
+
+
+def _new_blocking_pool() -> None:
+    # a forked child inherits the pool but not its threads; submitted calls would never run
+    global _blocking_pool
+    _blocking_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="deadline")
+
+
+os.register_at_fork(after_in_child=_new_blocking_pool)
+
+
+class Deadline:
+    """
+    Request-level latency budget shared by every stage of a verification.
+    Each stage asks for timeout(<its usual cap>) and gets at most what is left;
+    stages that cannot run in time are recorded via skip()/truncate().
+    """
+
+    def __init__(self, budget_s: float):
+        self.budget_s = budget_s
+        self.expires_at = time.monotonic() + budget_s
+        self.skipped: List[str] = []
+        self.truncated: List[str] = []
+        self._lock = threading.Lock()  # stages may report from worker threads
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self, cap: float) -> float:
+        """Per-call timeout: the stage's usual cap, bounded by the remaining budget."""
+        # requests rejects a zero timeout; a spent budget still fails fast
+        return max(0.001, min(cap, self.remaining()))
+
+    def skip(self, check: str) -> None:
+        with self._lock:
+            if check not in self.skipped:
+                self.skipped.append(check)
+        logger.info("Deadline: skipped %s", check)
+
+    def truncate(self, check: str) -> None:
+        with self._lock:
+            if check not in self.truncated:
+                self.truncated.append(check)
+        logger.info("Deadline: truncated %s", check)
+
+    def report(self) -> dict:
+        return {"skipped_checks": list(self.skipped), "truncated_checks": list(self.truncated)}
+
+
+def timeout_for(deadline: Optional[Deadline], cap: float) -> float:
+    """Timeout for a call with a hard-coded cap, with or without a deadline."""
+    return deadline.timeout(cap) if deadline else cap
+
+
+def run_with_timeout(check: str, fn: Callable[..., Any], *args, deadline: Optional[Deadline] = None,
+                     cap: Optional[float] = None, default: Any = None) -> Any:
+    """
+    Run a blocking call that has no timeout of its own, waiting at most
+    min(cap, remaining budget). Returns `default` and records the check as
+    skipped if the budget is spent or the call does not finish in time.
+    """
+    if deadline is None and cap is None:
+        return fn(*args)
+    if deadline is not None and deadline.expired():
+        deadline.skip(check)
+        return default
+    wait = deadline.timeout(cap if cap is not None else deadline.remaining()) if deadline else cap
+    future = _blocking_pool.submit(fn, *args)
+    try:
+        return future.result(timeout=wait)
+    except FutureTimeout:
+        logger.warning("%s did not finish within %.1fs", check, wait)
+        if deadline is not None:
+            deadline.skip(check)
+        return default
+
+
+async def arun_with_timeout(check: str, fn: Callable[..., Any], *args, deadline: Optional[Deadline] = None,
+                            cap: Optional[float] = None, default: Any = None) -> Any:
+    """Awaitable run_with_timeout(): the blocking call runs on the same pool, off the event loop."""
+    if deadline is not None and deadline.expired():
+        deadline.skip(check)
+        return default
+    future = asyncio.get_running_loop().run_in_executor(_blocking_pool, functools.partial(fn, *args))
+    if deadline is None and cap is None:
+        return await future
+    wait = deadline.timeout(cap if cap is not None else deadline.remaining()) if deadline else cap
+    try:
+        return await asyncio.wait_for(future, wait)
+    except asyncio.TimeoutError:
+        logger.warning("%s did not finish within %.1fs", check, wait)
+        if deadline is not None:
+            deadline.skip(check)
+        return default
+
+
+def request_deadline(
+    budget_ms: Optional[int] = Query(None, ge=0, description="Latency budget for this request (ms)"),
+    x_request_budget_ms: Optional[int] = Header(None, ge=0),
+) -> Deadline:
+    """FastAPI dependency: budget from ?budget_ms= or X-Request-Budget-Ms, else the server default."""
+    requested = budget_ms if budget_ms is not None else x_request_budget_ms
+    if requested is None:
+        requested = settings.REQUEST_BUDGET_MS
+    return Deadline(min(requested, settings.REQUEST_BUDGET_MAX_MS) / 1000.0)
@@ -115,6 +115,7 @@ import requests
 import whois  # pip install python-whois
 
 from app.utils.config import settings
+from app.utils.domains import host_from_url, registered_domain
 
 logger = logging.getLogger(__name__)
 
@@ -211,18 +212,13 @@ def resolve_dns(domain: str) -> List[str]:
 
 def extract_domain_from_url(url: str) -> Optional[str]:
     """
-    Normalize and extract domain from URL string.
-    Returns lower-cased domain (no port).
+    Normalize and extract the host from a URL string.
+    Returns lower-cased host (no port); see app.utils.domains.
     """
-    try:
-        from urllib.parse import urlparse
-        p = urlparse(url if url.startswith(("http://", "https://")) else "http://" + url)
-        host = p.hostname
-        if host:
-            return host.lower()
-    except Exception as e:
-        logger.warning(f"extract_domain error for {url}: {e}")
-    return None
+    host = host_from_url(url)
+    if host is None:
+        logger.warning(f"extract_domain error for {url}")
+    return host
 
 
 # -------------------------------
@@ -231,9 +227,10 @@ def extract_domain_from_url(url: str) -> Optional[str]:
 
 def is_trusted(domain: str) -> bool:
     """
-    Check if domain ends with one of the trusted domains.
+    Check if the host's registered domain is a trusted one (so "www.who.int"
+    is trusted, "fake-who.int" is not).
     """
-    return any(domain.endswith(td) for td in TRUSTED_DOMAINS)
+    return registered_domain(domain) in TRUSTED_DOMAINS
 
 
 # -------------------------------
@@ -285,16 +282,19 @@ def verify_domain(url: str) -> Dict[str, Any]:
     - DNS resolution
     - urlscan.io integration (optional)
     """
-    domain = extract_domain_from_url(url)
-    if not domain:
+    host = extract_domain_from_url(url)
+    if not host:
         return {"url": url, "status": "Invalid URL"}
+    # same registered-domain definition as link_verifier; whois only knows registered domains
+    domain = registered_domain(host)
 
     age_days = domain_age_days(domain)
-    ips = resolve_dns(domain)
-    trusted = is_trusted(domain)
+    ips = resolve_dns(host)
+    trusted = is_trusted(host)
 
     result = {
         "url": url,
+        "host": host,
         "domain": domain,
         "status": "Trusted" if trusted else "Unverified",
         "trusted": trusted,
@@ -0,0 +1,155 @@
+# app/utils/domains.py
+"""
+Host and registered-domain extraction, shared by link_verifier and
+domain_tools so they agree on what "the domain" of a URL is.
+
+Public suffixes come from a bundled snapshot of the Public Suffix List
+(app/data/public_suffix_list.dat). It is compiled into suffix sets at import,
+in about 8 ms and with no network access. tldextract, which this replaces,
+fetched the list on first use. Splits are LRU-cached per host, since bulk
+checks see the same hosts again and again.
+
+Refresh the snapshot (the only step that goes online):
+
+    python -m app.utils.domains --update
+"""
+import argparse
+import ipaddress
+import os
+import sys
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from app.utils.config import settings
+from app.utils.metrics import register_lru_cache
+
+PSL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "public_suffix_list.dat")
+PSL_URL = "https://publicsuffix.org/list/public_suffix_list.dat"
+
+
+class PublicSuffixList:
+    """
+    PSL rules as three sets: plain suffixes, wildcard parents ("*.ck" -> "ck")
+    and exceptions ("!www.ck" -> "www.ck"). Only the ICANN section is used
+    unless include_private, matching tldextract's default.
+    """
+
+    def __init__(self, lines: Iterable[str], include_private: bool = False):
+        rules, wildcards, exceptions = set(), set(), set()
+        for line in lines:
+            if "===END ICANN DOMAINS===" in line and not include_private:
+                break
+            rule = line.strip().split(" ", 1)[0]
+            if not rule or rule.startswith("//"):
+                continue
+            if rule.startswith("!"):
+                exceptions.add(rule[1:])
+            elif rule.startswith("*."):
+                wildcards.add(rule[2:])
+            else:
+                rules.add(rule)
+        self.rules, self.wildcards, self.exceptions = frozenset(rules), frozenset(wildcards), frozenset(exceptions)
+
+    @classmethod
+    def from_file(cls, path: str = PSL_PATH, include_private: bool = False) -> "PublicSuffixList":
+        with open(path, encoding="utf-8") as f:
+            return cls(f, include_private)
+
+    def suffix_labels(self, labels: list) -> int:
+        """How many trailing labels form the public suffix (longest matching rule; 0 if none)."""
+        for i in range(len(labels)):
+            candidate = ".".join(labels[i:])
+            if candidate in self.exceptions:
+                return len(labels) - i - 1
+            if candidate in self.rules or ".".join(labels[i + 1:]) in self.wildcards:
+                return len(labels) - i
+        return 0
+
+
+PSL = PublicSuffixList.from_file(include_private=settings.PSL_INCLUDE_PRIVATE)
+
+
+class DomainParts(NamedTuple):
+    subdomain: str
+    domain: str
+    suffix: str
+
+    @property
+    def registered_domain(self) -> str:
+        """domain + suffix ("bbc.co.uk"); just the domain if there is no known suffix."""
+        return ".".join(part for part in (self.domain, self.suffix) if part)
+
+
+def host_from_url(url: str) -> Optional[str]:
+    """Lower-cased host of a URL (scheme optional), without port, userinfo or trailing dot."""
+    try:
+        host = urlsplit(url if "://" in url else "http://" + url).hostname
+    except ValueError:
+        return None
+    host = (host or "").rstrip(".")
+    return host or None
+
+
+def _unicode_label(label: str) -> str:
+    # the list holds IDN suffixes in Unicode; hosts usually arrive as punycode
+    if label.startswith("xn--"):
+        try:
+            return label.encode("ascii").decode("idna")
+        except UnicodeError:
+            return label
+    return label
+
+
+@lru_cache(maxsize=settings.DOMAIN_CACHE_SIZE)
+def split_host(host: str) -> DomainParts:
+    host = host.lower().rstrip(".")
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return DomainParts("", host, "")
+    except ValueError:
+        pass
+    labels = host.split(".")
+    n = PSL.suffix_labels([_unicode_label(label) for label in labels])
+    if n >= len(labels):  # the host is itself a public suffix
+        return DomainParts("", "", host)
+    cut = len(labels) - n
+    return DomainParts(".".join(labels[:cut - 1]), labels[cut - 1], ".".join(labels[cut:]))
+
+
+register_lru_cache("domain_split", split_host)
+
+
+def extract(url: str) -> DomainParts:
+    host = host_from_url(url)
+    return split_host(host) if host else DomainParts("", "", "")
+
+
+def registered_domain(url: str) -> str:
+    """Registered domain of a URL or bare host: "https://news.bbc.co.uk/x" -> "bbc.co.uk"."""
+    return extract(url).registered_domain
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Registered-domain extraction with the bundled suffix list")
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("--update", action="store_true", help=f"download {PSL_URL} over the bundled snapshot")
+    args = parser.parse_args(argv)
+    if args.update:
+        import requests
+
+        resp = requests.get(PSL_URL, timeout=30)
+        resp.raise_for_status()
+        PublicSuffixList(resp.text.splitlines())  # refuse to install a list that does not parse
+        tmp = PSL_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(resp.text)
+        os.replace(tmp, PSL_PATH)
+        print(f"updated {PSL_PATH} ({len(resp.text)} bytes)")
+    for url in args.urls:
+        print(url, tuple(extract(url)), registered_domain(url))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
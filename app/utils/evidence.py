@@ -1,28 +1,434 @@
-import logging
-from typing import Dict, List
-from app.utils.scraper import check_fact_sites
-from app.utils.news_api import search_news
-from app.utils.google_factcheck import search_factchecks
-
-logger = logging.getLogger(__name__)
-
-def gather_evidence(query: str) -> Dict[str, List[dict]]:
-    """
-    Gather evidence from multiple sources:
-    - PIB/AltNews scraper
-    - NewsAPI / GNews
-    - Google Fact Check (multi-publisher + fallback)
-    """
-    logger.info(f"Gathering evidence for: {query}")
-    return {
-        "fact_checks": check_fact_sites(query),        # PIB + AltNews scraper
-        "news": search_news(query),                    # NewsAPI / GNews
-        "google_factcheck": search_factchecks(query),  # Google Fact Check (multi-pub + fallback)
-    }
-
-if __name__ == "__main__":
-    from app.utils.logging_config import setup_logging
-    setup_logging()
-    result = gather_evidence("old image shared as recent")
-    print(result)
-
+# app/utils/evidence.py
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from difflib import SequenceMatcher
+
+# local imports (these should exist in your repo)
+from app.utils.config import settings
+from app.utils.deadline import Deadline
+from app.utils.metrics import Counter
+from app.utils.scraper import fetch_factchecks, fetch_factchecks_async
+from app.utils.news_api import search_news, search_news_async
+from app.utils.google_factcheck import search_factchecks, search_factchecks_async
+from app.utils.verdict_store import get_store
+
+logger = logging.getLogger(__name__)
+
+CASCADE_DECISIONS = Counter(
+    "crisisclarity_evidence_cascade_total",
+    "Evidence cascades by the stage that produced a decisive match ('none' = every stage ran).",
+    ("stage",),
+)
+
+
+# ---------------- helpers ----------------
+def _similarity(a: str, b: str) -> float:
+    """Fuzzy similarity between two strings (0..1)."""
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+
+def _normalize_fact_entry(entry: dict, default_source: Optional[str] = None) -> dict:
+    """
+    Ensure each evidence item has consistent keys:
+      source, url, title, snippet, verdict
+    Accepts entries from fetch_factchecks (PIB/AltNews), which may have
+    different keys.
+    """
+    e = {
+        "source": entry.get("source") or default_source or entry.get("publisher") or entry.get("site"),
+        "url": entry.get("url") or entry.get("link") or "",
+        "title": entry.get("title") or entry.get("headline") or "",
+        "snippet": entry.get("excerpt") or entry.get("text") or entry.get("description") or "",
+        "verdict": entry.get("verdict") or entry.get("rating") or entry.get("result") or None,
+    }
+    # normalize verdict strings (if present)
+    if e["verdict"]:
+        v = (e["verdict"] or "").strip()
+        vlow = v.lower()
+        if "false" in vlow or "fake" in vlow or "debunk" in vlow or "not true" in vlow:
+            e["verdict"] = "Fake"
+        elif "true" in vlow or "genuine" in vlow or "confirmed" in vlow:
+            e["verdict"] = "True"
+        elif "misleading" in vlow:
+            e["verdict"] = "Misleading"
+        else:
+            # Keep text if unknown, but mark as Unverified to make code consistent
+            e["verdict"] = v if v else None
+    return e
+
+
+# ---------------- evidence sources ----------------
+def _normalize_fact_checks(raw_fc: List[dict]) -> List[dict]:
+    """Fact-check scrapers (PIB/AltNews/BOOM/Factly), normalized."""
+    fact_checks = []
+    for r in raw_fc:
+        try:
+            normalized = _normalize_fact_entry(r)
+            # if there's no verdict in scraper result, set Unverified for clarity
+            if not normalized.get("verdict"):
+                normalized["verdict"] = "Unverified"
+            fact_checks.append(normalized)
+        except Exception:
+            logger.exception("Failed to normalize factcheck entry: %s", r)
+    return fact_checks
+
+
+def _normalize_news(raw_news: List[dict]) -> List[dict]:
+    """News articles (search_news) - keep snippet/title so we can match."""
+    news = []
+    for r in raw_news:
+        try:
+            n = {
+                "source": (isinstance(r.get("source"), dict) and r.get("source").get("name")) or r.get("source") or r.get("publisher") or "news",
+                "url": r.get("url") or r.get("link") or "",
+                "title": r.get("title") or r.get("headline") or "",
+                "snippet": r.get("description") or r.get("content") or "",
+                "verdict": None,
+            }
+            news.append(n)
+        except Exception:
+            logger.exception("Failed to normalize news entry: %s", r)
+    return news
+
+
+def _normalize_google_factchecks(raw_gfc: List[dict]) -> List[dict]:
+    """Google Fact Check (structured), normalized."""
+    google_fc = []
+    for r in raw_gfc:
+        try:
+            g = {
+                "source": (r.get("publisher") or r.get("site") or "GoogleFactCheck"),
+                "url": r.get("url") or "",
+                "title": r.get("title") or "",
+                "snippet": r.get("text") or r.get("claimant") or "",
+                "verdict": None,
+            }
+            # rating field might be 'rating' or 'claimReview' etc.
+            rating = (r.get("rating") or r.get("claimReview") or "")
+            if rating:
+                # rating could be "False" or "True" etc. normalize
+                rlow = str(rating).lower()
+                if "false" in rlow:
+                    g["verdict"] = "Fake"
+                elif "true" in rlow or "correct" in rlow:
+                    g["verdict"] = "True"
+                else:
+                    g["verdict"] = r.get("rating")
+            else:
+                # some providers put 'reviewRating' or other fields
+                g["verdict"] = r.get("rating") or r.get("reviewRating") or None
+            if not g["verdict"]:
+                g["verdict"] = "Unverified"
+            google_fc.append(g)
+        except Exception:
+            logger.exception("Failed to normalize google factcheck entry: %s", r)
+    return google_fc
+
+
+def _collect_fact_checks(query: str, deadline: Optional[Deadline] = None) -> List[dict]:
+    try:
+        return _normalize_fact_checks(fetch_factchecks(query, deadline=deadline) or [])
+    except Exception as e:
+        logger.exception("fetch_factchecks failed: %s", e)
+        return []
+
+
+def _collect_news(query: str, deadline: Optional[Deadline] = None) -> List[dict]:
+    try:
+        return _normalize_news(search_news(query, deadline=deadline) or [])
+    except Exception as e:
+        logger.exception("search_news failed: %s", e)
+        return []
+
+
+def _collect_google_factchecks(query: str, deadline: Optional[Deadline] = None) -> List[dict]:
+    try:
+        return _normalize_google_factchecks(search_factchecks(query, deadline=deadline) or [])
+    except Exception as e:
+        logger.exception("search_factchecks failed: %s", e)
+        return []
+
+
+async def _acollect_fact_checks(query: str, deadline: Optional[Deadline] = None) -> List[dict]:
+    try:
+        return _normalize_fact_checks(await fetch_factchecks_async(query, deadline=deadline) or [])
+    except Exception as e:
+        logger.exception("fetch_factchecks_async failed: %s", e)
+        return []
+
+
+async def _acollect_news(query: str, deadline: Optional[Deadline] = None) -> List[dict]:
+    try:
+        return _normalize_news(await search_news_async(query, deadline=deadline) or [])
+    except Exception as e:
+        logger.exception("search_news_async failed: %s", e)
+        return []
+
+
+async def _acollect_google_factchecks(query: str, deadline: Optional[Deadline] = None) -> List[dict]:
+    try:
+        return _normalize_google_factchecks(await search_factchecks_async(query, deadline=deadline) or [])
+    except Exception as e:
+        logger.exception("search_factchecks_async failed: %s", e)
+        return []
+
+
+def _collect_local(query: str, deadline: Optional[Deadline] = None) -> List[dict]:
+    """
+    Decisive evidence from an earlier complete verification of the same
+    (normalized) claim in the verdict store. Titled with the stored claim so
+    match_claim_against_evidence() scores it like any fact-check.
+    """
+    store = get_store()
+    if store is None:
+        return []
+    try:
+        row = store.latest_claim(query, complete_only=True)
+    except Exception as e:
+        logger.exception("verdict store lookup failed: %s", e)
+        return []
+    if row is None:
+        return []
+    return [
+        {"source": e.get("source"), "url": e.get("url") or "", "title": row["claim"], "snippet": "", "verdict": e.get("verdict")}
+        for e in row["evidence_links"]
+        if e.get("verdict") in ("Fake", "True")
+    ]
+
+
+async def _acollect_local(query: str, deadline: Optional[Deadline] = None) -> List[dict]:
+    return await asyncio.to_thread(_collect_local, query, deadline)  # one indexed SQLite read, off the loop
+
+
+# key in the gather_evidence() result -> collector
+EVIDENCE_SOURCES: Dict[str, Callable[..., List[dict]]] = {
+    "fact_checks": _collect_fact_checks,
+    "news": _collect_news,
+    "google_factcheck": _collect_google_factchecks,
+}
+
+# same keys, awaitable collectors on the shared async client
+ASYNC_EVIDENCE_SOURCES: Dict[str, Callable[..., Awaitable[List[dict]]]] = {
+    "fact_checks": _acollect_fact_checks,
+    "news": _acollect_news,
+    "google_factcheck": _acollect_google_factchecks,
+}
+
+
+# ---------------- gather evidence ----------------
+def gather_evidence(query: str, deadline: Optional[Deadline] = None) -> Dict[str, List[dict]]:
+    """
+    Gather evidence from:
+      - fetch_factchecks (PIB, AltNews, BOOM, Factly)
+      - search_news (NewsAPI/GNews)
+      - search_factchecks (Google Fact Check)
+    Returns normalized lists under keys:
+      - fact_checks: list of {source, url, title, snippet, verdict}
+      - news: list of {source, url, title, snippet, verdict=None}
+      - google_factcheck: list of {source, url, title, snippet, verdict}
+    Each source only gets what is left of `deadline`, if one is given.
+    """
+    logger.info("Gathering evidence for: %s", query)
+    return {key: collect(query, deadline=deadline) for key, collect in EVIDENCE_SOURCES.items()}
+
+
+def iter_evidence(query: str, deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, List[dict]]]:
+    """
+    Same sources as gather_evidence(), queried concurrently.
+    Yields (source_key, items) as each source completes, fastest first,
+    so callers can forward partial evidence without waiting for the slowest upstream.
+    """
+    logger.info("Streaming evidence for: %s", query)
+    with ThreadPoolExecutor(max_workers=len(EVIDENCE_SOURCES)) as pool:
+        futures = {pool.submit(collect, query, deadline=deadline): key for key, collect in EVIDENCE_SOURCES.items()}
+        for fut in as_completed(futures):
+            # collectors swallow their own errors and return []
+            yield futures[fut], fut.result()
+
+
+async def gather_evidence_async(query: str, deadline: Optional[Deadline] = None) -> Dict[str, List[dict]]:
+    """gather_evidence() with every source awaited concurrently on the event loop."""
+    logger.info("Gathering evidence for: %s", query)
+    keys = list(ASYNC_EVIDENCE_SOURCES)
+    results = await asyncio.gather(*(ASYNC_EVIDENCE_SOURCES[key](query, deadline=deadline) for key in keys))
+    return dict(zip(keys, results))
+
+
+async def iter_evidence_async(query: str, deadline: Optional[Deadline] = None) -> AsyncIterator[Tuple[str, List[dict]]]:
+    """iter_evidence() for async callers: (source_key, items) in completion order."""
+    logger.info("Streaming evidence for: %s", query)
+
+    async def keyed(key, collect):
+        return key, await collect(query, deadline=deadline)
+
+    tasks = [asyncio.create_task(keyed(key, collect)) for key, collect in ASYNC_EVIDENCE_SOURCES.items()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:  # client went away mid-stream
+            task.cancel()
+
+
+# ---------------- matching ----------------
+def match_claim_against_evidence(claim: str, evidence: dict) -> dict:
+    """
+    Tries to match the claim against collected evidence.
+    Priority:
+      1) Google Fact Check (explicit ratings)
+      2) Fact-check scrapers (PIB/AltNews/BOOM/Factly)
+      3) News (lower weight)
+    Returns:
+       {
+         "verdict": "verified_fake" | "verified_true" | "unverified" | "unknown",
+         "verified_by": <publisher/source> or None,
+         "url": <evidence URL> or None,
+         "evidence_score": 0.0..1.0,
+         "matched_evidence": [ ... evidence items that influenced decision ... ]
+       }
+    """
+    claim_text = (claim or "").strip()
+    claim_lower = claim_text.lower()
+
+    # helper to produce result
+    def _result(verdict: str, source: Optional[str], url: Optional[str], score: float, matched: List[dict]):
+        return {
+            "verdict": verdict,
+            "verified_by": source,
+            "url": url,
+            "evidence_score": float(score),
+            "matched_evidence": matched,
+        }
+
+    matched_items: List[dict] = []
+
+    # 1) Google Fact Check (highest cred)
+    for g in evidence.get("google_factcheck", []):
+        text = (" ".join([g.get("title", ""), g.get("snippet", "")]) or "").lower()
+        sim = max(_similarity(claim_lower, g.get("title", "")), _similarity(claim_lower, g.get("snippet", "")))
+
+        # match by substring or reasonably high similarity
+        if claim_lower in text or sim > 0.5:
+            matched_items.append({**g, "similarity": sim, "source_weight": 1.0})
+            v = (g.get("verdict") or "").lower()
+            if "fake" in v or "false" in v or "debunk" in v:
+                return _result("verified_fake", g.get("source"), g.get("url"), 0.95 + 0.04 * sim, matched_items)
+            if "true" in v or "correct" in v or "confirmed" in v:
+                return _result("verified_true", g.get("source"), g.get("url"), 0.95 + 0.04 * sim, matched_items)
+            # if google says 'Unverified' include it but continue to next sources
+
+    # 2) fact-check scrapers
+    for fc in evidence.get("fact_checks", []):
+        combined = (" ".join([fc.get("title", ""), fc.get("snippet", ""), fc.get("url", "")]) or "").lower()
+        sim = max(_similarity(claim_lower, fc.get("title", "")), _similarity(claim_lower, fc.get("snippet", "")))
+        # String-level match (loose) OR fuzzy similarity
+        if (claim_lower in combined) or sim > 0.45:
+            matched_items.append({**fc, "similarity": sim, "source_weight": 0.9})
+            v = (fc.get("verdict") or "").lower()
+            if "fake" in v or "false" in v or "debunk" in v:
+                score = 0.85 + 0.1 * sim
+                return _result("verified_fake", fc.get("source"), fc.get("url"), min(0.99, score), matched_items)
+            if "true" in v or "confirmed" in v or "genuine" in v:
+                score = 0.85 + 0.1 * sim
+                return _result("verified_true", fc.get("source"), fc.get("url"), min(0.99, score), matched_items)
+
+    # 3) news (lower trust; we only mark if multiple corroborating news items or very high similarity)
+    news_matches = []
+    for n in evidence.get("news", []):
+        sim = max(_similarity(claim_lower, n.get("title", "")), _similarity(claim_lower, n.get("snippet", "")))
+        if sim > 0.6 or claim_lower in (n.get("title", "") + " " + n.get("snippet", "")).lower():
+            news_matches.append({**n, "similarity": sim, "source_weight": 0.5})
+
+    if news_matches:
+        # if multiple independent news sources match, we can mark likely true, but keep evidence_score modest
+        unique_sources = {m["source"].lower() for m in news_matches if m.get("source")}
+        avg_sim = sum(m["similarity"] for m in news_matches) / max(1, len(news_matches))
+        matched_items.extend(news_matches)
+        if len(unique_sources) >= 2 and avg_sim > 0.6:
+            score = 0.6 + 0.2 * avg_sim
+            return _result("verified_true", ", ".join(unique_sources), news_matches[0].get("url"), min(0.95, score), matched_items)
+        # otherwise mark unverified but provide evidence
+        return _result("unverified", None, news_matches[0].get("url"), 0.4 + 0.3 * avg_sim, matched_items)
+
+    # nothing matched: return unknown
+    return _result("unknown", None, None, 0.0, matched_items)
+
+
+# ---------------- cascade ----------------
+# (stage, key in the gather_evidence() result, collector): cheapest and most trusted first
+CASCADE_STAGES: List[Tuple[str, str, Callable[..., List[dict]]]] = [
+    ("local", "fact_checks", _collect_local),
+    ("google_factcheck", "google_factcheck", _collect_google_factchecks),
+    ("fact_checks", "fact_checks", _collect_fact_checks),
+    ("news", "news", _collect_news),
+]
+
+ASYNC_CASCADE_STAGES: List[Tuple[str, str, Callable[..., Awaitable[List[dict]]]]] = [
+    ("local", "fact_checks", _acollect_local),
+    ("google_factcheck", "google_factcheck", _acollect_google_factchecks),
+    ("fact_checks", "fact_checks", _acollect_fact_checks),
+    ("news", "news", _acollect_news),
+]
+
+
+def _decisive(match: dict, min_score: float) -> bool:
+    return match["verdict"] in ("verified_fake", "verified_true") and match["evidence_score"] >= min_score
+
+
+def cascade_evidence(query: str, deadline: Optional[Deadline] = None,
+                     min_score: float = settings.EVIDENCE_CASCADE_MIN_SCORE) -> Tuple[Dict[str, List[dict]], dict]:
+    """
+    Query CASCADE_STAGES one at a time, re-matching after each, and stop at the
+    first decisive match (verified_fake / verified_true) scoring at least
+    min_score. Claims that repeat a known debunk never reach the slower
+    scrapers and news APIs.
+    Returns (evidence in the gather_evidence() shape, match).
+    """
+    logger.info("Cascading evidence for: %s", query)
+    evidence: Dict[str, List[dict]] = {key: [] for key in EVIDENCE_SOURCES}
+    match = match_claim_against_evidence(query, evidence)
+    for stage, key, collect in CASCADE_STAGES:
+        evidence[key].extend(collect(query, deadline=deadline))
+        match = match_claim_against_evidence(query, evidence)
+        if _decisive(match, min_score):
+            CASCADE_DECISIONS.inc(stage)
+            return evidence, match
+    CASCADE_DECISIONS.inc("none")
+    return evidence, match
+
+
+async def cascade_evidence_async(query: str, deadline: Optional[Deadline] = None,
+                                 min_score: float = settings.EVIDENCE_CASCADE_MIN_SCORE) -> Tuple[Dict[str, List[dict]], dict]:
+    """cascade_evidence() on the shared async client."""
+    logger.info("Cascading evidence for: %s", query)
+    evidence: Dict[str, List[dict]] = {key: [] for key in ASYNC_EVIDENCE_SOURCES}
+    match = match_claim_against_evidence(query, evidence)
+    for stage, key, collect in ASYNC_CASCADE_STAGES:
+        evidence[key].extend(await collect(query, deadline=deadline))
+        match = match_claim_against_evidence(query, evidence)
+        if _decisive(match, min_score):
+            CASCADE_DECISIONS.inc(stage)
+            return evidence, match
+    CASCADE_DECISIONS.inc("none")
+    return evidence, match
+
+
+# ---------------- quick CLI test ----------------
+if __name__ == "__main__":
+    from app.utils.logging_config import setup_logging
+    import sys
+    setup_logging()
+    q = "old image shared as recent"
+    if len(sys.argv) > 1:
+        q = " ".join(sys.argv[1:])
+    ev = gather_evidence(q)
+    print("EVIDENCE:", {k: len(v) for k, v in ev.items()})
+    m = match_claim_against_evidence(q, ev)
+    print("MATCH:", m)
+
+
+
@@ -0,0 +1,253 @@
+# app/utils/factcard_renderer.py
+"""
+Shareable PNG/WebP fact cards, rendered server-side with Pillow.
+
+A card is fully determined by (claim, verdict, confidence, sources, template),
+so its hash is both the cache key and the HTTP ETag. Rendered images are kept
+in a bytes-bounded in-memory LRU in front of a content-addressed directory
+shared by every worker. Identical cards are rendered once per host, not once
+per request. The directory is kept under FACTCARD_CACHE_DIR_MAX_BYTES by
+deleting the oldest files every PRUNE_EVERY writes (an evicted card is simply
+rendered again). Bulk renders run on a process pool (Pillow drawing holds the GIL).
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.utils.config import settings
+from app.utils.metrics import CACHE_REQUESTS, STAGE_SECONDS
+
+# bump when the layout changes, so cached cards (and client ETags) are invalidated
+TEMPLATE_VERSION = 1
+WIDTH, HEIGHT = 1200, 630  # Open Graph / Twitter large-card size
+MARGIN = 60
+
+FORMATS = {"png": ("PNG", "image/png"), "webp": ("WEBP", "image/webp")}
+
+TEMPLATES: Dict[str, Dict[str, str]] = {
+    "default": {"background": "#ffffff", "text": "#111827", "muted": "#6b7280", "header": "#1f2937"},
+    "dark": {"background": "#111827", "text": "#f9fafb", "muted": "#9ca3af", "header": "#030712"},
+}
+
+VERDICT_COLORS = {"fake": "#dc2626", "true": "#16a34a", "misleading": "#d97706"}
+UNKNOWN_VERDICT_COLOR = "#6b7280"
+
+PRUNE_EVERY = 100  # cache writes between scans of the card directory
+
+
+def card_key(card: dict, fmt: str = "png", template: str = "default") -> str:
+    """Content hash of a create_factcard() dict as rendered with this template and format."""
+    content = [card.get("claim"), card.get("verdict"), card.get("confidence"), card.get("sources"),
+               template, TEMPLATE_VERSION, fmt]
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode()).hexdigest()[:32]
+
+
+# ---------------- drawing ----------------
+def _font(size: int) -> ImageFont.ImageFont:
+    if settings.FACTCARD_FONT:
+        return ImageFont.truetype(settings.FACTCARD_FONT, size)
+    return ImageFont.load_default(size=size)
+
+
+def _ellipsize(text: str, font: ImageFont.ImageFont, width: int) -> str:
+    if font.getlength(text) <= width:
+        return text
+    while text and font.getlength(text + "…") > width:
+        text = text[:-1]
+    return text.rstrip() + "…"
+
+
+def _wrap(text: str, font: ImageFont.ImageFont, width: int, max_lines: int) -> List[str]:
+    """Greedy word wrap to a pixel width; overlong words and the last line are ellipsized."""
+    lines: List[str] = []
+    line = ""
+    for word in (text or "").split():
+        candidate = f"{line} {word}".strip()
+        if font.getlength(candidate) <= width or not line:
+            line = candidate
+        else:
+            lines.append(line)
+            line = word
+    if line:
+        lines.append(line)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] += "…"
+    return [_ellipsize(line, font, width) for line in lines]
+
+
+def render_card(card: dict, fmt: str = "png", template: str = "default") -> bytes:
+    """Draw a create_factcard() dict as an image; no caching."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unsupported format: {fmt}")
+    if template not in TEMPLATES:
+        raise ValueError(f"unknown template: {template}")
+    colors = TEMPLATES[template]
+    verdict = str(card.get("verdict") or "Unverified")
+    accent = VERDICT_COLORS.get(verdict.lower(), UNKNOWN_VERDICT_COLOR)
+
+    image = Image.new("RGB", (WIDTH, HEIGHT), colors["background"])
+    draw = ImageDraw.Draw(image)
+    inner = WIDTH - 2 * MARGIN
+
+    # header bar + verdict badge
+    draw.rectangle((0, 0, WIDTH, 90), fill=colors["header"])
+    draw.text((MARGIN, 45), card.get("title") or "FACT CHECK SUMMARY", font=_font(30), fill="#ffffff", anchor="lm")
+    badge_font = _font(34)
+    badge_width = badge_font.getlength(verdict.upper()) + 48
+    draw.rounded_rectangle((WIDTH - MARGIN - badge_width, 18, WIDTH - MARGIN, 72), radius=12, fill=accent)
+    draw.text((WIDTH - MARGIN - badge_width / 2, 45), verdict.upper(), font=badge_font, fill="#ffffff", anchor="mm")
+    draw.rectangle((0, 90, 12, HEIGHT), fill=accent)
+
+    # claim
+    claim_font = _font(40)
+    y = 130
+    for line in _wrap(card.get("claim") or "", claim_font, inner, max_lines=5):
+        draw.text((MARGIN, y), line, font=claim_font, fill=colors["text"])
+        y += 52
+
+    # confidence + sources
+    small = _font(24)
+    y = max(y + 20, 420)
+    draw.text((MARGIN, y), f"Confidence: {card.get('confidence') or 'N/A'}", font=small, fill=colors["muted"])
+    y += 40
+    for source in [s for s in card.get("sources") or [] if s][:3]:
+        draw.text((MARGIN, y), _wrap(str(source), small, inner, max_lines=1)[0], font=small, fill=colors["muted"])
+        y += 34
+
+    out = io.BytesIO()
+    image.save(out, format=FORMATS[fmt][0], optimize=fmt == "png")
+    return out.getvalue()
+
+
+# ---------------- cache ----------------
+class CardCache:
+    """
+    Rendered cards by (key, format): bytes-bounded LRU in memory, plus an
+    optional on-disk directory bounded by max_disk_bytes (0 = unbounded). The
+    format is part of the lookup, so /factcards/<png key>.webp is a miss rather
+    than PNG bytes served as WebP.
+    """
+
+    def __init__(self, directory: str = "", max_memory_bytes: int = 64 * 1024 * 1024, max_disk_bytes: int = 0):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._size = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.directory, f"{key}.{fmt}")
+
+    def _remember(self, key: str, fmt: str, data: bytes) -> None:
+        with self._lock:
+            if (key, fmt) in self._memory:
+                self._memory.move_to_end((key, fmt))
+                return
+            self._memory[key, fmt] = data
+            self._size += len(data)
+            while self._size > self.max_memory_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get(self, key: str, fmt: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get((key, fmt))
+            if data is not None:
+                self._memory.move_to_end((key, fmt))
+        if data is None and self.directory:
+            try:
+                with open(self._path(key, fmt), "rb") as f:
+                    data = f.read()
+                self._remember(key, fmt, data)
+            except FileNotFoundError:
+                pass
+        CACHE_REQUESTS.inc("factcard", "hit" if data is not None else "miss")
+        return data
+
+    def put(self, key: str, fmt: str, data: bytes) -> None:
+        self._remember(key, fmt, data)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            # write-then-rename, so a concurrent reader in another worker never sees half a file
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key, fmt))
+            with self._lock:
+                self._writes += 1
+                due = self._writes % PRUNE_EVERY == 1
+            if self.max_disk_bytes and due:
+                self.prune()
+
+    def prune(self) -> int:
+        """Delete the oldest cards until the directory fits max_disk_bytes; the number deleted."""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.rpartition(".")[2] in FORMATS and entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        total, removed = sum(size for _, size, _ in files), 0
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:  # pruned by another worker meanwhile
+                pass
+            total -= size
+        return removed
+
+
+CARD_CACHE = CardCache(settings.FACTCARD_CACHE_DIR, settings.FACTCARD_CACHE_MAX_BYTES,
+                       settings.FACTCARD_CACHE_DIR_MAX_BYTES)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _render_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.FACTCARD_RENDER_WORKERS)
+        return _pool
+
+
+def render_cached(card: dict, fmt: str = "png", template: str = "default") -> Tuple[str, bytes]:
+    """(key, image) for one card, rendered in this thread on a cache miss."""
+    key = card_key(card, fmt, template)
+    data = CARD_CACHE.get(key, fmt)
+    if data is None:
+        with STAGE_SECONDS.time("factcard_render"):
+            data = render_card(card, fmt, template)
+        CARD_CACHE.put(key, fmt, data)
+    return key, data
+
+
+def render_many(cards: List[dict], fmt: str = "png", template: str = "default") -> List[Tuple[str, bytes]]:
+    """(key, image) per card, in order; cache misses are rendered in parallel on the process pool."""
+    keys = [card_key(card, fmt, template) for card in cards]
+    images = [CARD_CACHE.get(key, fmt) for key in keys]
+    # identical cards in one batch are rendered once
+    missing = {key: card for key, card, data in zip(keys, cards, images) if data is None}
+    if missing:
+        with STAGE_SECONDS.time("factcard_render_bulk"):
+            rendered = _render_pool().map(render_card, missing.values(), [fmt] * len(missing),
+                                          [template] * len(missing))
+            for key, data in zip(missing, rendered):
+                CARD_CACHE.put(key, fmt, data)
+                missing[key] = data
+    return [(key, data if data is not None else missing[key]) for key, data in zip(keys, images)]
@@ -1,86 +1,167 @@
-import logging
-import requests
-from typing import List, Dict, Iterable
-from app.utils.config import settings
-
-logger = logging.getLogger(__name__)
-BASE = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
-
-DEFAULT_PUBLISHERS = (
-    "altnews.in",
-    "boomlive.in",
-    "factly.in",
-    "indiatoday.in",           
-    "aajtak.in",               
-    "afp.com",                 
-)
-
-def _normalize(data: dict) -> List[Dict]:
-    out = []
-    for c in data.get("claims", []):
-        rv = (c.get("claimReview") or [{}])[0]
-        out.append({
-            "text": c.get("text"),
-            "claimant": c.get("claimant"),
-            "publisher": rv.get("publisher", {}).get("name"),
-            "site": rv.get("publisher", {}).get("site"),
-            "title": rv.get("title"),
-            "url": rv.get("url"),
-            "rating": rv.get("textualRating"),
-            "reviewDate": rv.get("reviewDate"),
-            "provider": "GoogleFactCheck",
-        })
-    return out
-
-def _fetch(query: str, publisher: str | None, page_size: int = 10) -> List[Dict]:
-    params = {
-        "query": query,
-        "pageSize": page_size,
-        "key": settings.GOOGLE_FACTCHECK_API_KEY,
-    }
-    if publisher:
-        params["reviewPublisherSiteFilter"] = publisher
-    r = requests.get(BASE, params=params, timeout=10)
-    r.raise_for_status()
-    return _normalize(r.json())
-
-def search_factchecks(
-    query: str,
-    publishers: Iterable[str] = DEFAULT_PUBLISHERS,
-    include_fallback: bool = True
-) -> List[Dict]:
-    """
-    Try several Indian fact-check publishers. If nothing found, optionally try no filter.
-    """
-    if not settings.GOOGLE_FACTCHECK_API_KEY:
-        logger.info("Google Fact Check key missing; skipping.")
-        return []
-
-    results: List[Dict] = []
-    tried_any = False
-
-    # Try each publisher
-    for pub in publishers:
-        try:
-            tried_any = True
-            items = _fetch(query, pub)
-            if items:
-                logger.info(f"Google Fact Check: {len(items)} items from {pub} for '{query}'")
-                results.extend(items)
-        except requests.RequestException as e:
-            logger.warning(f"Publisher '{pub}' fetch failed: {e}")
-
-    # Fallback: no publisher filter
-    if include_fallback and not results:
-        try:
-            items = _fetch(query, publisher=None)
-            if items:
-                logger.info(f"Google Fact Check (no filter): {len(items)} items for '{query}'")
-                results.extend(items)
-        except requests.RequestException as e:
-            logger.error(f"Google Fact Check fallback failed: {e}")
-
-    if tried_any and not results:
-        logger.info(f"No fact-checks found for '{query}' with given publishers.")
-    return results[:10]  # cap results
-
+import asyncio
+import logging
+import httpx
+import requests
+from typing import List, Dict, Iterable, Optional
+from app.utils.aio import http_client
+from app.utils.config import settings
+from app.utils.deadline import Deadline, timeout_for
+from app.utils.metrics import STAGE_SECONDS, UPSTREAM_ERRORS
+
+logger = logging.getLogger(__name__)
+BASE = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
+FETCH_TIMEOUT = 10
+
+DEFAULT_PUBLISHERS = (
+    "altnews.in",
+    "boomlive.in",
+    "factly.in",
+    "indiatoday.in",           
+    "aajtak.in",               
+    "afp.com",                 
+)
+
+def _normalize(data: dict) -> List[Dict]:
+    out = []
+    for c in data.get("claims", []):
+        rv = (c.get("claimReview") or [{}])[0]
+        out.append({
+            "text": c.get("text"),
+            "claimant": c.get("claimant"),
+            "publisher": rv.get("publisher", {}).get("name"),
+            "site": rv.get("publisher", {}).get("site"),
+            "title": rv.get("title"),
+            "url": rv.get("url"),
+            "rating": rv.get("textualRating"),
+            "reviewDate": rv.get("reviewDate"),
+            "provider": "GoogleFactCheck",
+        })
+    return out
+
+def _params(query: str, publisher: str | None, page_size: int) -> dict:
+    params = {
+        "query": query,
+        "pageSize": page_size,
+        "key": settings.GOOGLE_FACTCHECK_API_KEY,
+    }
+    if publisher:
+        params["reviewPublisherSiteFilter"] = publisher
+    return params
+
+def _fetch(query: str, publisher: str | None, page_size: int = 10, timeout: float = FETCH_TIMEOUT) -> List[Dict]:
+    with STAGE_SECONDS.time(f"evidence.google.{publisher or 'all'}"):
+        r = requests.get(BASE, params=_params(query, publisher, page_size), timeout=timeout)
+        r.raise_for_status()
+        data = r.json()
+    return _normalize(data)
+
+async def _fetch_async(query: str, publisher: str | None, page_size: int = 10, timeout: float = FETCH_TIMEOUT) -> List[Dict]:
+    with STAGE_SECONDS.time(f"evidence.google.{publisher or 'all'}"):
+        r = await http_client().get(BASE, params=_params(query, publisher, page_size), timeout=timeout)
+        r.raise_for_status()
+        data = r.json()
+    return _normalize(data)
+
+def search_factchecks(
+    query: str,
+    publishers: Iterable[str] = DEFAULT_PUBLISHERS,
+    include_fallback: bool = True,
+    deadline: Optional[Deadline] = None,
+) -> List[Dict]:
+    """
+    Try several Indian fact-check publishers. If nothing found, optionally try no filter.
+    Publishers left untried when `deadline` expires are reported as truncated.
+    """
+    if not settings.GOOGLE_FACTCHECK_API_KEY:
+        logger.info("Google Fact Check key missing; skipping.")
+        return []
+
+    results: List[Dict] = []
+    tried_any = False
+
+    # Try each publisher
+    for pub in publishers:
+        if deadline and deadline.expired():
+            deadline.truncate("google_factcheck")
+            break
+        try:
+            tried_any = True
+            items = _fetch(query, pub, timeout=timeout_for(deadline, FETCH_TIMEOUT))
+            if items:
+                logger.info(f"Google Fact Check: {len(items)} items from {pub} for '{query}'")
+                results.extend(items)
+        except requests.RequestException as e:
+            UPSTREAM_ERRORS.inc(f"google.{pub}")
+            logger.warning(f"Publisher '{pub}' fetch failed: {e}")
+
+    # Fallback: no publisher filter
+    if include_fallback and not results and deadline and deadline.expired():
+        deadline.skip("google_factcheck_fallback")
+    elif include_fallback and not results:
+        try:
+            items = _fetch(query, publisher=None, timeout=timeout_for(deadline, FETCH_TIMEOUT))
+            if items:
+                logger.info(f"Google Fact Check (no filter): {len(items)} items for '{query}'")
+                results.extend(items)
+        except requests.RequestException as e:
+            UPSTREAM_ERRORS.inc("google.all")
+            logger.error(f"Google Fact Check fallback failed: {e}")
+
+    if tried_any and not results:
+        logger.info(f"No fact-checks found for '{query}' with given publishers.")
+    return results[:10]  # cap results
+
+
+async def search_factchecks_async(
+    query: str,
+    publishers: Iterable[str] = DEFAULT_PUBLISHERS,
+    include_fallback: bool = True,
+    deadline: Optional[Deadline] = None,
+) -> List[Dict]:
+    """
+    search_factchecks() on the shared async client, querying all publishers
+    concurrently. Publishers that time out against `deadline` are reported as truncated.
+    """
+    if not settings.GOOGLE_FACTCHECK_API_KEY:
+        logger.info("Google Fact Check key missing; skipping.")
+        return []
+    if deadline and deadline.expired():
+        deadline.truncate("google_factcheck")
+        if include_fallback:
+            deadline.skip("google_factcheck_fallback")
+        return []
+
+    publishers = list(publishers)
+    outcomes = await asyncio.gather(
+        *(_fetch_async(query, pub, timeout=timeout_for(deadline, FETCH_TIMEOUT)) for pub in publishers),
+        return_exceptions=True,
+    )
+    results: List[Dict] = []
+    for pub, items in zip(publishers, outcomes):
+        if isinstance(items, httpx.HTTPError):
+            UPSTREAM_ERRORS.inc(f"google.{pub}")
+            logger.warning(f"Publisher '{pub}' fetch failed: {items}")
+            if deadline and isinstance(items, httpx.TimeoutException):
+                deadline.truncate("google_factcheck")
+        elif isinstance(items, BaseException):
+            raise items
+        elif items:
+            logger.info(f"Google Fact Check: {len(items)} items from {pub} for '{query}'")
+            results.extend(items)
+
+    # Fallback: no publisher filter
+    if include_fallback and not results and deadline and deadline.expired():
+        deadline.skip("google_factcheck_fallback")
+    elif include_fallback and not results:
+        try:
+            items = await _fetch_async(query, publisher=None, timeout=timeout_for(deadline, FETCH_TIMEOUT))
+            if items:
+                logger.info(f"Google Fact Check (no filter): {len(items)} items for '{query}'")
+                results.extend(items)
+        except httpx.HTTPError as e:
+            UPSTREAM_ERRORS.inc("google.all")
+            logger.error(f"Google Fact Check fallback failed: {e}")
+
+    if publishers and not results:
+        logger.info(f"No fact-checks found for '{query}' with given publishers.")
+    return results[:10]  # cap results
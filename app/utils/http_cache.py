@@ -0,0 +1,169 @@
+# app/utils/http_cache.py
+"""
+HTTP-level caching and compression for the verify endpoints.
+
+ETags are derived from the normalized input (claim text / URL), RESULT_VERSION
+and the fields of the result that the verdict store keeps. So a repeat request
+whose answer is already known (near-duplicate index, verdict store) gets a 304
+without running the pipeline, and any worker computes the same tag. They are
+weak (W/) because the body may be sent compressed or not.
+
+Cache-Control follows verdict freshness: verdicts settled by a fact-check (or
+a trusted domain) keep longer than model-only ones. Results cut short by the
+latency budget are never cached.
+"""
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.utils.claim_index import normalize_claim
+from app.utils.config import settings
+
+try:  # optional: gzip is used when brotli is not installed
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# bump when verification logic changes what a given input yields
+RESULT_VERSION = 1
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+# ---------------- ETags ----------------
+def normalize_url(url: str) -> str:
+    """Case-insensitive scheme/host, no fragment."""
+    parts = urlsplit((url or "").strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, ""))
+
+
+def _etag(*parts: Any) -> str:
+    digest = hashlib.sha1(json.dumps([RESULT_VERSION, *parts], sort_keys=True, default=str).encode()).hexdigest()
+    return f'W/"{digest[:24]}"'
+
+
+def text_etag(pipeline: str, claim: str, body: Dict[str, Any]) -> str:
+    evidence = [(e.get("source"), e.get("url"), e.get("verdict")) for e in body.get("evidence_links") or []]
+    return _etag("text", pipeline, normalize_claim(claim), body.get("verdict"), body.get("confidence"), evidence)
+
+
+def link_etag(url: str, body: Dict[str, Any]) -> str:
+    return _etag("link", normalize_url(url), body.get("status"), bool(body.get("trusted")),
+                 body.get("domain_age_days"), body.get("reasons") or [], body.get("final_url"))
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+# ---------------- freshness ----------------
+def _incomplete(body: Dict[str, Any]) -> bool:
+    return bool(body.get("skipped_checks") or body.get("truncated_checks"))
+
+
+def text_max_age(body: Dict[str, Any]) -> Optional[int]:
+    """Seconds a text verdict stays fresh; None = do not cache."""
+    if _incomplete(body):
+        return None
+    # the override sets confidence 1.0 only when a fact-check rated the claim
+    if body.get("verdict") in ("Fake", "True") and body.get("confidence") == 1.0:
+        return settings.CACHE_MAX_AGE_DECIDED_S
+    return settings.CACHE_MAX_AGE_UNDECIDED_S
+
+
+def link_max_age(body: Dict[str, Any]) -> Optional[int]:
+    if _incomplete(body) or body.get("status") in (None, "Unknown"):
+        return None
+    if body.get("trusted"):
+        return settings.CACHE_MAX_AGE_DECIDED_S
+    return settings.CACHE_MAX_AGE_UNDECIDED_S
+
+
+def cache_control(max_age: Optional[int]) -> str:
+    return "no-store" if max_age is None else f"private, max-age={max_age}"
+
+
+# ---------------- compression ----------------
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESS_GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware: brotli (preferred, if installed) or gzip for
+    single-message bodies of compressible types above minimum_size. Streamed
+    bodies (NDJSON verification events) pass through untouched, so each event
+    still reaches the client as soon as it is sent.
+    """
+
+    def __init__(self, app, minimum_size: int = settings.COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message  # held until the first body message shows the size
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            held, start = start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=held)
+            compressible = headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            if (message.get("more_body") or len(body) < self.minimum_size or not compressible
+                    or "content-encoding" in headers):
+                await send(held)
+                await send(message)
+                return
+            compressed = _compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag  # the bytes differ from the identity encoding
+            await send(held)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
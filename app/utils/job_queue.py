@@ -0,0 +1,261 @@
+# app/utils/job_queue.py
+"""
+Persistent queue for verification jobs (embedded SQLite, WAL mode) with a
+bounded pool of asyncio workers per process.
+
+Submitting a job is one INSERT, so the HTTP request is acknowledged at once.
+Each worker claims the oldest queued job with a single UPDATE ... RETURNING.
+That makes the queue safe to share between uvicorn worker processes on one
+host: whichever process is idle runs the next job. A local submit wakes the
+local workers; jobs from other processes are seen within JOB_POLL_MS.
+
+A job runs for at most JOB_TIMEOUT_S. A job left "running" by a crashed
+process is claimed again once its lease (twice the timeout) runs out, up to
+JOB_MAX_ATTEMPTS. On shutdown, jobs still in flight go back to the queue.
+Finished jobs are kept for JOB_RETENTION_S.
+
+JOBS_PATH="" keeps the queue in memory: one process only, lost on restart.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.utils.metrics import Counter, Histogram
+from app.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+JOBS = Counter(
+    "crisisclarity_jobs_total",
+    "Background jobs by kind and outcome (queued/done/failed/rejected).",
+    ("kind", "status"),
+)
+JOB_SECONDS = Histogram(
+    "crisisclarity_job_duration_seconds",
+    "Time background jobs spent waiting in the queue and running.",
+    ("kind", "phase"),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at);
+"""
+FINISHED = ("done", "failed")
+PURGE_INTERVAL_S = 300.0
+
+Runner = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class QueueFull(RuntimeError):
+    """JOB_MAX_QUEUED jobs are already waiting."""
+
+
+class JobQueue:
+    def __init__(self, path: str, runners: Dict[str, Runner], workers: int = 4, max_queued: int = 1000,
+                 timeout_s: float = 300.0, max_attempts: int = 3, poll_s: float = 0.5,
+                 retention_s: float = 86400.0):
+        self.path = path
+        self.runners = runners
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout_s = timeout_s
+        self.max_attempts = max_attempts
+        self.poll_s = poll_s
+        self.retention_s = retention_s
+        # one connection behind the lock; every statement is a single-row (or indexed) write or read
+        self._conn = sqlite3.connect(path or ":memory:", timeout=5.0, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._tasks: List[asyncio.Task] = []
+        self._running: Set[str] = set()
+        self._claiming: Set[asyncio.Future] = set()
+        self._queued: Optional[asyncio.Event] = None    # set by local submits
+        self._finished: Optional[asyncio.Event] = None  # replaced after every local completion
+        self._purged_at = 0.0
+
+    # ---------------- storage (blocking; called off the event loop) ----------------
+    def _execute(self, sql: str, args: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, args).fetchall()
+
+    def submit(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if kind not in self.runners:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        job_id, now = uuid.uuid4().hex, time.time()
+        with self._lock, self._conn:
+            queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                JOBS.inc(kind, "rejected")
+                raise QueueFull(f"{queued} jobs are already queued")
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, dumps(payload).decode(), now),
+            )
+        JOBS.inc(kind, "queued")
+        return {"id": job_id, "kind": kind, "status": "queued", "created_at": now}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._execute(
+            "SELECT id, kind, status, result, error, attempts, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,),
+        )
+        if not rows:
+            return None
+        job = dict(rows[0])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Mark the oldest runnable job running and return it (atomic across processes)."""
+        now = time.time()
+        rows = self._execute(
+            """UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1
+               WHERE id = (SELECT id FROM jobs
+                           WHERE status = 'queued' OR (status = 'running' AND started_at < ?)
+                           ORDER BY created_at LIMIT 1)
+               RETURNING id, kind, payload, attempts, created_at""",
+            (now, now - 2 * self.timeout_s),
+        )
+        return rows[0] if rows else None
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, dumps(result).decode() if result is not None else None, error, time.time(), job_id),
+        )
+
+    def _requeue(self, job_ids: List[str]) -> None:
+        for job_id in job_ids:
+            self._execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, attempts = attempts - 1 "
+                "WHERE id = ? AND status = 'running'",
+                (job_id,),
+            )
+
+    def purge(self) -> int:
+        """Delete jobs finished more than retention_s ago."""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at < ?", (time.time() - self.retention_s,)
+            ).rowcount
+
+    # ---------------- workers (event loop) ----------------
+    async def submit_async(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        job = await asyncio.to_thread(self.submit, kind, payload)
+        if self._queued is not None:
+            self._queued.set()
+        return job
+
+    async def wait(self, job_id: str, timeout_s: float) -> Optional[Dict[str, Any]]:
+        """The job once it has finished, or as it stands after timeout_s (long polling)."""
+        loop = asyncio.get_running_loop()
+        until = loop.time() + timeout_s
+        while True:
+            # taken before the read, so a completion in between still wakes this waiter
+            finished = self._finished or asyncio.Event()
+            job = await asyncio.to_thread(self.get, job_id)
+            remaining = until - loop.time()
+            if job is None or job["status"] in FINISHED or remaining <= 0:
+                return job
+            # woken by a local completion; jobs finished by other processes show up on the next poll
+            try:
+                await asyncio.wait_for(finished.wait(), min(remaining, self.poll_s))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, job: sqlite3.Row) -> None:
+        kind, job_id = job["kind"], job["id"]
+        JOB_SECONDS.observe(max(0.0, time.time() - job["created_at"]), kind, "queued")
+        if job["attempts"] > self.max_attempts:
+            status, result, error = "failed", None, f"Gave up after {self.max_attempts} attempts"
+        else:
+            try:
+                with JOB_SECONDS.time(kind, "run"):
+                    result = await asyncio.wait_for(self.runners[kind](json.loads(job["payload"])), self.timeout_s)
+                status, error = "done", None
+            except asyncio.TimeoutError:
+                status, result, error = "failed", None, f"Timed out after {self.timeout_s:.0f}s"
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", job_id, kind)
+                status, result, error = "failed", None, str(e) or type(e).__name__
+        await asyncio.to_thread(self._finish, job_id, status, result, error)
+        JOBS.inc(kind, status)
+        finished, self._finished = self._finished, asyncio.Event()
+        if finished is not None:
+            finished.set()
+
+    async def _claim_async(self) -> Optional[sqlite3.Row]:
+        job = await asyncio.to_thread(self._claim)
+        if job is not None:
+            self._running.add(job["id"])
+        return job
+
+    async def _work(self) -> None:
+        """One worker turn: claim a job and run it, or wait for one."""
+        if time.monotonic() - self._purged_at > PURGE_INTERVAL_S:
+            self._purged_at = time.monotonic()
+            await asyncio.to_thread(self.purge)
+        # shielded: once claimed, the job is in _running even if the worker is cancelled meanwhile
+        claim = asyncio.ensure_future(self._claim_async())
+        self._claiming.add(claim)
+        claim.add_done_callback(self._claiming.discard)
+        try:
+            job = await asyncio.shield(claim)
+        except sqlite3.OperationalError as e:  # database locked by another process for too long
+            logger.warning("Job queue claim failed: %s", e)
+            job = None
+        if job is None:
+            self._queued.clear()
+            try:
+                await asyncio.wait_for(self._queued.wait(), self.poll_s)
+            except asyncio.TimeoutError:
+                pass
+            return
+        await self._run(job)  # if cancelled, stop() puts the job back
+        self._running.discard(job["id"])
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                await self._work()
+            except Exception:  # a job left in _running is put back by stop(), or re-claimed after its lease
+                logger.exception("Job worker turn failed")
+                await asyncio.sleep(self.poll_s)
+
+    def start(self) -> None:
+        """Start the workers on the running loop."""
+        self._queued, self._finished = asyncio.Event(), asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers and put their unfinished jobs back in the queue."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.gather(*self._claiming, return_exceptions=True)  # claims still in flight
+        if self._running:
+            await asyncio.to_thread(self._requeue, sorted(self._running))
+            self._running.clear()
@@ -1,30 +1,226 @@
-import logging
-import logging.config
-
-LOGGING_CONFIG = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": {
-        "default": {
-            "format": "[%(asctime)s] [%(levelname)s] [%(name)s]: %(message)s"
-        }
-    },
-    "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "formatter": "default",
-        },
-        "file": {
-            "class": "logging.FileHandler",
-            "filename": "app.log",
-            "formatter": "default",
-        },
-    },
-    "root": {
-        "level": "DEBUG",
-        "handlers": ["console", "file"],
-    },
-}
-
-def setup_logging():
-    logging.config.dictConfig(LOGGING_CONFIG)
+import atexit
+import json
+import logging
+import logging.config
+import logging.handlers
+import queue
+import random
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from app.utils.config import settings
+
+# Request threads only enqueue records; one background listener does all file/console I/O.
+LOGGING_CONFIG = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "default": {
+            "format": "[%(asctime)s] [%(levelname)s] [%(name)s]: %(message)s"
+        },
+    },
+    "filters": {
+        "redact": {"()": "app.utils.logging_config.RedactSecretsFilter"},
+        "sample_debug": {"()": "app.utils.logging_config.DebugSamplingFilter"},
+    },
+    "handlers": {
+        "queue": {
+            "class": "logging.handlers.QueueHandler",
+            "queue": "ext://app.utils.logging_config.LOG_QUEUE",
+            "filters": ["sample_debug", "redact"],
+        },
+        "requests_queue": {
+            "()": "app.utils.logging_config.StructuredQueueHandler",
+            "queue": "ext://app.utils.logging_config.REQUEST_LOG_QUEUE",
+        },
+    },
+    "loggers": {
+        # one JSON line per HTTP request, kept out of app.log
+        "app.requests": {
+            "level": "INFO",
+            "handlers": ["requests_queue"],
+            "propagate": False,
+        },
+    },
+    "root": {
+        "level": settings.LOG_LEVEL,
+        "handlers": ["queue"],
+    },
+}
+
+# Noisy third-party loggers; LOG_LEVELS="name=LEVEL,..." overrides or extends these.
+DEFAULT_LOGGER_LEVELS = {
+    "urllib3": "WARNING",
+    "filelock": "WARNING",
+    "huggingface_hub": "WARNING",
+}
+
+LOG_QUEUE: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+REQUEST_LOG_QUEUE: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+
+_listeners = []
+
+_SECRET_PARAMS = re.compile(r"((?:api[_-]?key|apikey|key|token|access_token)=)[^&\s\"']+", re.IGNORECASE)
+
+
+class RedactSecretsFilter(logging.Filter):
+    """Masks API keys in query strings (urllib3 and requests log full URLs)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        redacted = _SECRET_PARAMS.sub(r"\1***", message)
+        if redacted != message:
+            record.msg, record.args = redacted, None
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of DEBUG records; other levels pass. The rate is
+    LOG_DEBUG_SAMPLE_RATE, or that of the closest logger named in
+    LOG_DEBUG_SAMPLE_RATES ("app.utils=0.1" also covers "app.utils.scraper").
+    """
+
+    def __init__(self, rate: Optional[float] = None, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.rate = settings.LOG_DEBUG_SAMPLE_RATE if rate is None else rate
+        self.rates = _parse_rates(settings.LOG_DEBUG_SAMPLE_RATES) if rates is None else dict(rates)
+        self._resolved: Dict[str, float] = {}
+
+    def rate_for(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            logger_name = name
+            while logger_name not in self.rates and "." in logger_name:
+                logger_name = logger_name.rsplit(".", 1)[0]
+            rate = self._resolved[name] = self.rates.get(logger_name, self.rate)
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = self.rate_for(record.name) if self.rates else self.rate
+        return rate >= 1.0 or random.random() < rate
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records untouched so dict messages reach JsonFormatter intact."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; dict messages are merged into the record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        if isinstance(record.msg, dict):
+            entry.update(record.msg)
+        else:
+            entry["message"] = record.getMessage()
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _parse_pairs(spec: str) -> Dict[str, str]:
+    pairs = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            pairs[name.strip()] = value.strip()
+    return pairs
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    return {name: level.upper() for name, level in _parse_pairs(spec).items()}
+
+
+def _parse_rates(spec: str) -> Dict[str, float]:
+    return {name: float(rate) for name, rate in _parse_pairs(spec).items()}
+
+
+def _file_handler(filename: str) -> logging.Handler:
+    """Rotating file handler: by time if LOG_ROTATE_WHEN is set (e.g. "midnight"), else by size."""
+    if settings.LOG_ROTATE_WHEN:
+        return logging.handlers.TimedRotatingFileHandler(
+            filename, when=settings.LOG_ROTATE_WHEN, backupCount=settings.LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    return logging.handlers.RotatingFileHandler(
+        filename, maxBytes=settings.LOG_MAX_BYTES, backupCount=settings.LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+
+
+def setup_logging():
+    if _listeners:  # already configured (reload / repeated calls)
+        return
+    logging.config.dictConfig(LOGGING_CONFIG)
+
+    levels = dict(DEFAULT_LOGGER_LEVELS)
+    levels.update(_parse_levels(settings.LOG_LEVELS))
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(LOGGING_CONFIG["formatters"]["default"]["format"]))
+    app_file = _file_handler(settings.LOG_FILE)
+    app_file.setFormatter(console.formatter)
+    request_file = _file_handler(settings.LOG_REQUESTS_FILE)
+    request_file.setFormatter(JsonFormatter())
+
+    _listeners.extend([
+        logging.handlers.QueueListener(LOG_QUEUE, console, app_file, respect_handler_level=True),
+        logging.handlers.QueueListener(REQUEST_LOG_QUEUE, request_file),
+    ])
+    for listener in _listeners:
+        listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writers."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+request_logger = logging.getLogger("app.requests")
+
+
+class RequestLogMiddleware:
+    """Pure ASGI middleware emitting one structured record per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            client = scope.get("client")
+            request_logger.info({
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status["code"],
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "client": client[0] if client else None,
+            })
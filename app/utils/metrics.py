@@ -0,0 +1,198 @@
+# app/utils/metrics.py
+"""
+Minimal in-process metrics rendered in the Prometheus text exposition format.
+Recording is a bisect + list increment under a per-metric lock, so it is
+cheap enough to wrap every upstream call on the request path.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# seconds; spans tokenization (ms) up to slow upstream fetches (tens of s)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_REGISTRY: List["_Metric"] = []
+_LRU_CACHES: Dict[str, Callable] = {}
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        for values, total in sorted(items):
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_fmt(total)}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("_hist", "_labels", "_start")
+
+    def __init__(self, hist: "Histogram", labelvalues: Tuple[str, ...]):
+        self._hist = hist
+        self._labels = labelvalues
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._hist.observe(time.perf_counter() - self._start, *self._labels)
+        return False
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[idx] += 1
+            series[-1] += value
+
+    def time(self, *labelvalues: str) -> _Timer:
+        """Context manager recording the wall time of its block (also on error)."""
+        return _Timer(self, labelvalues)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for values, series in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="%s"' % _fmt(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_fmt(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+# ---------------- shared metrics ----------------
+STAGE_SECONDS = Histogram(
+    "crisisclarity_stage_duration_seconds",
+    "Time spent in each verification stage (model, evidence sources, link checks).",
+    ("stage",),
+)
+HTTP_SECONDS = Histogram(
+    "crisisclarity_http_request_duration_seconds",
+    "End-to-end HTTP request latency by route.",
+    ("method", "route", "status"),
+)
+UPSTREAM_ERRORS = Counter(
+    "crisisclarity_upstream_errors_total",
+    "Failed calls to external services (timeouts, HTTP errors, parse errors).",
+    ("upstream",),
+)
+LOOP_LAG_SECONDS = Histogram(
+    "crisisclarity_event_loop_lag_seconds",
+    "How late the event loop ran a timer it scheduled (time the loop was blocked).",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+CACHE_REQUESTS = Counter(
+    "crisisclarity_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss).",
+    ("cache", "result"),
+)
+
+
+def register_lru_cache(name: str, fn: Callable) -> None:
+    """Report a functools.lru_cache's hit/miss counts at scrape time (no hot-path cost)."""
+    _LRU_CACHES[name] = fn
+
+
+def _render_lru_caches() -> List[str]:
+    lines = []
+    for name, fn in sorted(_LRU_CACHES.items()):
+        info = fn.cache_info()
+        for result, count in (("hit", info.hits), ("miss", info.misses)):
+            lines.append(f'{CACHE_REQUESTS.name}{{cache="{_escape(name)}",result="{result}"}} {_fmt(count)}')
+    return lines
+
+
+def render_latest() -> str:
+    """All registered metrics in Prometheus text format (version 0.0.4)."""
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+        if metric is CACHE_REQUESTS:
+            lines.extend(_render_lru_caches())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing each HTTP request (including streamed bodies)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # route template (e.g. /verify_text/) rather than the raw path keeps cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_SECONDS.observe(time.perf_counter() - start, scope["method"], route, str(status["code"]))
@@ -1,136 +1,180 @@
-import logging
-import requests
-from typing import List, Dict, Optional, Iterable
-from app.utils.config import settings
-
-logger = logging.getLogger(__name__)
-
-NEWSAPI_URL = "https://newsapi.org/v2/everything"
-GNEWS_URL   = "https://gnews.io/api/v4/search"
-
-# Common Indian outlets to bias relevance (works only for NewsAPI /v2/everything).
-INDIA_DOMAINS_DEFAULT = [
-    "thehindu.com",
-    "indianexpress.com",
-    "timesofindia.indiatimes.com",
-    "ndtv.com",
-    "hindustantimes.com",
-    "theprint.in",
-    "scroll.in",
-    "livemint.com",
-    "aajtak.in",
-    "indiatoday.in",
-    "moneycontrol.com",
-    "business-standard.com",
-]
-
-def _normalize(items: List[dict], provider: str, limit: int = 8) -> List[Dict]:
-    out: List[Dict] = []
-    seen_urls = set()
-    seen_titles = set()
-
-    for a in items:
-        url = a.get("url")
-        title = a.get("title") or ""
-
-        # de-dup by url/title
-        if url and url in seen_urls:
-            continue
-        if title and title in seen_titles:
-            continue
-
-        if provider == "NewsAPI":
-            source_name = (a.get("source", {}) or {}).get("name")
-            published = a.get("publishedAt")
-            desc = a.get("description")
-        else:  # GNews
-            source_name = (a.get("source", {}) or {}).get("name") or a.get("source")
-            published = a.get("publishedAt")
-            desc = a.get("description")
-
-        out.append({
-            "source": source_name,
-            "title": title,
-            "description": desc,
-            "url": url,
-            "publishedAt": published,
-            "provider": provider,
-        })
-        if url: seen_urls.add(url)
-        if title: seen_titles.add(title)
-
-        if len(out) >= limit:
-            break
-
-    return out
-
-def search_news(
-    query: str,
-    lang: str = "en",
-    country: str = "in",  # used by GNews only
-    include_domains: Optional[Iterable[str]] = None,
-    page_size_newsapi: int = 25,
-    gnews_max: int = 15,
-) -> List[Dict]:
-    """
-    Search evidence articles with NewsAPI (preferred) and fall back to GNews.
-    - Biases toward Indian outlets via `include_domains` (NewsAPI only).
-    - Returns a small, normalized list.
-    """
-    # ----- NewsAPI (preferred) -----
-    if settings.NEWS_API_KEY:
-        try:
-            params = {
-                "q": query,
-                "language": lang,
-                "sortBy": "relevancy",         # or 'publishedAt' if you prefer latest
-                "pageSize": page_size_newsapi, # cap server-side a bit
-                "apiKey": settings.NEWS_API_KEY,
-            }
-
-            # Domains filter (India bias)
-            domains = list(include_domains) if include_domains else INDIA_DOMAINS_DEFAULT
-            if domains:
-                params["domains"] = ",".join(domains)
-
-            r = requests.get(NEWSAPI_URL, params=params, timeout=12)
-            r.raise_for_status()
-            data = r.json()
-
-            # NewsAPI wraps results in {"status":"ok","articles":[...]}
-            articles = data.get("articles", []) if data.get("status") == "ok" else []
-            if articles:
-                logger.info(f"NewsAPI: {len(articles)} raw hits for '{query}'")
-                return _normalize(articles, "NewsAPI", limit=8)
-            else:
-                logger.info(f"NewsAPI: 0 hits for '{query}' (domains bias applied)")
-        except Exception as e:
-            logger.warning(f"NewsAPI error → fallback to GNews: {e}")
-
-    # ----- GNews (fallback) -----
-    #if settings.GNEWS_API_KEY:
-     #   try:
-      #      params = {
-       #         "q": query,
-        #        "lang": lang,
-         #       "country": country, # 'in' biases to India
-          #      "token": settings.GNEWS_API_KEY,
-           #     "max": gnews_max,
-                # "in": "title,description,content",  # uncomment to restrict fields GNews searches
-                # "from": "2025-08-01",              # optionally restrict date window
-            #}
-            #r = requests.get(GNEWS_URL, params=params, timeout=12)
-            #r.raise_for_status()
-           # data = r.json()
-            #articles = data.get("articles", [])
-          #  if articles:
-           #     logger.info(f"GNews: {len(articles)} raw hits for '{query}'")
-     #           return _normalize(articles, "GNews", limit=8)
-    #        else:
-   #             logger.info(f"GNews: 0 hits for '{query}'")
-  #      except Exception as e:
- #           logger.error(f"GNews error: {e}")
-#
-   # logger.info("No news/evidence found or no API key set.")
-    #return []
-
+import logging
+import requests
+from typing import List, Dict, Optional, Iterable
+from app.utils.aio import http_client
+from app.utils.config import settings
+from app.utils.deadline import Deadline, timeout_for
+from app.utils.metrics import STAGE_SECONDS, UPSTREAM_ERRORS
+
+logger = logging.getLogger(__name__)
+
+NEWSAPI_URL = "https://newsapi.org/v2/everything"
+GNEWS_URL   = "https://gnews.io/api/v4/search"
+NEWS_TIMEOUT = 12
+
+# Common Indian outlets to bias relevance (works only for NewsAPI /v2/everything).
+INDIA_DOMAINS_DEFAULT = [
+    "thehindu.com",
+    "indianexpress.com",
+    "timesofindia.indiatimes.com",
+    "ndtv.com",
+    "hindustantimes.com",
+    "theprint.in",
+    "scroll.in",
+    "livemint.com",
+    "aajtak.in",
+    "indiatoday.in",
+    "moneycontrol.com",
+    "business-standard.com",
+]
+
+def _normalize(items: List[dict], provider: str, limit: int = 8) -> List[Dict]:
+    out: List[Dict] = []
+    seen_urls = set()
+    seen_titles = set()
+
+    for a in items:
+        url = a.get("url")
+        title = a.get("title") or ""
+
+        # de-dup by url/title
+        if url and url in seen_urls:
+            continue
+        if title and title in seen_titles:
+            continue
+
+        if provider == "NewsAPI":
+            source_name = (a.get("source", {}) or {}).get("name")
+            published = a.get("publishedAt")
+            desc = a.get("description")
+        else:  # GNews
+            source_name = (a.get("source", {}) or {}).get("name") or a.get("source")
+            published = a.get("publishedAt")
+            desc = a.get("description")
+
+        out.append({
+            "source": source_name,
+            "title": title,
+            "description": desc,
+            "url": url,
+            "publishedAt": published,
+            "provider": provider,
+        })
+        if url: seen_urls.add(url)
+        if title: seen_titles.add(title)
+
+        if len(out) >= limit:
+            break
+
+    return out
+
+def _newsapi_params(query: str, lang: str, include_domains: Optional[Iterable[str]], page_size: int) -> dict:
+    params = {
+        "q": query,
+        "language": lang,
+        "sortBy": "relevancy",         # or 'publishedAt' if you prefer latest
+        "pageSize": page_size,         # cap server-side a bit
+        "apiKey": settings.NEWS_API_KEY,
+    }
+
+    # Domains filter (India bias)
+    domains = list(include_domains) if include_domains else INDIA_DOMAINS_DEFAULT
+    if domains:
+        params["domains"] = ",".join(domains)
+    return params
+
+def _newsapi_articles(data: dict, query: str) -> List[Dict]:
+    # NewsAPI wraps results in {"status":"ok","articles":[...]}
+    articles = data.get("articles", []) if data.get("status") == "ok" else []
+    if articles:
+        logger.info(f"NewsAPI: {len(articles)} raw hits for '{query}'")
+        return _normalize(articles, "NewsAPI", limit=8)
+    logger.info(f"NewsAPI: 0 hits for '{query}' (domains bias applied)")
+    return []
+
+def search_news(
+    query: str,
+    lang: str = "en",
+    country: str = "in",  # used by GNews only
+    include_domains: Optional[Iterable[str]] = None,
+    page_size_newsapi: int = 25,
+    gnews_max: int = 15,
+    deadline: Optional[Deadline] = None,
+) -> List[Dict]:
+    """
+    Search evidence articles with NewsAPI (preferred) and fall back to GNews.
+    - Biases toward Indian outlets via `include_domains` (NewsAPI only).
+    - Returns a small, normalized list.
+    - Skipped when `deadline` has already expired.
+    """
+    if deadline and deadline.expired():
+        deadline.skip("news")
+        return []
+
+    # ----- NewsAPI (preferred) -----
+    if settings.NEWS_API_KEY:
+        try:
+            params = _newsapi_params(query, lang, include_domains, page_size_newsapi)
+            with STAGE_SECONDS.time("evidence.newsapi"):
+                r = requests.get(NEWSAPI_URL, params=params, timeout=timeout_for(deadline, NEWS_TIMEOUT))
+                r.raise_for_status()
+                data = r.json()
+            articles = _newsapi_articles(data, query)
+            if articles:
+                return articles
+        except Exception as e:
+            UPSTREAM_ERRORS.inc("newsapi")
+            logger.warning(f"NewsAPI error → fallback to GNews: {e}")
+
+    # ----- GNews (fallback) -----
+    #if settings.GNEWS_API_KEY:
+     #   try:
+      #      params = {
+       #         "q": query,
+        #        "lang": lang,
+         #       "country": country, # 'in' biases to India
+          #      "token": settings.GNEWS_API_KEY,
+           #     "max": gnews_max,
+                # "in": "title,description,content",  # uncomment to restrict fields GNews searches
+                # "from": "2025-08-01",              # optionally restrict date window
+            #}
+            #r = requests.get(GNEWS_URL, params=params, timeout=12)
+            #r.raise_for_status()
+           # data = r.json()
+            #articles = data.get("articles", [])
+          #  if articles:
+           #     logger.info(f"GNews: {len(articles)} raw hits for '{query}'")
+     #           return _normalize(articles, "GNews", limit=8)
+    #        else:
+   #             logger.info(f"GNews: 0 hits for '{query}'")
+  #      except Exception as e:
+ #           logger.error(f"GNews error: {e}")
+#
+   # logger.info("No news/evidence found or no API key set.")
+    #return []
+
+
+async def search_news_async(
+    query: str,
+    lang: str = "en",
+    include_domains: Optional[Iterable[str]] = None,
+    page_size_newsapi: int = 25,
+    deadline: Optional[Deadline] = None,
+) -> List[Dict]:
+    """search_news() (NewsAPI) on the shared async client."""
+    if deadline and deadline.expired():
+        deadline.skip("news")
+        return []
+    if not settings.NEWS_API_KEY:
+        return []
+    try:
+        params = _newsapi_params(query, lang, include_domains, page_size_newsapi)
+        with STAGE_SECONDS.time("evidence.newsapi"):
+            r = await http_client().get(NEWSAPI_URL, params=params, timeout=timeout_for(deadline, NEWS_TIMEOUT))
+            r.raise_for_status()
+            data = r.json()
+        return _newsapi_articles(data, query)
+    except Exception as e:
+        UPSTREAM_ERRORS.inc("newsapi")
+        logger.warning(f"NewsAPI error: {e}")
+        return []
@@ -0,0 +1,193 @@
+# app/utils/profiling.py
+"""
+Opt-in per-request sampling profiler.
+
+A single background thread snapshots every thread's stack (sys._current_frames)
+while at least one profiled request is in flight, and adds the collapsed
+stacks to each active profile. Output is the collapsed-stack format read by
+flamegraph.pl / speedscope / inferno:  "outer;inner;leaf <count>".
+
+Stacks are process-wide (the model and blocking calls run on executor
+threads), so concurrent requests show up in each other's profiles, as with
+py-spy. Threads parked in an idle wait (event loop select, pool workers
+waiting for work, the log listener) are left out, so a profile shows where
+the request was busy rather than the pool's idle threads.
+The middleware is only installed when PROFILE_ENABLED is set.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+_RECENT: Deque[dict] = deque(maxlen=settings.PROFILE_KEEP)
+
+# innermost Python frames (file, function) of a thread blocked waiting for work
+IDLE_FRAMES = frozenset({
+    ("threading.py", "wait"),        # Event/Condition waits: anyio workers, queue listeners
+    ("queue.py", "get"),
+    ("selectors.py", "select"),      # an event loop with nothing ready
+    ("thread.py", "_worker"),        # ThreadPoolExecutor worker on its empty work queue
+    ("socket.py", "accept"),
+})
+
+
+class _StackSampler:
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._active: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._next_id = 0
+
+    def begin(self) -> int:
+        with self._lock:
+            self._next_id += 1
+            self._active[self._next_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+            return self._next_id
+
+    def end(self, token: int) -> Counter:
+        with self._lock:
+            return self._active.pop(token, Counter())
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+            stacks = Counter()
+            for ident, frame in sys._current_frames().items():
+                if ident != me and not _idle(frame):
+                    stacks[_collapse(frame)] += 1
+            with self._lock:
+                for counts in self._active.values():
+                    counts.update(stacks)
+            time.sleep(self.interval_s)
+
+
+def _idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+
+def _collapse(frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+_sampler = _StackSampler(settings.PROFILE_INTERVAL_MS / 1000.0)
+
+
+def claim_hash(body: bytes) -> str:
+    """Short hash of the claim/url in a JSON request body (whole body if not JSON)."""
+    try:
+        payload = json.loads(body or b"{}")
+        key = payload.get("text") or payload.get("claim") or payload.get("url") or ""
+        data = " ".join(str(key).lower().split()).encode() if key else body
+    except (ValueError, AttributeError):
+        data = body
+    return hashlib.sha1(data or b"").hexdigest()[:12]
+
+
+def _save(stacks: Counter, meta: dict) -> Optional[dict]:
+    if not stacks:
+        return None
+    route_slug = re.sub(r"[^A-Za-z0-9]+", "_", meta["route"]).strip("_") or "root"
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    name = f"{stamp}_{route_slug}_{meta['claim_hash']}.collapsed"
+    out_dir = Path(settings.PROFILE_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / name).write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+    entry = {**meta, "name": name, "samples": sum(stacks.values())}
+    _RECENT.appendleft(entry)
+    logger.info("Saved profile %s (%s, %.0f ms)", name, meta["trigger"], meta["duration_ms"])
+    return entry
+
+
+def recent_profiles() -> List[dict]:
+    return list(_RECENT)
+
+
+def profile_path(name: str) -> Optional[Path]:
+    """Path of a saved profile, only for names this process listed (no traversal)."""
+    if any(entry["name"] == name for entry in _RECENT):
+        return Path(settings.PROFILE_DIR) / name
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when:
+      - it carries "X-Profile: 1", or
+      - it is picked by PROFILE_SAMPLE_RATE, or
+      - PROFILE_SLOW_MS > 0: every request is sampled and kept only if it was slow.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE
+        self.slow_s = settings.PROFILE_SLOW_MS / 1000.0
+
+    def _trigger(self, scope) -> Optional[str]:
+        for key, value in scope.get("headers", ()):
+            if key == b"x-profile" and value not in (b"", b"0", b"false"):
+                return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        if self.slow_s:
+            return "slow"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = bytearray()
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                body.extend(message.get("body", b""))
+            return message
+
+        token = _sampler.begin()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send)
+        finally:
+            elapsed = time.perf_counter() - start
+            stacks = _sampler.end(token)
+            if trigger != "slow" or elapsed >= self.slow_s:
+                # file write off the event loop
+                await asyncio.to_thread(_save, stacks, {
+                    "route": getattr(scope.get("route"), "path", scope["path"]),
+                    "method": scope["method"],
+                    "claim_hash": claim_hash(bytes(body)),
+                    "trigger": trigger,
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "created": datetime.now(timezone.utc).isoformat(),
+                })
@@ -1,227 +1,343 @@
 # app/utils/scraper.py
+import asyncio
+import hashlib
+import io
 import logging
 import requests
-from bs4 import BeautifulSoup
 import feedparser
-from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
+from urllib.parse import urljoin, urlparse
 from difflib import SequenceMatcher
+from typing import List, Dict, Optional, Tuple
+
+from app.utils.aio import http_client
+from app.utils.config import settings
+from app.utils.deadline import Deadline, timeout_for
+from app.utils.metrics import CACHE_REQUESTS, STAGE_SECONDS, UPSTREAM_ERRORS
+from app.utils.title_cache import TitleCache
 
 logger = logging.getLogger(__name__)
 
-# ---------------- Sources ----------------
 PIB_URL = "https://pib.gov.in/factcheck.aspx"
 FEEDS = {
     "AltNews": "https://www.altnews.in/feed/",
     "BOOM": "https://www.boomlive.in/rss",
     "Factly": "https://factly.in/feed/",
 }
+HEADERS = {"User-Agent": "crisiclarity-bot/1.0"}
+
+# per-call caps; a request Deadline can only shorten these
+FEED_TIMEOUT = 10
+PIB_TIMEOUT = 10
+TITLE_TIMEOUT = 6
+TITLE_CHUNK_BYTES = 16 * 1024
+
+# fact-check headlines never change: fetched once per url, shared by every request
+TITLE_CACHE = TitleCache(settings.TITLE_CACHE_PATH)
+# (absolute url, anchor text, verdict inferred from the anchor text)
+PibLink = Tuple[str, str, str]
+# (body hash, links) of the last PIB index page parsed
+_pib_index: Tuple[bytes, List[PibLink]] = (b"", [])
+# bounded, so a PIB index with many matching links cannot open unbounded connections
+_title_pool = ThreadPoolExecutor(max_workers=settings.TITLE_FETCH_WORKERS, thread_name_prefix="pib-title")
 
-# ---------------- Helpers ----------------
-def _variants(q: str) -> list[str]:
-    """Generate simple query variants to improve matching."""
+# ---------- helpers ----------
+def _variants(q: str) -> List[str]:
     base = (q or "").strip()
     low = base.lower()
     words = low.split()
-
     variants = {low}
     if len(words) > 2:
-        variants.add(" ".join(words[:2]))   # first two words
-        variants.add(" ".join(words[-2:]))  # last two words
+        variants.add(" ".join(words[:2]))
+        variants.add(" ".join(words[-2:]))
     return list(variants)
 
 def _similarity(a: str, b: str) -> float:
-    """Compute fuzzy similarity between two strings."""
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+    return SequenceMatcher(None, (a or "").lower(), (b or "").lower()).ratio()
 
 def _filter_factcheck_links(href: str) -> bool:
-    """Return True if link looks like a fact-check article or PDF."""
     if not href:
         return False
     href = href.lower()
-    if "factcheck" in href or href.endswith(".pdf") or "fake" in href:
-        return True
-    return False
+    return any(k in href for k in ["factcheck", "fake", "misleading"]) or href.endswith(".pdf") or "fact-check" in href
 
-# ---------------- Main Scraper ----------------
-def fetch_factchecks(query: str) -> list[dict]:
+def _infer_verdict(title: str) -> str:
+    t = (title or "").lower()
+    if not t:
+        return "Unverified"
+    if any(x in t for x in ["fake", "false", "fabricated", "misleading", "not true", "debunk"]):
+        return "Fake"
+    if any(x in t for x in ["true", "genuine", "verified", "confirmed", "authentic"]):
+        return "True"
+    if any(x in t for x in ["misleading", "partly", "partly true", "half true"]):
+        return "Misleading"
+    return "Unverified"
+
+class _TitleReader:
     """
-    Fetch fact-check articles from PIB, AltNews, BOOM, Factly.
-    Returns: list of {url, verdict}
+    Incremental title parse: fed the page in chunks, done at the first <h1>/<h2>
+    so the rest of the page is never downloaded. The heading wins over <title>,
+    which comes earlier (in <head>) and is the fallback.
     """
-    results = []
-    variants = _variants(query)
 
-    # ---- RSS feeds (AltNews / BOOM / Factly) ----
-    for name, feed_url in FEEDS.items():
-        try:
-            d = feedparser.parse(feed_url)
-            for entry in d.entries[:20]:  # look at latest 20 posts
-                title = entry.get("title", "")
-                link = entry.get("link", "")
-                if not link:
-                    continue
-
-                for v in variants:
-                    ratio = _similarity(v, title)
-                    if ratio > 0.3:  # loose threshold
-                        logger.info(f"{name} matched {v} with {title} ({ratio:.2f})")
-                        results.append({"url": link, "verdict": "Fake"})
+    def __init__(self):
+        self._parser = etree.HTMLPullParser(events=("end",), tag=("h1", "h2", "title"))
+        self._title = ""
+        self._heading: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parse one chunk; True once the answer is known."""
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def _drain(self) -> bool:
+        for _, el in self._parser.read_events():
+            if el.tag == "title":
+                self._title = self._title or (el.text or "").strip()
+            elif self._heading is None:
+                self._heading = "".join(s.strip() for s in el.itertext())
+                return True
+        return False
+
+    def title(self) -> str:
+        if self._heading is None:
+            try:
+                self._parser.close()
+                self._drain()
+            except etree.LxmlError:
+                pass
+        return self._heading or self._title
+
+
+def _read_title_from_url(url: str, timeout=TITLE_TIMEOUT) -> str:
+    if url.endswith(".pdf"):
+        return ""
+    try:
+        with STAGE_SECONDS.time("title_fetch"):
+            with requests.get(url, timeout=timeout, headers=HEADERS, stream=True) as r:
+                if r.status_code != 200:
+                    return ""
+                reader, read = _TitleReader(), 0
+                for chunk in r.iter_content(TITLE_CHUNK_BYTES):
+                    read += len(chunk)
+                    if reader.feed(chunk) or read >= settings.TITLE_MAX_BYTES:
                         break
-        except Exception as e:
-            logger.warning(f"Feed {name} failed: {e}")
+                title = reader.title()
+        TITLE_CACHE.put(url, title)
+        return title
+    except Exception as e:
+        UPSTREAM_ERRORS.inc("title_fetch")
+        logger.debug("title fetch failed for %s: %s", url, e)
+    return ""
 
-    # ---- PIB factcheck page ----
+async def _read_title_from_url_async(url: str, timeout=TITLE_TIMEOUT) -> str:
+    if url.endswith(".pdf"):
+        return ""
     try:
-        r = requests.get(PIB_URL, timeout=10)
-        if r.status_code == 200:
-            soup = BeautifulSoup(r.text, "lxml")
-            for a in soup.select("a[href]"):
-                title = a.get_text(strip=True)
-                href = urljoin(PIB_URL, a["href"])
-
-                if not _filter_factcheck_links(href):
-                    continue
-
-                for v in variants:
-                    ratio = _similarity(v, title)
-                    if ratio > 0.3:
-                        logger.info(f"PIB matched {v} with {title} ({ratio:.2f})")
-                        results.append({"url": href, "verdict": "Fake"})
+        with STAGE_SECONDS.time("title_fetch"):
+            async with http_client().stream("GET", url, timeout=timeout, headers=HEADERS) as r:
+                if r.status_code != 200:
+                    return ""
+                reader, read = _TitleReader(), 0
+                # chunks are small and the parse stops at the first heading, so it stays on the loop
+                async for chunk in r.aiter_bytes(TITLE_CHUNK_BYTES):
+                    read += len(chunk)
+                    if reader.feed(chunk) or read >= settings.TITLE_MAX_BYTES:
                         break
+                title = reader.title()
+        await asyncio.to_thread(TITLE_CACHE.put, url, title)  # SQLite write, off the event loop
+        return title
     except Exception as e:
-        logger.warning(f"PIB fetch failed: {e}")
+        UPSTREAM_ERRORS.inc("title_fetch")
+        logger.debug("title fetch failed for %s: %s", url, e)
+    return ""
 
-    # ---- Deduplicate by URL ----
-    seen = set()
-    deduped = []
-    for r in results:
-        if r["url"] not in seen:
-            deduped.append(r)
-            seen.add(r["url"])
+def _cached_titles(candidates: List[PibLink], deadline: Optional[Deadline]) -> Tuple[List[str], List[int]]:
+    """Cached titles ("" where unknown) and the indexes still to fetch (none once the deadline has passed)."""
+    titles, missing = [], []
+    for i, (href, _, _) in enumerate(candidates):
+        cached = None if href.endswith(".pdf") else TITLE_CACHE.get(href)
+        titles.append(cached or "")
+        if cached is None and not href.endswith(".pdf"):
+            missing.append(i)
+    if missing and deadline and deadline.expired():
+        deadline.truncate("pib_titles")
+        missing = []
+    return titles, missing
 
-    return deduped
+def _resolve_titles(candidates: List[PibLink], deadline: Optional[Deadline]) -> List[str]:
+    """Article titles of PIB candidates: cache first, the rest fetched concurrently on the bounded pool."""
+    titles, missing = _cached_titles(candidates, deadline)
+    timeout = timeout_for(deadline, TITLE_TIMEOUT)
+    fetched = _title_pool.map(lambda i: _read_title_from_url(candidates[i][0], timeout=timeout), missing)
+    for i, title in zip(missing, fetched):
+        titles[i] = title
+    return titles
 
-# the code gives null values as verdict and source, can be updated later
-'''
-# app/utils/scraper.py
-import logging
-import requests
-from bs4 import BeautifulSoup
-import feedparser
-from urllib.parse import urljoin
-from difflib import SequenceMatcher
+async def _resolve_titles_async(candidates: List[PibLink], deadline: Optional[Deadline]) -> List[str]:
+    titles, missing = await asyncio.to_thread(_cached_titles, candidates, deadline)  # cache misses read SQLite
+    timeout = timeout_for(deadline, TITLE_TIMEOUT)
+    limit = asyncio.Semaphore(settings.TITLE_FETCH_WORKERS)
 
-logger = logging.getLogger(__name__)
+    async def read(i: int) -> None:
+        async with limit:
+            titles[i] = await _read_title_from_url_async(candidates[i][0], timeout=timeout)
 
-# ---------------- Sources ----------------
-PIB_URL = "https://pib.gov.in/factcheck.aspx"
-FEEDS = {
-    "AltNews": "https://www.altnews.in/feed/",
-    "BOOM": "https://www.boomlive.in/rss",
-    "Factly": "https://factly.in/feed/",
-}
+    await asyncio.gather(*(read(i) for i in missing))
+    return titles
 
-# ---------------- Helpers ----------------
-def _variants(q: str) -> list[str]:
-    """Generate simple query variants to improve matching."""
-    base = (q or "").strip()
-    low = base.lower()
-    words = low.split()
+def _feed_hits(name: str, content: bytes, variants: List[str]) -> List[Dict]:
+    """Parse an RSS/Atom payload and keep entries whose title matches the query."""
+    hits = []
+    d = feedparser.parse(content)
+    for entry in d.entries[:25]:
+        title = entry.get("title", "") or ""
+        link = entry.get("link", "") or ""
+        if not link:
+            continue
+        for v in variants:
+            if _similarity(v, title) > 0.32:
+                verdict = _infer_verdict(title)
+                hits.append({"source": name, "url": link, "verdict": verdict})
+                break
+    return hits
 
-    variants = {low}
-    if len(words) > 2:
-        variants.add(" ".join(words[:2]))   # first two words
-        variants.add(" ".join(words[-2:]))  # last two words
-    return list(variants)
+def _extract_pib_links(body: bytes) -> List[PibLink]:
+    """Fact-check anchors of the PIB index; only <a> elements are visited, each freed once read."""
+    links = []
+    for _, a in etree.iterparse(io.BytesIO(body), events=("end",), tag="a", html=True, recover=True):
+        href = a.get("href")
+        if href:
+            href = urljoin(PIB_URL, href)
+            if _filter_factcheck_links(href):
+                title_text = "".join(s.strip() for s in a.itertext())
+                links.append((href, title_text, _infer_verdict(title_text)))
+        a.clear(keep_tail=True)
+    return links
 
-def _similarity(a: str, b: str) -> float:
-    """Compute fuzzy similarity between two strings."""
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+def _pib_links(body: bytes) -> List[PibLink]:
+    """
+    Extracted links of the PIB index, re-parsed only when the page changes
+    (the body hash is compared first; the index changes a few times a day).
+    """
+    global _pib_index
+    digest = hashlib.sha1(body).digest()
+    cached_digest, links = _pib_index
+    if digest == cached_digest:
+        CACHE_REQUESTS.inc("pib_index", "hit")
+        return links
+    CACHE_REQUESTS.inc("pib_index", "miss")
+    links = _extract_pib_links(body)
+    _pib_index = (digest, links)
+    return links
 
-def _filter_factcheck_links(href: str) -> bool:
-    """Return True if link looks like a fact-check article or PDF."""
-    if not href:
-        return False
-    href = href.lower()
-    return any(keyword in href for keyword in ["factcheck", "fake", "misleading"]) or href.endswith(".pdf")
+def _pib_candidates(body: bytes, variants: List[str]) -> List[PibLink]:
+    """(absolute url, anchor text, anchor verdict) of fact-check links on the PIB index that match the query."""
+    return [
+        link for link in _pib_links(body)
+        if any(_similarity(v, link[1]) > 0.30 for v in variants)
+    ]
 
-def _infer_verdict(title: str) -> str:
-    """Guess verdict based on title text."""
-    t = (title or "").lower()
-    if "fake" in t or "false" in t: 
-        return "Fake"
-    if "true" in t or "genuine" in t: 
-        return "True"
-    if "misleading" in t: 
-        return "Misleading"
-    return "Unverified"
+def _dedup(results: List[Dict]) -> List[Dict]:
+    """Deduplicate by url (keep first)."""
+    seen = set()
+    dedup = []
+    for item in results:
+        u = item.get("url")
+        if not u:
+            continue
+        if u not in seen:
+            dedup.append(item)
+            seen.add(u)
+    return dedup
 
-# ---------------- Main Scraper ----------------
-def fetch_factchecks(query: str) -> list[dict]:
+# ---------- main fetch ----------
+def fetch_factchecks(query: str, deadline: Optional[Deadline] = None) -> List[Dict]:
     """
-    Fetch fact-check articles from PIB, AltNews, BOOM, Factly.
-    Returns: list of {url, source, verdict}
+    Return list of fact-check items:
+    {"source": "PIB"|"AltNews"|..., "url": "...", "verdict": "Fake|True|Misleading|Unverified"}
+    With a deadline, sources that would start after it expires are skipped.
     """
     results = []
     variants = _variants(query)
 
-    # ---- RSS feeds (AltNews / BOOM / Factly) ----
+    # RSS feeds
     for name, feed_url in FEEDS.items():
+        if deadline and deadline.expired():
+            deadline.skip(f"rss:{name}")
+            continue
         try:
-            d = feedparser.parse(feed_url)
-            for entry in d.entries[:20]:  # look at latest 20 posts
-                title = entry.get("title", "")
-                link = entry.get("link", "")
-                if not link:
-                    continue
-
-                for v in variants:
-                    ratio = _similarity(v, title)
-                    if ratio > 0.3:  # loose threshold
-                        verdict = _infer_verdict(title)
-                        logger.info(f"{name} matched {v} with {title} ({ratio:.2f})")
-                        results.append({
-                            "source": name,
-                            "url": link,
-                            "verdict": verdict
-                        })
-                        break
+            # fetch ourselves so the feed download honours a timeout
+            with STAGE_SECONDS.time(f"evidence.rss.{name}"):
+                r = requests.get(feed_url, timeout=timeout_for(deadline, FEED_TIMEOUT), headers=HEADERS)
+                r.raise_for_status()
+                results.extend(_feed_hits(name, r.content, variants))
         except Exception as e:
-            logger.warning(f"Feed {name} failed: {e}")
+            UPSTREAM_ERRORS.inc(f"rss.{name}")
+            logger.warning("Feed %s failed: %s", name, e)
 
-    # ---- PIB factcheck page ----
+    # PIB page (fact checks index)
+    if deadline and deadline.expired():
+        deadline.skip("pib")
+    else:
+        try:
+            with STAGE_SECONDS.time("evidence.pib"):
+                r = requests.get(PIB_URL, timeout=timeout_for(deadline, PIB_TIMEOUT), headers=HEADERS)
+                candidates = _pib_candidates(r.content, variants) if r.status_code == 200 else []
+            # the article title is more telling than the anchor text when the link is an index or redirect
+            titles = _resolve_titles(candidates, deadline)
+            for (href, _, anchor_verdict), title in zip(candidates, titles):
+                results.append({"source": "PIB", "url": href, "verdict": _infer_verdict(title) if title else anchor_verdict})
+        except Exception as e:
+            UPSTREAM_ERRORS.inc("pib")
+            logger.warning("PIB fetch failed: %s", e)
+
+    return _dedup(results)
+
+
+async def _fetch_feed_async(name: str, feed_url: str, variants: List[str], deadline: Optional[Deadline]) -> List[Dict]:
+    if deadline and deadline.expired():
+        deadline.skip(f"rss:{name}")
+        return []
     try:
-        r = requests.get(PIB_URL, timeout=10)
-        if r.status_code == 200:
-            soup = BeautifulSoup(r.text, "lxml")
-            for a in soup.select("a[href]"):
-                title = a.get_text(strip=True)
-                href = urljoin(PIB_URL, a["href"])
-
-                if not _filter_factcheck_links(href):
-                    continue
-
-                for v in variants:
-                    ratio = _similarity(v, title)
-                    if ratio > 0.3:
-                        verdict = _infer_verdict(title)
-                        logger.info(f"PIB matched {v} with {title} ({ratio:.2f})")
-                        results.append({
-                            "source": "PIB",
-                            "url": href,
-                            "verdict": verdict
-                        })
-                        break
+        with STAGE_SECONDS.time(f"evidence.rss.{name}"):
+            r = await http_client().get(feed_url, timeout=timeout_for(deadline, FEED_TIMEOUT), headers=HEADERS)
+            r.raise_for_status()
+            return await asyncio.to_thread(_feed_hits, name, r.content, variants)
     except Exception as e:
-        logger.warning(f"PIB fetch failed: {e}")
+        UPSTREAM_ERRORS.inc(f"rss.{name}")
+        logger.warning("Feed %s failed: %s", name, e)
+        return []
 
-    # ---- Deduplicate by URL ----
-    seen = set()
-    deduped = []
-    for r in results:
-        if r["url"] not in seen:
-            deduped.append(r)
-            seen.add(r["url"])
-
-    return deduped
-'''
\ No newline at end of file
+
+async def _fetch_pib_async(variants: List[str], deadline: Optional[Deadline]) -> List[Dict]:
+    if deadline and deadline.expired():
+        deadline.skip("pib")
+        return []
+    try:
+        with STAGE_SECONDS.time("evidence.pib"):
+            r = await http_client().get(PIB_URL, timeout=timeout_for(deadline, PIB_TIMEOUT), headers=HEADERS)
+            candidates = await asyncio.to_thread(_pib_candidates, r.content, variants) if r.status_code == 200 else []
+        titles = await _resolve_titles_async(candidates, deadline)
+        return [
+            {"source": "PIB", "url": href, "verdict": _infer_verdict(title) if title else anchor_verdict}
+            for (href, _, anchor_verdict), title in zip(candidates, titles)
+        ]
+    except Exception as e:
+        UPSTREAM_ERRORS.inc("pib")
+        logger.warning("PIB fetch failed: %s", e)
+        return []
+
+
+async def fetch_factchecks_async(query: str, deadline: Optional[Deadline] = None) -> List[Dict]:
+    """
+    fetch_factchecks() on the shared async client: feeds, the PIB index and
+    PIB article titles are fetched concurrently; parsing runs off the loop.
+    """
+    variants = _variants(query)
+    per_source = await asyncio.gather(
+        *(_fetch_feed_async(name, feed_url, variants, deadline) for name, feed_url in FEEDS.items()),
+        _fetch_pib_async(variants, deadline),
+    )
+    return _dedup([item for items in per_source for item in items])
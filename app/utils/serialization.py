@@ -0,0 +1,42 @@
+# app/utils/serialization.py
+"""
+Fast JSON encoding for response bodies that are already validated.
+
+Returning FastJSONResponse from a route skips FastAPI's response_model pass
+(re-validation, jsonable_encoder, then json.dumps). The body is encoded in one
+step with orjson, or the stdlib encoder if orjson is not installed. The routes
+keep response_model, so the OpenAPI schema is unchanged.
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:  # optional; several times faster than the stdlib encoder on evidence lists
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if hasattr(obj, "item"):  # numpy scalars from the classifier
+        return obj.item()
+    return str(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def ndjson_line(obj: Any) -> bytes:
+    return dumps(obj) + b"\n"
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
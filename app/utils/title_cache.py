@@ -0,0 +1,22 @@
+# app/utils/title_cache.py
+"""
+Persistent url -> article title cache for PIB fact-check pages.
+
+Published fact-check headlines do not change, so a title is fetched once and
+kept for good (a UrlCache: in-memory LRU in front of SQLite, shared by every
+worker on the host). Only non-empty titles are stored; an empty result may be
+a transient upstream failure.
+"""
+from app.utils.url_cache import UrlCache
+
+
+class TitleCache(UrlCache):
+    """path="" keeps titles in memory only."""
+
+    table = "titles"
+    column = "title"
+    metric = "pib_title"
+
+    def put(self, url: str, title: str) -> None:
+        if title:
+            super().put(url, title)
@@ -0,0 +1,80 @@
+# app/utils/url_cache.py
+"""
+Persistent url -> value cache for lookups whose answer never changes
+(PIB article titles, short-link redirect chains): an in-memory LRU in front
+of a small SQLite table (WAL) that survives restarts and is shared by every
+worker on the host.
+
+Lookups and inserts are single-row statements on one connection behind a
+lock. They still touch the disk on a memory miss, so async callers go
+through asyncio.to_thread.
+"""
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.utils.metrics import CACHE_REQUESTS
+
+
+class UrlCache:
+    """
+    url -> value, in memory (LRU) and in SQLite; path="" keeps values in
+    memory only. Subclasses name the table and value column, the
+    CACHE_REQUESTS label, and how values are stored as text.
+    """
+
+    table = "urls"
+    column = "value"
+    metric = "url"
+
+    def __init__(self, path: str = "", max_memory: int = 4096):
+        self.path = path
+        self.max_memory = max_memory
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def encode(self, value: Any) -> str:
+        return value
+
+    def decode(self, text: str) -> Any:
+        return text
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and self.path:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (url TEXT PRIMARY KEY, {self.column} TEXT NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, url: str, value: Any) -> None:
+        self._memory[url] = value
+        self._memory.move_to_end(url)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def get(self, url: str) -> Optional[Any]:
+        with self._lock:
+            value = self._memory.get(url)
+            if value is not None:
+                self._memory.move_to_end(url)
+            else:
+                db = self._db()
+                row = db.execute(f"SELECT {self.column} FROM {self.table} WHERE url = ?", (url,)).fetchone() if db else None
+                if row is not None:
+                    value = self.decode(row[0])
+                    self._remember(url, value)
+        CACHE_REQUESTS.inc(self.metric, "hit" if value is not None else "miss")
+        return value
+
+    def put(self, url: str, value: Any) -> None:
+        with self._lock:
+            self._remember(url, value)
+            db = self._db()
+            if db is not None:
+                with db:
+                    db.execute(f"INSERT OR REPLACE INTO {self.table} (url, {self.column}) VALUES (?, ?)",
+                               (url, self.encode(value)))
@@ -0,0 +1,339 @@
+# app/utils/url_expander.py
+"""
+Redirect-chain expansion for shortened links (bit.ly, t.co, ...), so a link
+check judges where a link actually leads rather than the shortener's domain.
+
+Each hop is a HEAD request with redirects off, falling back to a GET whose
+body is never read when the server refuses HEAD. Requests go over pooled
+httpx clients, with at most REDIRECT_MAX_HOPS hops and REDIRECT_HOP_TIMEOUT_S per
+hop (bounded by the request Deadline).
+
+Every hop's host is resolved before it is requested, within the hop
+timeout. A hop with a private, loopback, link-local or reserved address is
+never requested, so a submitted link cannot make the service probe the
+internal network. The chain ends there, marked refused, and the link check
+flags that hop. The request then goes to the address that was checked (with
+the original Host header and TLS name), so a second DNS answer cannot
+redirect it. A host that does not resolve in time ends the chain without a
+request. REDIRECT_ALLOW_PRIVATE lifts all this for tests.
+
+A short link never changes target, so a chain that starts at a shortener is
+cached for good. The cache is a UrlCache (in-memory LRU in front of SQLite,
+REDIRECT_CACHE_PATH), shared by every worker on the host. Chains cut short
+by an upstream error, by the deadline or by a refusal are not cached.
+
+REDIRECT_EXPAND: "shorteners" (default) expands only links on SHORTENER_DOMAINS,
+"all" follows any redirect, "off" disables expansion.
+
+    python -m app.utils.url_expander https://bit.ly/3xyz t.co/abc
+"""
+import argparse
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import httpx
+
+from app.utils.aio import http_client
+from app.utils.config import settings
+from app.utils.deadline import Deadline, timeout_for
+from app.utils.domains import registered_domain
+from app.utils.metrics import STAGE_SECONDS, UPSTREAM_ERRORS
+from app.utils.url_cache import UrlCache
+
+logger = logging.getLogger(__name__)
+
+SHORTENER_DOMAINS = frozenset({
+    "bit.ly", "bit.do", "buff.ly", "cutt.ly", "fb.me", "goo.gl", "is.gd", "lnkd.in", "ow.ly", "rb.gy",
+    "rebrand.ly", "s.id", "shorturl.at", "t.co", "t.ly", "tiny.cc", "tinyurl.com", "v.gd", "amzn.to", "youtu.be",
+})
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+# some shorteners answer a bot UA with a plain 301 and a browser UA with an HTML/JS interstitial
+HEADERS = {"User-Agent": "crisiclarity-bot/1.0"}
+
+
+class RedirectChain(NamedTuple):
+    urls: List[str]   # the input URL first, the destination last
+    exhausted: bool   # stopped at the hop cap or on a loop, still redirecting
+    refused: Optional[str] = None  # why the last URL was not requested (internal address)
+
+    @property
+    def final_url(self) -> str:
+        return self.urls[-1]
+
+
+def is_shortener(url: str) -> bool:
+    return registered_domain(url) in SHORTENER_DOMAINS
+
+
+def should_expand(url: str) -> bool:
+    mode = settings.REDIRECT_EXPAND
+    return mode == "all" or (mode == "shorteners" and is_shortener(url))
+
+
+def _absolute(url: str) -> str:
+    return url if "://" in url else "http://" + url
+
+
+def _location(url: str, status: int, headers) -> Optional[str]:
+    location = headers.get("location") if status in REDIRECT_STATUSES else None
+    return urljoin(url, location.strip()) if location else None
+
+
+def _addrinfo_args(url: str):
+    parts = urlsplit(url)
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    return parts.hostname, port or (443 if parts.scheme == "https" else 80)
+
+
+def _vet(host: Optional[str], infos: Sequence[tuple]) -> Tuple[Optional[str], Optional[str]]:
+    """(why a host must not be requested, the checked address to connect to)."""
+    if not host:
+        return "Redirects to a URL without a host", None
+    addresses = [ipaddress.ip_address(info[4][0].split("%", 1)[0]) for info in infos]
+    for address in addresses:
+        if not address.is_global or address.is_multicast:
+            return f"Redirects to a private or reserved address ({address})", None
+    if not addresses:
+        raise socket.gaierror(f"No address for {host}")
+    return None, str(addresses[0])
+
+
+def resolve(url: str, timeout: Optional[float] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (why `url` must not be requested, the address to request it at). OSError
+    when the host does not resolve within `timeout`: the hop is not requested.
+    """
+    if settings.REDIRECT_ALLOW_PRIVATE:
+        return None, None
+    host, port = _addrinfo_args(url)
+    if not host:
+        return _vet(host, [])
+    future = _RESOLVER.submit(socket.getaddrinfo, host, port, type=socket.SOCK_STREAM)
+    try:
+        infos = future.result(timeout)
+    except FutureTimeoutError:
+        raise TimeoutError(f"DNS lookup for {host} timed out") from None
+    except UnicodeError as e:
+        raise socket.gaierror(f"Invalid host name {host!r}") from e
+    return _vet(host, infos)
+
+
+async def resolve_async(url: str, timeout: Optional[float] = None) -> Tuple[Optional[str], Optional[str]]:
+    """resolve() with the lookup on the loop's resolver threads."""
+    if settings.REDIRECT_ALLOW_PRIVATE:
+        return None, None
+    host, port = _addrinfo_args(url)
+    if not host:
+        return _vet(host, [])
+    try:
+        infos = await asyncio.wait_for(
+            asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM), timeout
+        )
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"DNS lookup for {host} timed out") from None
+    except UnicodeError as e:
+        raise socket.gaierror(f"Invalid host name {host!r}") from e
+    return _vet(host, infos)
+
+
+def refusal(url: str) -> Optional[str]:
+    """The reason `url` must not be requested, or None (also when it does not resolve)."""
+    try:
+        return resolve(url, settings.REDIRECT_HOP_TIMEOUT_S)[0]
+    except OSError:
+        return None
+
+
+def _pin(url: str, address: Optional[str]) -> Tuple[str, dict, dict]:
+    """
+    (URL, headers, request extensions) that reach `url` at the checked
+    `address`, so the client does not look the host up again (DNS rebinding).
+    TLS is still verified against the original host name.
+    """
+    if address is None:
+        return url, HEADERS, {}
+    parts = urlsplit(url)
+    _, port = _addrinfo_args(url)
+    netloc = f"[{address}]:{port}" if ":" in address else f"{address}:{port}"
+    headers = {**HEADERS, "Host": parts.netloc.rsplit("@", 1)[-1]}
+    extensions = {"sni_hostname": parts.hostname} if parts.scheme == "https" else {}
+    return urlunsplit((parts.scheme, netloc, parts.path, parts.query, "")), headers, extensions
+
+
+class RedirectCache(UrlCache):
+    """url -> RedirectChain; path="" keeps chains in memory only."""
+
+    table = "redirects"
+    column = "chain"
+    metric = "redirects"
+
+    def encode(self, chain: RedirectChain) -> str:
+        return json.dumps(chain._asdict())
+
+    def decode(self, text: str) -> RedirectChain:
+        return RedirectChain(**json.loads(text))
+
+
+REDIRECT_CACHE = RedirectCache(settings.REDIRECT_CACHE_PATH)
+
+# pooled connections for the sync path (analyze_url, CLIs), and threads that bound its DNS lookups
+_session = httpx.Client()
+_RESOLVER = ThreadPoolExecutor(max_workers=4, thread_name_prefix="resolve")
+
+
+def _new_resolver() -> None:
+    # forked pool workers (bulk_verify) inherit the executor without its threads
+    global _RESOLVER
+    _RESOLVER = ThreadPoolExecutor(max_workers=4, thread_name_prefix="resolve")
+
+
+os.register_at_fork(after_in_child=_new_resolver)
+
+
+def _rebase(url: str, cached: RedirectChain) -> RedirectChain:
+    return RedirectChain([url] + cached.urls[1:], cached.exhausted, cached.refused)
+
+
+def _finish(url: str, urls: List[str], exhausted: bool, interrupted: bool,
+            refused: Optional[str] = None) -> Tuple[RedirectChain, bool]:
+    """The chain for `url`, and whether to cache it under urls[0]."""
+    # a refusal depends on DNS at the time (and REDIRECT_ALLOW_PRIVATE), so it is re-checked next time
+    return RedirectChain([url] + urls[1:], exhausted, refused), not interrupted and not refused
+
+
+def expand_url(url: str, deadline: Optional[Deadline] = None) -> RedirectChain:
+    """Follow `url`'s redirects one hop at a time; a one-element chain if it is not expanded."""
+    if not should_expand(url):
+        return RedirectChain([url], False)
+    start = _absolute(url)
+    cached = REDIRECT_CACHE.get(start) if is_shortener(start) else None
+    if cached is not None:
+        return _rebase(url, cached)
+    chain, cacheable = _follow(url, start, deadline)
+    if cacheable and is_shortener(start):
+        REDIRECT_CACHE.put(start, chain)
+    return chain
+
+
+def _follow(url: str, start: str, deadline: Optional[Deadline]) -> Tuple[RedirectChain, bool]:
+    urls, interrupted = [start], False
+    for _ in range(settings.REDIRECT_MAX_HOPS):
+        if deadline and deadline.expired():
+            deadline.truncate("redirects")
+            interrupted = True
+            break
+        try:
+            refused, address = resolve(urls[-1], timeout_for(deadline, settings.REDIRECT_HOP_TIMEOUT_S))
+        except OSError as e:  # not resolved (in time): never requested, so never resolved again by the client
+            UPSTREAM_ERRORS.inc("redirects")
+            logger.warning("Redirect hop lookup failed for %s: %s", urls[-1], e)
+            interrupted = True
+            break
+        if refused:
+            return _finish(url, urls, False, interrupted, refused)
+        target, headers, extensions = _pin(urls[-1], address)
+        timeout = timeout_for(deadline, settings.REDIRECT_HOP_TIMEOUT_S)
+        try:
+            with STAGE_SECONDS.time("redirect_hop"):
+                resp = _session.head(target, headers=headers, extensions=extensions, follow_redirects=False,
+                                     timeout=timeout)
+                if resp.status_code >= 400:  # HEAD not allowed (405/501) or refused: headers of a GET
+                    with _session.stream("GET", target, headers=headers, extensions=extensions,
+                                         follow_redirects=False, timeout=timeout) as resp:
+                        pass  # status and headers only; the body is never downloaded
+        except httpx.HTTPError as e:
+            UPSTREAM_ERRORS.inc("redirects")
+            logger.warning("Redirect hop failed for %s: %s", urls[-1], e)
+            interrupted = True
+            break
+        target = _location(urls[-1], resp.status_code, resp.headers)
+        if target is None:
+            return _finish(url, urls, False, interrupted)
+        if target in urls:
+            return _finish(url, urls, True, interrupted)
+        urls.append(target)
+    return _finish(url, urls, not interrupted, interrupted)
+
+
+async def expand_url_async(url: str, deadline: Optional[Deadline] = None) -> RedirectChain:
+    """expand_url() on the shared async client, with the cache's SQLite work off the event loop."""
+    if not should_expand(url):
+        return RedirectChain([url], False)
+    start = _absolute(url)
+    cached = await asyncio.to_thread(REDIRECT_CACHE.get, start) if is_shortener(start) else None
+    if cached is not None:
+        return _rebase(url, cached)
+    chain, cacheable = await _follow_async(url, start, deadline)
+    if cacheable and is_shortener(start):
+        await asyncio.to_thread(REDIRECT_CACHE.put, start, chain)
+    return chain
+
+
+async def _follow_async(url: str, start: str, deadline: Optional[Deadline]) -> Tuple[RedirectChain, bool]:
+    client = http_client()
+    urls, interrupted = [start], False
+    for _ in range(settings.REDIRECT_MAX_HOPS):
+        if deadline and deadline.expired():
+            deadline.truncate("redirects")
+            interrupted = True
+            break
+        try:
+            refused, address = await resolve_async(urls[-1], timeout_for(deadline, settings.REDIRECT_HOP_TIMEOUT_S))
+        except OSError as e:
+            UPSTREAM_ERRORS.inc("redirects")
+            logger.warning("Redirect hop lookup failed for %s: %s", urls[-1], e)
+            interrupted = True
+            break
+        if refused:
+            return _finish(url, urls, False, interrupted, refused)
+        target, headers, extensions = _pin(urls[-1], address)
+        timeout = timeout_for(deadline, settings.REDIRECT_HOP_TIMEOUT_S)
+        try:
+            with STAGE_SECONDS.time("redirect_hop"):
+                resp = await client.head(target, headers=headers, extensions=extensions, follow_redirects=False,
+                                         timeout=timeout)
+                if resp.status_code >= 400:
+                    async with client.stream("GET", target, headers=headers, extensions=extensions,
+                                             follow_redirects=False, timeout=timeout) as resp:
+                        pass  # status and headers only; the body is never downloaded
+        except httpx.HTTPError as e:
+            UPSTREAM_ERRORS.inc("redirects")
+            logger.warning("Redirect hop failed for %s: %s", urls[-1], e)
+            interrupted = True
+            break
+        target = _location(urls[-1], resp.status_code, resp.headers)
+        if target is None:
+            return _finish(url, urls, False, interrupted)
+        if target in urls:
+            return _finish(url, urls, True, interrupted)
+        urls.append(target)
+    return _finish(url, urls, not interrupted, interrupted)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Expand shortened links hop by hop")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--all", action="store_true", help="follow redirects of any link, not only shorteners")
+    args = parser.parse_args(argv)
+    if args.all:
+        settings.REDIRECT_EXPAND = "all"
+    for url in args.urls:
+        chain = expand_url(url)
+        note = f"  (not requested: {chain.refused})" if chain.refused else ""
+        print(" -> ".join(chain.urls) + ("  (gave up: hop cap or loop)" if chain.exhausted else note))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+# app/utils/verdict_store.py
+"""
+Persistent history of verified claims and links (embedded SQLite, WAL mode).
+
+Request handlers only enqueue records; one background writer thread commits
+them in batches (one transaction per batch), so the request path never waits
+on disk. Readers use per-thread connections; under WAL they never block on
+the writer, and lookups by claim hash / domain / time are index scans.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.utils.claim_index import normalize_claim
+from app.utils.config import settings
+from app.utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+STORE_RECORDS = Counter(
+    "crisisclarity_store_records_total",
+    "Records handed to the verdict store by table and outcome (written/dropped/failed).",
+    ("table", "result"),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    id INTEGER PRIMARY KEY,
+    claim_hash TEXT NOT NULL,
+    claim TEXT NOT NULL,
+    pipeline TEXT NOT NULL,
+    verdict TEXT,
+    confidence REAL,
+    model_verdict TEXT,
+    model_confidence REAL,
+    skipped_checks TEXT NOT NULL DEFAULT '[]',
+    truncated_checks TEXT NOT NULL DEFAULT '[]',
+    complete INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_claims_hash ON claims (claim_hash, pipeline, created_at);
+CREATE INDEX IF NOT EXISTS idx_claims_created ON claims (created_at);
+
+CREATE TABLE IF NOT EXISTS evidence (
+    claim_id INTEGER NOT NULL REFERENCES claims (id),
+    position INTEGER NOT NULL,
+    source TEXT,
+    url TEXT,
+    verdict TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_evidence_claim ON evidence (claim_id);
+
+CREATE TABLE IF NOT EXISTS links (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    domain TEXT,
+    status TEXT,
+    trusted INTEGER,
+    domain_age_days INTEGER,
+    reasons TEXT NOT NULL DEFAULT '[]',
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_links_domain ON links (domain, created_at);
+CREATE INDEX IF NOT EXISTS idx_links_created ON links (created_at);
+CREATE INDEX IF NOT EXISTS idx_links_url ON links (url, created_at);
+"""
+
+
+def claim_hash(text: str) -> str:
+    """Hash of the normalized claim (case, emoji, punctuation and forward prefixes ignored)."""
+    return hashlib.sha1(normalize_claim(text).encode()).hexdigest()
+
+
+class VerdictStore:
+    def __init__(self, path: str, batch_size: int = 200, flush_interval_s: float = 0.2, max_queue: int = 10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self._queue: "queue.Queue[tuple]" = queue.Queue(max_queue)
+        self._local = threading.local()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; a crash loses at most the last batch
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ---------------- writes (non-blocking) ----------------
+    def _enqueue(self, table: str, record: tuple) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="verdict-store", daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait((table, record))
+        except queue.Full:
+            STORE_RECORDS.inc(table, "dropped")
+
+    def record_claim(self, claim: str, pipeline: str, response: Dict[str, Any],
+                     model: Optional[Dict[str, Any]] = None) -> None:
+        """Queue a verification result (TextResponse-shaped dict) for storage."""
+        skipped = response.get("skipped_checks") or []
+        truncated = response.get("truncated_checks") or []
+        row = (
+            claim_hash(claim), claim, pipeline, response.get("verdict"), response.get("confidence"),
+            (model or {}).get("verdict"), (model or {}).get("confidence"),
+            json.dumps(skipped), json.dumps(truncated), int(not skipped and not truncated), time.time(),
+        )
+        evidence = [(i, e.get("source"), e.get("url"), e.get("verdict"))
+                    for i, e in enumerate(response.get("evidence_links") or [])]
+        self._enqueue("claims", (row, evidence))
+
+    def record_link(self, result: Dict[str, Any]) -> None:
+        row = (
+            result.get("url"), result.get("domain"), result.get("status"), int(bool(result.get("trusted"))),
+            result.get("domain_age_days"), json.dumps(result.get("reasons") or []), time.time(),
+        )
+        self._enqueue("links", row)
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            result = "failed"
+            try:
+                self._write_batch(conn, batch)
+                result = "written"
+            except Exception:  # a bad record must not stop the writer thread
+                logger.exception("Verdict store write of %d records failed", len(batch))
+            finally:
+                # flush() waits on the queue, so every record is accounted for, written or not
+                for table, _ in batch:
+                    STORE_RECORDS.inc(table, result)
+                    self._queue.task_done()
+
+    @staticmethod
+    def _write_batch(conn: sqlite3.Connection, batch: List[tuple]) -> None:
+        with conn:  # one transaction per batch
+            for table, record in batch:
+                if table == "claims":
+                    row, evidence = record
+                    cur = conn.execute(
+                        "INSERT INTO claims (claim_hash, claim, pipeline, verdict, confidence, model_verdict,"
+                        " model_confidence, skipped_checks, truncated_checks, complete, created_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+                    conn.executemany("INSERT INTO evidence (claim_id, position, source, url, verdict)"
+                                     " VALUES (?, ?, ?, ?, ?)", [(cur.lastrowid, *e) for e in evidence])
+                else:
+                    conn.execute("INSERT INTO links (url, domain, status, trusted, domain_age_days, reasons,"
+                                 " created_at) VALUES (?, ?, ?, ?, ?, ?, ?)", record)
+
+    def flush(self) -> None:
+        """Block until every queued record has been committed."""
+        self._queue.join()
+
+    # ---------------- queries ----------------
+    def _claim_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        claim = dict(row)
+        claim["skipped_checks"] = json.loads(claim["skipped_checks"])
+        claim["truncated_checks"] = json.loads(claim["truncated_checks"])
+        claim["complete"] = bool(claim["complete"])
+        claim["evidence_links"] = [dict(e) for e in self._reader().execute(
+            "SELECT source, url, verdict FROM evidence WHERE claim_id = ? ORDER BY position", (row["id"],))]
+        return claim
+
+    def latest_claim(self, text: Optional[str] = None, pipeline: Optional[str] = None, max_age_s: Optional[float] = None,
+                     complete_only: bool = False, digest: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Most recent stored verification of a claim (by text or normalized hash)."""
+        if digest is None and not normalize_claim(text or ""):
+            return None  # emoji- or punctuation-only claims would all share the empty hash
+        sql = "SELECT * FROM claims WHERE claim_hash = ?"
+        args: List[Any] = [digest or claim_hash(text or "")]
+        if pipeline:
+            sql += " AND pipeline = ?"
+            args.append(pipeline)
+        if max_age_s is not None:
+            sql += " AND created_at >= ?"
+            args.append(time.time() - max_age_s)
+        if complete_only:
+            sql += " AND complete = 1"
+        row = self._reader().execute(sql + " ORDER BY created_at DESC LIMIT 1", args).fetchone()
+        return self._claim_dict(row) if row else None
+
+    def recent_claims(self, limit: int = 50, since: Optional[float] = None, pipeline: Optional[str] = None,
+                      complete_only: bool = False) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM claims WHERE created_at >= ?"
+        args: List[Any] = [since or 0.0]
+        if pipeline:
+            sql += " AND pipeline = ?"
+            args.append(pipeline)
+        if complete_only:
+            sql += " AND complete = 1"
+        rows = self._reader().execute(sql + " ORDER BY created_at DESC LIMIT ?", args + [limit]).fetchall()
+        return [self._claim_dict(row) for row in rows]
+
+    def latest_link(self, url: str, max_age_s: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Most recent stored check of exactly this URL."""
+        sql = "SELECT * FROM links WHERE url = ?"
+        args: List[Any] = [url]
+        if max_age_s is not None:
+            sql += " AND created_at >= ?"
+            args.append(time.time() - max_age_s)
+        row = self._reader().execute(sql + " ORDER BY created_at DESC LIMIT 1", args).fetchone()
+        return self._link_dict(row) if row else None
+
+    @staticmethod
+    def _link_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        link = dict(row)
+        link["trusted"] = bool(link["trusted"])
+        link["reasons"] = json.loads(link["reasons"])
+        return link
+
+    def links(self, domain: Optional[str] = None, limit: int = 50, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM links WHERE created_at >= ?"
+        args: List[Any] = [since or 0.0]
+        if domain:
+            sql += " AND domain = ?"
+            args.append(domain)
+        rows = self._reader().execute(sql + " ORDER BY created_at DESC LIMIT ?", args + [limit]).fetchall()
+        return [self._link_dict(row) for row in rows]
+
+
+_store: Optional[VerdictStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[VerdictStore]:
+    """Process-wide store (opened on first use), or None when VERDICT_STORE_ENABLED is off."""
+    global _store
+    if not settings.VERDICT_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = VerdictStore(settings.VERDICT_STORE_PATH, batch_size=settings.VERDICT_STORE_BATCH,
+                                  flush_interval_s=settings.VERDICT_STORE_FLUSH_MS / 1000.0)
+            atexit.register(_store.flush)
+        return _store
@@ -0,0 +1,290 @@
+# benchmarks/loadgen.py
+"""
+Load generator / traffic replay for the FastAPI app.
+
+    # in-process app, upstreams served from benchmarks/fixtures, 8 concurrent clients
+    python -m benchmarks.loadgen --concurrency 8 --duration 30
+
+    # open-loop 20 req/s against a running server, replaying recorded traffic
+    python -m benchmarks.loadgen --url http://127.0.0.1:8000 --rps 20 --replay traffic.jsonl
+
+Replay files are JSONL; each line may be
+  {"path": "/verify_link/", "body": {...}}     explicit request
+  {"url": "https://..."}                        -> /verify_link/
+  {"claim"|"text"|"title": "..."}               -> /verify_text/ (e.g. requests.jsonl)
+Lines without a body (e.g. request-log records) get one from the synthetic mix.
+The per-stage breakdown is the delta of /metrics stage histograms over the run.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.run import _percentile
+
+CLAIMS = [
+    "government giving free ration to flood victims through whatsapp link",
+    "dam burst in assam viral message",
+    "old image of flooded railway station shared as recent",
+    "IMD red alert for heavy rain in Mumbai",
+    "national holiday announced due to cyclone",
+    "flood warning issued for Delhi as Yamuna crosses danger mark",
+]
+URLS = [
+    "http://relief-fund-update.co.in/login",
+    "https://pib.gov.in/factcheck.aspx",
+    "https://www.ndtv.com/delhi-news/delhi-flood-warning-evacuation-1",
+    "http://secure-bank-verify.in/account",
+]
+
+# endpoint -> (weight in the synthetic mix, body builder)
+ENDPOINTS = {
+    "/verify_text": (3, lambda rng: {"text": rng.choice(CLAIMS)}),
+    "/verify_text/": (3, lambda rng: {"text": rng.choice(CLAIMS)}),
+    "/verify_link/": (3, lambda rng: {"url": rng.choice(URLS)}),
+    "/generate_factcard/": (1, lambda rng: {
+        "claim": rng.choice(CLAIMS), "verdict": "Fake", "confidence": 0.97,
+        "evidence_links": ["https://pib.gov.in/factcheck/1", "https://www.altnews.in/x"],
+    }),
+}
+
+Request = Tuple[str, dict]
+
+
+def synthetic_mix(seed: int = 0) -> Iterator[Request]:
+    rng = random.Random(seed)
+    paths = list(ENDPOINTS)
+    weights = [ENDPOINTS[p][0] for p in paths]
+    while True:
+        path = rng.choices(paths, weights)[0]
+        yield path, ENDPOINTS[path][1](rng)
+
+
+def _from_record(record: dict, rng: random.Random) -> Optional[Request]:
+    path = record.get("path")
+    if path:
+        body = record.get("body")
+        if not isinstance(body, dict):
+            builder = ENDPOINTS.get(path, (0, None))[1]
+            if builder is None:
+                return None
+            body = builder(rng)
+        return path, body
+    if record.get("url"):
+        return "/verify_link/", {"url": record["url"]}
+    text = record.get("claim") or record.get("text") or record.get("title")
+    if text:
+        return "/verify_text/", {"text": text}
+    return None
+
+
+def replay(path: Path, seed: int = 0) -> Iterator[Request]:
+    """Cycle through a recorded JSONL file (skipping lines that don't map to an endpoint)."""
+    rng = random.Random(seed)
+    records = []
+    for line in path.read_text().splitlines():
+        if line.strip():
+            req = _from_record(json.loads(line), rng)
+            if req:
+                records.append(req)
+    if not records:
+        raise SystemExit(f"{path}: no replayable requests")
+    return itertools.cycle(records)
+
+
+# ---------------- stage breakdown via /metrics ----------------
+_STAGE_LINE = re.compile(r'^crisisclarity_stage_duration_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$')
+
+
+async def _stage_totals(client: httpx.AsyncClient) -> Dict[str, List[float]]:
+    """stage -> [sum_seconds, count] scraped from /metrics (empty if unavailable)."""
+    totals: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0])
+    try:
+        resp = await client.get("/metrics")
+    except httpx.HTTPError:
+        return {}
+    if resp.status_code != 200:
+        return {}
+    for line in resp.text.splitlines():
+        m = _STAGE_LINE.match(line)
+        if m:
+            totals[m.group(2)][0 if m.group(1) == "sum" else 1] = float(m.group(3))
+    return totals
+
+
+# ---------------- drivers ----------------
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, path: str, status: str, seconds: float) -> None:
+        self.latencies[path].append(seconds)
+        self.statuses[path][status] += 1
+
+
+async def _send(client: httpx.AsyncClient, req: Request, stats: Stats) -> None:
+    path, body = req
+    start = time.perf_counter()
+    try:
+        resp = await client.post(path, json=body)
+        status = str(resp.status_code)
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    stats.record(path, status, time.perf_counter() - start)
+
+
+async def closed_loop(client, requests: Iterator[Request], stats: Stats, concurrency: int,
+                      deadline: float, limit: Optional[int]) -> None:
+    """N workers, each sending its next request as soon as the previous one returns."""
+    counter = itertools.count()
+
+    async def worker():
+        while time.perf_counter() < deadline and (limit is None or next(counter) < limit):
+            await _send(client, next(requests), stats)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def open_loop(client, requests: Iterator[Request], stats: Stats, rps: float,
+                    deadline: float, limit: Optional[int], max_in_flight: int) -> None:
+    """Fixed arrival rate regardless of latency (exposes queueing), capped in-flight."""
+    gate = asyncio.Semaphore(max_in_flight)
+    tasks = []
+    interval = 1.0 / rps
+    next_at = time.perf_counter()
+    sent = 0
+
+    async def one(req):
+        async with gate:
+            await _send(client, req, stats)
+
+    while time.perf_counter() < deadline and (limit is None or sent < limit):
+        tasks.append(asyncio.create_task(one(next(requests))))
+        sent += 1
+        next_at += interval
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+    await asyncio.gather(*tasks)
+
+
+async def run_load(client: httpx.AsyncClient, requests: Iterator[Request], args) -> dict:
+    stats = Stats()
+    before = await _stage_totals(client)
+    start = time.perf_counter()
+    deadline = start + args.duration
+    if args.rps:
+        await open_loop(client, requests, stats, args.rps, deadline, args.requests, args.max_in_flight)
+    else:
+        await closed_loop(client, requests, stats, args.concurrency, deadline, args.requests)
+    elapsed = time.perf_counter() - start
+    after = await _stage_totals(client)
+    return _report(stats, elapsed, before, after)
+
+
+def _report(stats: Stats, elapsed: float, before, after) -> dict:
+    endpoints = {}
+    all_latencies = []
+    total_errors = 0
+    for path, samples in sorted(stats.latencies.items()):
+        samples.sort()
+        all_latencies.extend(samples)
+        errors = sum(n for status, n in stats.statuses[path].items() if not status.startswith("2"))
+        total_errors += errors
+        endpoints[path] = {
+            "requests": len(samples),
+            "error_rate": errors / len(samples),
+            "statuses": dict(stats.statuses[path]),
+            "p50_ms": _percentile(samples, 50) * 1000,
+            "p95_ms": _percentile(samples, 95) * 1000,
+            "p99_ms": _percentile(samples, 99) * 1000,
+        }
+    all_latencies.sort()
+    stages = {}
+    for stage, (total, count) in after.items():
+        prev_total, prev_count = before.get(stage, [0.0, 0.0])
+        calls = count - prev_count
+        if calls > 0:
+            stages[stage] = {"calls": int(calls), "mean_ms": (total - prev_total) / calls * 1000}
+    n = len(all_latencies)
+    return {
+        "elapsed_s": elapsed,
+        "requests": n,
+        "throughput_per_s": n / elapsed if elapsed else 0.0,
+        "error_rate": total_errors / n if n else 0.0,
+        "p50_ms": _percentile(all_latencies, 50) * 1000,
+        "p95_ms": _percentile(all_latencies, 95) * 1000,
+        "p99_ms": _percentile(all_latencies, 99) * 1000,
+        "endpoints": endpoints,
+        "stages": stages,
+    }
+
+
+def _print_report(report: dict) -> None:
+    print(f"{report['requests']} requests in {report['elapsed_s']:.1f}s "
+          f"-> {report['throughput_per_s']:.1f} req/s, error rate {report['error_rate']:.2%}")
+    print(f"latency p50 {report['p50_ms']:.1f} ms  p95 {report['p95_ms']:.1f} ms  p99 {report['p99_ms']:.1f} ms\n")
+    print(f"{'endpoint':22} {'n':>6} {'err %':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for path, e in report["endpoints"].items():
+        print(f"{path:22} {e['requests']:>6} {e['error_rate'] * 100:>6.1f}% {e['p50_ms']:>9.1f} "
+              f"{e['p95_ms']:>9.1f} {e['p99_ms']:>9.1f}")
+    if report["stages"]:
+        print(f"\n{'stage':34} {'calls':>7} {'mean ms':>9}")
+        for stage, s in sorted(report["stages"].items(), key=lambda kv: -kv[1]["mean_ms"] * kv[1]["calls"]):
+            print(f"{stage:34} {s['calls']:>7} {s['mean_ms']:>9.2f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the CrisisClarity API")
+    parser.add_argument("--url", help="base URL of a running server (default: in-process app, offline upstreams)")
+    parser.add_argument("--replay", type=Path, help="JSONL traffic to replay (default: synthetic mix)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", type=int, default=4, help="closed-loop clients (default 4)")
+    mode.add_argument("--rps", type=float, help="open-loop target requests per second")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="open-loop in-flight cap")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds (default 10)")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    requests = replay(args.replay, args.seed) if args.replay else synthetic_mix(args.seed)
+
+    with ExitStack() as stack:
+        if args.url:
+            transport, base_url = None, args.url
+        else:
+            from benchmarks.stub_server import offline_upstreams
+            stack.enter_context(offline_upstreams())
+            from app.main import app
+            logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request otherwise
+            # app errors become 500s in the report instead of aborting the run
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            base_url = "http://loadgen"
+
+        async def go():
+            limits = httpx.Limits(max_connections=max(args.concurrency, args.max_in_flight))
+            async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=60.0,
+                                         limits=limits) as client:
+                return await run_load(client, requests, args)
+
+        report = asyncio.run(go())
+
+    _print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
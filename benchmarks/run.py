@@ -0,0 +1,190 @@
+# benchmarks/run.py
+"""
+Offline component benchmarks.
+
+    python -m benchmarks.run                        # run all, print table
+    python -m benchmarks.run -n 200 -k evidence     # only names containing "evidence"
+    python -m benchmarks.run --save                 # write benchmarks/baselines/latest.json
+    python -m benchmarks.run --compare benchmarks/baselines/latest.json
+
+Every upstream is served from benchmarks/fixtures by a local stand-in server,
+so numbers reflect our own code (parsing, matching, normalization) plus
+loopback HTTP, not the internet.
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.stub_server import offline_upstreams
+
+BASELINES = Path(__file__).parent / "baselines"
+
+CLAIM = "government giving free ration to flood victims through whatsapp link"
+URL = "http://relief-fund-update.co.in/login"
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "p50_ms": _percentile(samples, 50) * 1000,
+        "p95_ms": _percentile(samples, 95) * 1000,
+        "p99_ms": _percentile(samples, 99) * 1000,
+        "mean_ms": total / iterations * 1000,
+        "throughput_per_s": iterations / total if total else 0.0,
+    }
+
+
+def _cases() -> Dict[str, Callable[[], Optional[Callable[[], object]]]]:
+    """
+    name -> setup() returning the callable to time, or None if the component
+    cannot run here (e.g. model weights / optional packages not installed).
+    Setup runs inside offline_upstreams().
+    """
+    def factcard():
+        from app.utils.factcard_generator import create_factcard
+        links = ["https://pib.gov.in/factcheck/1", "https://www.altnews.in/x", "https://factly.in/y"]
+        return lambda: create_factcard(CLAIM, "Fake", 0.97, links)
+
+    def render():
+        from app.utils.factcard_generator import create_factcard
+        from app.utils.factcard_renderer import render_card
+        card = create_factcard(CLAIM, "Fake", 0.97, ["https://pib.gov.in/factcheck/1", "https://www.altnews.in/x"])
+        return lambda: render_card(card, "png")
+
+    def match():
+        from app.utils.evidence import gather_evidence, match_claim_against_evidence
+        evidence = gather_evidence(CLAIM)
+        return lambda: match_claim_against_evidence(CLAIM, evidence)
+
+    def fetch():
+        from app.utils.scraper import fetch_factchecks
+        return lambda: fetch_factchecks(CLAIM)
+
+    def gather():
+        from app.utils.evidence import gather_evidence
+        return lambda: gather_evidence(CLAIM)
+
+    def cascade():
+        from app.utils.evidence import cascade_evidence
+        return lambda: cascade_evidence(CLAIM)
+
+    def link():
+        from app.services.link_verifier import analyze_url
+        return lambda: analyze_url(URL)
+
+    def aggregate():
+        try:
+            from app.utils.live_verifier import aggregate_verdict_from_evidence
+        except ImportError as e:
+            logging.warning("skipping aggregate_verdict_from_evidence: %s", e)
+            return None
+        from app.utils.evidence import gather_evidence
+        evidence = gather_evidence(CLAIM)
+        items = [dict(e, type="factcheck") for e in evidence["fact_checks"]] + evidence["news"]
+        return lambda: aggregate_verdict_from_evidence(CLAIM, items)
+
+    def verify_text():
+        try:
+            from app.services.text_verifier import verify_text_claim
+        except (ImportError, OSError) as e:  # torch/transformers or model weights unavailable
+            logging.warning("skipping verify_text_claim: %s", e)
+            return None
+        return lambda: verify_text_claim(CLAIM)
+
+    return {
+        "create_factcard": factcard,
+        "render_factcard_png": render,
+        "match_claim_against_evidence": match,
+        "fetch_factchecks": fetch,
+        "gather_evidence": gather,
+        "cascade_evidence": cascade,
+        "analyze_url": link,
+        "aggregate_verdict_from_evidence": aggregate,
+        "verify_text_claim": verify_text,
+    }
+
+
+def run(iterations: int, warmup: int, only: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    results = {}
+    with offline_upstreams():
+        for name, setup in _cases().items():
+            if only and only not in name:
+                continue
+            fn = setup()
+            if fn is None:
+                continue
+            # pure in-process functions are cheap enough for many more rounds
+            n = iterations * 20 if name in ("create_factcard", "match_claim_against_evidence") else iterations
+            results[name] = measure(fn, n, warmup)
+    return results
+
+
+def _print_table(results: Dict[str, Dict[str, float]], baseline: Optional[dict] = None) -> None:
+    header = f"{'benchmark':34} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>10}"
+    if baseline:
+        header += f" {'p50 vs base':>12}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        line = (f"{name:34} {r['iterations']:>6} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} "
+                f"{r['p99_ms']:>10.3f} {r['throughput_per_s']:>10.1f}")
+        base = (baseline or {}).get("results", {}).get(name)
+        if base and base.get("p50_ms"):
+            line += f" {(r['p50_ms'] / base['p50_ms'] - 1) * 100:>+11.1f}%"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline CrisisClarity component benchmarks")
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("-k", "--only", help="run benchmarks whose name contains this string")
+    parser.add_argument("--save", nargs="?", const=str(BASELINES / "latest.json"),
+                        help="write results as a JSON baseline (default: baselines/latest.json)")
+    parser.add_argument("--compare", help="baseline JSON to compare p50 against")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    results = run(args.iterations, args.warmup, args.only)
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    _print_table(results, baseline)
+
+    if args.save:
+        out = Path(args.save)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps({
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, indent=2))
+        print(f"\nbaseline written to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# benchmarks/startup.py
+"""
+Startup cost per deployment profile (APP_PROFILE, see app/main.py).
+
+    python -m benchmarks.startup                      # every profile, 3 fresh processes each
+    python -m benchmarks.startup -p link -p text -r 5
+    INFERENCE_SOCKET=/run/crisisclarity/infer.sock python -m benchmarks.startup -p text
+
+Each run is a new interpreter that imports app.main as uvicorn would, then
+runs the lifespan startup. Reported per profile: import time (min over runs),
+lifespan startup time, peak RSS, and which heavy libraries ended up imported.
+The environment is passed through, so INFERENCE_SOCKET decides whether text
+workers load the classifier themselves.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+HEAVY_MODULES = ("torch", "transformers", "PIL", "numpy")
+# the keys of app.main.PROFILES; importing app.main here would build the full app in this process
+PROFILES = ("link", "image", "factcard", "jobs", "text", "all")
+
+CHILD = """
+import asyncio, json, resource, sys, time
+
+def peak_rss_mb():
+    # VmHWM starts over at exec; ru_maxrss would include the parent's peak on Linux
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter() - start
+
+async def lifespan():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        pass
+
+start = time.perf_counter()
+asyncio.run(lifespan())
+print(json.dumps({
+    "import_s": imported,
+    "startup_s": time.perf_counter() - start,
+    "max_rss_mb": peak_rss_mb(),
+    "routes": len(app.main.app.routes),
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_profile(profile: str, runs: int) -> Dict[str, object]:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", CHILD], env={**os.environ, "APP_PROFILE": profile},
+                             capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "import_s": min(s["import_s"] for s in samples),
+        "startup_s": min(s["startup_s"] for s in samples),
+        "max_rss_mb": max(s["max_rss_mb"] for s in samples),
+        "routes": samples[0]["routes"],
+        "loaded": samples[0]["loaded"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import time and memory per deployment profile")
+    parser.add_argument("-p", "--profile", action="append", help=f"profile(s) to measure (default: all of {list(PROFILES)})")
+    parser.add_argument("-r", "--runs", type=int, default=3, help="fresh processes per profile")
+    parser.add_argument("--json", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {profile: measure_profile(profile, args.runs) for profile in (args.profile or PROFILES)}
+    header = f"{'profile':16} {'import s':>9} {'startup s':>10} {'RSS MB':>8} {'routes':>7}  heavy imports"
+    print(header)
+    print("-" * len(header))
+    for profile, r in results.items():
+        print(f"{profile:16} {r['import_s']:>9.2f} {r['startup_s']:>10.3f} {r['max_rss_mb']:>8.0f} {r['routes']:>7}  "
+              f"{', '.join(r['loaded']) or '-'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
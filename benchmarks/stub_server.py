@@ -0,0 +1,145 @@
+# benchmarks/stub_server.py
+"""
+Local stand-ins for every upstream the verifiers call (PIB, RSS feeds,
+NewsAPI, Google Fact Check, urlscan.io, WHOIS, link shorteners), serving
+recorded fixtures so benchmarks and tests run with no network access.
+"""
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+from urllib.parse import urlparse
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# path prefix -> (fixture file, content type)
+ROUTES: Dict[str, Tuple[str, str]] = {
+    "/factcheck.aspx": ("pib_factcheck.html", "text/html; charset=utf-8"),
+    "/factcheck/": ("pib_article.html", "text/html; charset=utf-8"),
+    "/WriteReadData/": ("pib_article.html", "text/html; charset=utf-8"),
+    "/feeds/": ("rss_feed.xml", "application/rss+xml"),
+    "/newsapi/": ("newsapi.json", "application/json"),
+    "/factchecktools/": ("google_factcheck.json", "application/json"),
+    "/urlscan/": ("urlscan.json", "application/json"),
+}
+
+# short-link paths -> Location (relative, or absolute on this server with "{base}")
+REDIRECTS: Dict[str, str] = {
+    "/s/relief": "/s/hop",
+    "/s/hop": "{base}/factcheck/relief-fund",
+    "/s/loop": "/s/loop-back",
+    "/s/loop-back": "/s/loop",
+}
+HEAD_NOT_ALLOWED = {"/s/hop"}  # like shorteners that answer HEAD with 405
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real upstreams
+    bodies: Dict[str, Tuple[bytes, str]] = {}
+
+    def _serve(self, head: bool = False):
+        path = urlparse(self.path).path
+        if head and path in HEAD_NOT_ALLOWED:
+            self.send_response(405)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if path in REDIRECTS:
+            self.send_response(301)
+            self.send_header("Location", REDIRECTS[path].format(base=f"http://{self.headers['Host']}"))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        for prefix, body in self.bodies.items():
+            if path == prefix or (prefix.endswith("/") and path.startswith(prefix)):
+                payload, content_type = body
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(payload)
+                return
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        self._serve()
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._serve()
+
+    def log_message(self, *args):  # keep benchmark output clean
+        pass
+
+
+@contextmanager
+def fixture_server() -> Iterator[str]:
+    """Serve the recorded fixtures on 127.0.0.1; yields the base URL."""
+    _FixtureHandler.bodies = {
+        prefix: ((FIXTURES / name).read_bytes(), content_type)
+        for prefix, (name, content_type) in ROUTES.items()
+    }
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _offline_whois(domain, *args, **kwargs):
+    import whois
+    return whois.WhoisEntry.load(domain, (FIXTURES / "whois.txt").read_text())
+
+
+@contextmanager
+def offline_upstreams() -> Iterator[str]:
+    """
+    Start the fixture server and point every upstream at it for the duration.
+    Module-level URLs/keys are patched and restored afterwards.
+    """
+    import whois
+
+    from app.services import link_verifier
+    from app.utils import google_factcheck, news_api, scraper
+    from app.utils.config import settings
+    from app.utils import url_expander
+    from app.utils.title_cache import TitleCache
+
+    with fixture_server() as base:
+        patches = [
+            (scraper, "PIB_URL", f"{base}/factcheck.aspx"),
+            (scraper, "FEEDS", {name: f"{base}/feeds/{name}.xml" for name in scraper.FEEDS}),
+            (news_api, "NEWSAPI_URL", f"{base}/newsapi/v2/everything"),
+            (google_factcheck, "BASE", f"{base}/factchecktools/v1alpha1/claims:search"),
+            (link_verifier, "URLSCAN_API", f"{base}/urlscan/api/v1/scan/"),
+            (link_verifier, "URLSCAN_API_KEY", "offline"),
+            (settings, "NEWS_API_KEY", "offline"),
+            (settings, "GOOGLE_FACTCHECK_API_KEY", "offline"),
+            (settings, "VERDICT_STORE_ENABLED", False),  # no history read or written offline
+            (settings, "REPUTATION_TABLE_PATH", ""),  # every link check runs the live (stubbed) lookups
+            # fresh in-memory title cache, so every run fetches (and nothing is written to disk)
+            (scraper, "TITLE_CACHE", TitleCache()),
+            (url_expander, "REDIRECT_CACHE", url_expander.RedirectCache()),
+            (settings, "REDIRECT_EXPAND", settings.REDIRECT_EXPAND),  # restored if a test changes it
+            (settings, "REDIRECT_ALLOW_PRIVATE", True),  # the fixture server is on 127.0.0.1
+            (whois, "whois", _offline_whois),
+        ]
+        saved = [(obj, attr, getattr(obj, attr)) for obj, attr, _ in patches]
+        for obj, attr, value in patches:
+            setattr(obj, attr, value)
+        try:
+            yield base
+        finally:
+            for obj, attr, value in saved:
+                setattr(obj, attr, value)
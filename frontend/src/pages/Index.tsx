@@ -215,31 +215,64 @@ const Index = () => {
     setResults(null);
 
     try {
-      // Backend endpoint
-      const response = await fetch("http://127.0.0.1:8000/verify_text", {
+      // Streaming backend endpoint (NDJSON: model -> evidence per source -> final)
+      const response = await fetch("http://127.0.0.1:8000/verify_text/stream", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ text: data }), // match backend model field
       });
 
-      if (!response.ok) throw new Error("Failed to fetch analysis");
-
-      const backendResult = await response.json();
+      if (!response.ok || !response.body) throw new Error("Failed to fetch analysis");
 
-      const formattedResult: Result = {
-        prediction: mapVerdict(backendResult.verdict),
-        confidence: Math.floor((backendResult.confidence || 0) * 100),
+      let formattedResult: Result = {
+        prediction: "uncertain",
+        confidence: 0,
         reasoning: "Verified using our AI-powered fact-checker",
-        evidence_links: Array.isArray(backendResult.evidence_links)
-          ? backendResult.evidence_links.map((link: any) => ({
-              source: link.source || "Unknown",
-              url: link.url || "",
-              verdict: link.verdict || "uncertain",
-            }))
-          : [],
+        evidence_links: [],
       };
 
-      setResults(formattedResult);
+      const applyEvent = (event: any) => {
+        if (event.event === "model" || event.event === "final") {
+          formattedResult = {
+            ...formattedResult,
+            prediction: mapVerdict(event.verdict),
+            confidence: Math.floor((event.confidence || 0) * 100),
+            reasoning: event.event === "model"
+              ? "Model verdict - still gathering evidence..."
+              : event.reused
+                ? "Matches a recently verified claim"
+                : "Verified using our AI-powered fact-checker",
+          };
+        }
+        if (event.event === "evidence" && Array.isArray(event.evidence_links)) {
+          formattedResult = {
+            ...formattedResult,
+            evidence_links: [
+              ...formattedResult.evidence_links,
+              ...event.evidence_links.map((link: any) => ({
+                source: link.source || "Unknown",
+                url: link.url || "",
+                verdict: link.verdict || "uncertain",
+              })),
+            ],
+          };
+        }
+        setResults(formattedResult);
+      };
+
+      // Render each event as soon as its line arrives
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop() ?? "";
+        lines.filter((line) => line.trim()).forEach((line) => applyEvent(JSON.parse(line)));
+      }
+      if (buffer.trim()) applyEvent(JSON.parse(buffer));
 
       toast({
         title: "Analysis Complete",
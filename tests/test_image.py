@@ -0,0 +1,119 @@
+import io
+import json
+import random
+
+from PIL import Image, ImageDraw
+
+from app.services.image_verifier import HammingIndex, ImageIndex, dhash, load_image, phash, verify_image
+
+
+def _photo(seed: int, size=(640, 480)) -> Image.Image:
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.ellipse((x, y, x + rng.randrange(40, 300), y + rng.randrange(40, 300)),
+                     fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    return image
+
+
+def _jpeg(image: Image.Image, quality=90) -> bytes:
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+
+def test_hamming_index_finds_exactly_the_brute_force_neighbours():
+    rng = random.Random(7)
+    hashes = [rng.getrandbits(64) for _ in range(5000)]
+    query = hashes[123] ^ (1 << 3) ^ (1 << 40) ^ (1 << 62)  # 3 bits away
+    hashes[4000] = query ^ (0b11111 << 20)  # 5 bits away, all in one substring
+    probed, scanned = HammingIndex(linear_scan_max=0), HammingIndex()
+    for h in hashes:
+        probed.add(h)
+        scanned.add(h)
+
+    expected = sorted(((h ^ query).bit_count(), i) for i, h in enumerate(hashes) if (h ^ query).bit_count() <= 8)
+    assert probed.search(query, 8) == scanned.search(query, 8) == expected
+    assert expected[:2] == [(3, 123), (5, 4000)]
+
+
+def test_recompressed_copy_of_debunked_photo_is_recognised(tmp_path):
+    index = ImageIndex(str(tmp_path / "images.db"))
+    original = _photo(1)
+    for seed in range(2, 40):  # unrelated images
+        other = _photo(seed)
+        index.add(phash(other), dhash(other))
+    index.add(phash(original), dhash(original), first_seen="2019-08-12", source="Factly")
+    index.add(phash(original), dhash(original), first_seen="2021-07-03",
+              factcheck_url="https://factly.in/old-flood-photo", verdict="Fake")
+
+    # forwarded copy: downscaled and re-compressed
+    forwarded = _jpeg(original.resize((320, 240)), quality=40)
+    result = verify_image(forwarded, index)
+    assert result["status"] == "recycled"
+    assert result["earliest_occurrence"]["first_seen"] == "2019-08-12"
+    assert result["factcheck"]["factcheck_url"] == "https://factly.in/old-flood-photo"
+
+    assert verify_image(_jpeg(_photo(99)), index)["status"] == "no_match"
+    # hashes survive a reload from SQLite
+    other_worker = ImageIndex(index.path)
+    assert len(other_worker) == len(index) == 40
+    assert phash(load_image(forwarded)) == int(result["phash"], 16)
+
+    # rows stored later by another process show up in an index already loaded
+    late = _photo(77)
+    index.add(phash(late), dhash(late), factcheck_url="https://factly.in/late")
+    assert verify_image(_jpeg(late), other_worker)["factcheck"]["factcheck_url"] == "https://factly.in/late"
+
+
+def test_exif_orientation_is_applied_before_hashing():
+    upright = _photo(3)
+    exif = Image.Exif()
+    exif[0x0112] = 6  # stored rotated; viewers turn it 90 degrees clockwise
+    out = io.BytesIO()
+    upright.transpose(Image.Transpose.ROTATE_90).save(out, "JPEG", quality=90, exif=exif)
+
+    assert (phash(load_image(out.getvalue())) ^ phash(load_image(_jpeg(upright)))).bit_count() <= 4
+
+
+def test_bulk_import_resumes_after_last_committed_batch(tmp_path):
+    from app.services.image_ingest import import_images
+
+    entries = []
+    for seed in range(7):
+        _photo(seed, (1600, 1200)).save(tmp_path / f"{seed}.jpg", quality=85)
+        entries.append({"path": f"{seed}.jpg", "first_seen": f"2020-01-0{seed + 1}", "factcheck_url": f"https://fc/{seed}"})
+    (tmp_path / "broken.jpg").write_bytes(b"not a jpeg")
+    entries.insert(3, {"path": "broken.jpg"})
+    source = tmp_path / "debunked.jsonl"
+    # lines that are not entries are skipped without taking a position
+    source.write_text("\n".join([json.dumps(entry) for entry in entries[:5]] + ['{"first_seen": "2020"}', "{oops"]
+                                + [json.dumps(entry) for entry in entries[5:]]))
+
+    index = ImageIndex(str(tmp_path / "images.db"))
+    # a previous run stored the first two entries, then stopped
+    index.add_many([(phash(_photo(seed)), dhash(_photo(seed)), None, None, None, None, None) for seed in (0, 1)],
+                   checkpoint=(str(source), 2))
+
+    stats = import_images(str(source), index, workers=2, batch_size=2)
+    assert stats == {"resumed_at": 2, "indexed": 5, "failed": 1}
+    assert len(index) == 7 and index.checkpoint(str(source)) == 8
+    assert import_images(str(source), index, workers=2)["indexed"] == 0
+
+    # draft-decoded archive JPEG and a small forwarded copy hash alike
+    result = verify_image(_jpeg(_photo(5, (1600, 1200)).resize((400, 300)), quality=50), index)
+    assert result["factcheck"]["factcheck_url"] == "https://fc/5"
+
+
+def test_bulk_import_records_any_decode_error_per_file(monkeypatch, tmp_path):
+    import struct
+    from app.services import image_ingest
+
+    def malformed(f):
+        raise struct.error("unpack requires a buffer of 4 bytes")
+
+    monkeypatch.setattr(image_ingest, "hash_image", malformed)
+    (tmp_path / "exif.jpg").write_bytes(b"")
+    assert image_ingest._hash_file(str(tmp_path / "exif.jpg")) == (None, None, "unpack requires a buffer of 4 bytes")
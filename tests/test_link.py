@@ -0,0 +1,237 @@
+import asyncio
+
+from benchmarks.stub_server import offline_upstreams
+from app.services.link_verifier import analyze_url, analyze_url_async
+from app.utils.aio import close_http_client
+
+
+def test_analyze_url_flags_new_phishing_domain():
+    with offline_upstreams():
+        result = analyze_url("http://relief-fund-update.co.in/login")
+
+    assert result["domain"] == "relief-fund-update.co.in"
+    assert result["status"] == "Flagged"
+    assert result["domain_age_days"] is not None
+    assert "URLScan flagged this as malicious" in result["reasons"]
+
+
+def test_trusted_domain_short_circuits():
+    with offline_upstreams():
+        result = analyze_url("https://pib.gov.in/factcheck.aspx")
+
+    assert result["trusted"] is True
+    assert result["status"] == "Trusted"
+
+
+def test_analyze_url_async_matches_sync():
+    async def analyze():
+        try:
+            return await analyze_url_async("http://relief-fund-update.co.in/login")
+        finally:
+            await close_http_client()
+
+    with offline_upstreams():
+        expected = analyze_url("http://relief-fund-update.co.in/login")
+        result = asyncio.run(analyze())
+
+    assert result == expected
+
+
+def test_verify_link_etag_answers_repeat_checks_with_304(monkeypatch, tmp_path):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.routers import verify_link
+    from app.utils.verdict_store import VerdictStore
+
+    store = VerdictStore(str(tmp_path / "verdicts.db"))
+    monkeypatch.setattr(verify_link, "get_store", lambda: store)
+    app = FastAPI()
+    app.include_router(verify_link.router)
+    client = TestClient(app)
+
+    with offline_upstreams():
+        first = client.post("/verify_link/", json={"url": "http://relief-fund-update.co.in/login"})
+    assert first.status_code == 200 and first.headers["cache-control"].startswith("private, max-age=")
+    store.flush()
+
+    async def must_not_run(*args, **kwargs):
+        raise AssertionError("pipeline ran for a fresh cached result")
+
+    # the stored result is still fresh: no upstream call, no body
+    monkeypatch.setattr(verify_link, "analyze_url_async", must_not_run)
+    again = client.post("/verify_link/", json={"url": "http://relief-fund-update.co.in/login"}, headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304 and again.headers["etag"] == first.headers["etag"]
+
+
+def test_registered_domain_follows_bundled_suffix_list():
+    from app.utils import domain_tools, domains
+
+    assert domains.extract("https://user@News.BBC.co.uk.:443/x") == ("news", "bbc", "co.uk")
+    assert domains.registered_domain("relief-fund-update.co.in/login") == "relief-fund-update.co.in"
+    assert domains.extract("http://a.b.kawasaki.jp") == ("", "a", "b.kawasaki.jp")  # *.kawasaki.jp
+    assert domains.extract("http://city.kawasaki.jp") == ("", "city", "kawasaki.jp")  # !city.kawasaki.jp
+    assert domains.extract("http://shop.xn--fiqs8s/") == ("", "shop", "xn--fiqs8s")  # IDN suffix
+    assert domains.extract("http://192.168.0.1:8080/") == ("", "192.168.0.1", "")
+    # domain_tools now trusts by registered domain, not by string suffix
+    assert domain_tools.is_trusted("www.who.int") and not domain_tools.is_trusted("fake-who.int")
+
+
+def test_reputation_table_answers_before_whois(monkeypatch, tmp_path):
+    from app.services import link_verifier
+    from app.utils import domain_tools, reputation
+    from app.utils.config import settings
+
+    (tmp_path / "domains.txt").write_text("http://relief-fund-update.co.in/login\nold-news.example.com  # seen in feeds\n")
+    (tmp_path / "blocked.txt").write_text("scam-relief.in\n")
+    monkeypatch.setattr(link_verifier, "get_domain_age", lambda d: {"relief-fund-update.co.in": 3}.get(d))
+    monkeypatch.setattr(domain_tools, "resolve_dns", lambda d: [] if d == "scam-relief.in" else ["203.0.113.7"])
+    table = str(tmp_path / "reputation.bin")
+    assert reputation.build([str(tmp_path / "domains.txt")], table, blocked_list=str(tmp_path / "blocked.txt"), workers=4) == 3
+
+    whois_calls = []
+    monkeypatch.setattr(link_verifier, "get_domain_age", lambda d: whois_calls.append(d))
+    with offline_upstreams():
+        settings.REPUTATION_TABLE_PATH = table  # restored by offline_upstreams
+        listed = analyze_url("http://relief-fund-update.co.in/login")
+        blocked = analyze_url("https://scam-relief.in/")
+        unlisted = analyze_url("https://unlisted-domain.org/")
+
+    assert listed["domain_age_days"] == 3 and listed["status"] == "Flagged"
+    assert "URLScan flagged this as malicious" in listed["reasons"]  # no stored verdict: urlscan still runs
+    assert {"Domain is on the blocklist", "Domain does not resolve in DNS"} <= set(blocked["reasons"])
+    assert whois_calls == ["unlisted-domain.org"] and unlisted["domain"] == "unlisted-domain.org"
+
+
+def test_short_links_are_expanded_and_every_hop_checked(monkeypatch):
+    from app.utils import url_expander
+
+    # the stub server plays the shortener: 127.0.0.1/s/... answers with redirects
+    monkeypatch.setattr(url_expander, "SHORTENER_DOMAINS", url_expander.SHORTENER_DOMAINS | {"127.0.0.1"})
+    with offline_upstreams() as base:
+        result = analyze_url(f"{base}/s/relief")
+        hops, head = [], url_expander._session.head
+        monkeypatch.setattr(url_expander._session, "head", lambda url, **kw: hops.append(url) or head(url, **kw))
+        again = analyze_url(f"{base}/s/relief")  # short links never change: answered from the cache
+        looped = analyze_url(f"{base}/s/loop")
+
+    assert result["url"] == f"{base}/s/relief" and result["final_url"] == f"{base}/factcheck/relief-fund"
+    # /s/hop refuses HEAD: that hop was read from a GET's headers
+    assert [hop["url"] for hop in result["redirect_chain"]] == [f"{base}/s/relief", f"{base}/s/hop", result["final_url"]]
+    assert [hop["status"] for hop in result["redirect_chain"]] == ["Flagged", "Flagged", "Flagged"]  # http://
+    assert result["status"] == "Flagged" and "URLScan flagged this as malicious" in result["reasons"]
+    assert "Redirects through flagged link on 127.0.0.1" in result["reasons"]
+    assert again == result and hops == [f"{base}/s/loop", f"{base}/s/loop-back"]
+    assert looped["redirect_chain"][-1]["url"] == f"{base}/s/loop-back"
+    assert "Redirect chain loops or exceeds 5 hops" in looped["reasons"]
+
+
+def test_redirects_into_internal_addresses_are_refused(monkeypatch):
+    from app.utils import url_expander
+    from app.utils.config import settings
+
+    requested = []
+
+    class RecordingClient:
+        async def head(self, url, **kwargs):
+            requested.append(url)
+
+    monkeypatch.setattr(url_expander, "SHORTENER_DOMAINS", url_expander.SHORTENER_DOMAINS | {"127.0.0.1"})
+    monkeypatch.setattr(url_expander._session, "head", lambda url, **kw: requested.append(url))
+    monkeypatch.setattr(url_expander, "http_client", RecordingClient)
+    with offline_upstreams() as base:
+        monkeypatch.setattr(settings, "REDIRECT_ALLOW_PRIVATE", False)
+        result = analyze_url(f"{base}/s/relief")
+        async_result = asyncio.run(analyze_url_async(f"{base}/s/relief"))
+
+    assert not requested  # nothing was sent to the loopback address
+    assert result["status"] == "Flagged" and not result["trusted"]
+    assert "Redirects to a private or reserved address (127.0.0.1)" in result["reasons"]
+    assert result["redirect_chain"][0]["status"] == "Flagged" and async_result["reasons"] == result["reasons"]
+    assert url_expander.refusal("http://169.254.169.254/latest/meta-data/")
+    assert url_expander.refusal("http://[::1]:8080/") and url_expander.refusal("http://10.1.2.3/")
+    assert url_expander.refusal("https://93.184.215.14/") is None
+
+
+def test_redirect_hops_are_requested_at_the_checked_address(monkeypatch):
+    import socket
+    import time
+    from types import SimpleNamespace
+    from app.utils import url_expander
+    from app.utils.config import settings
+
+    requested = []
+
+    def record(url, headers=None, extensions=None, **kwargs):
+        requested.append((url, headers.get("Host"), extensions.get("sni_hostname")))
+        return SimpleNamespace(status_code=200, headers={})
+
+    class RecordingClient:
+        async def head(self, url, **kwargs):
+            return record(url, **kwargs)
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host == "tinyurl.com":  # slow (or rebinding) DNS: the lookup outlives the hop timeout
+            time.sleep(0.3)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.215.14", port))]
+
+    monkeypatch.setattr(settings, "REDIRECT_ALLOW_PRIVATE", False)
+    monkeypatch.setattr(settings, "REDIRECT_HOP_TIMEOUT_S", 0.1)
+    monkeypatch.setattr(url_expander, "REDIRECT_CACHE", url_expander.RedirectCache())
+    monkeypatch.setattr(url_expander.socket, "getaddrinfo", getaddrinfo)
+    monkeypatch.setattr(url_expander._session, "head", record)
+    monkeypatch.setattr(url_expander, "http_client", RecordingClient)
+
+    pinned = url_expander.expand_url("https://bit.ly/relief?ref=1")
+    monkeypatch.setattr(url_expander, "REDIRECT_CACHE", url_expander.RedirectCache())  # the async path requests too
+    pinned_async = asyncio.run(url_expander.expand_url_async("https://bit.ly/relief?ref=1"))
+    slow = url_expander.expand_url("https://tinyurl.com/relief")
+    slow_async = asyncio.run(url_expander.expand_url_async("https://tinyurl.com/relief"))
+
+    assert pinned.urls == pinned_async.urls == ["https://bit.ly/relief?ref=1"]
+    assert requested == [("https://93.184.215.14:443/relief?ref=1", "bit.ly", "bit.ly")] * 2
+    assert slow.urls == slow_async.urls == ["https://tinyurl.com/relief"] and not slow.exhausted
+    assert url_expander.REDIRECT_CACHE.get("https://tinyurl.com/relief") is None  # cut short: not cached
+
+
+def test_links_off_shorteners_are_not_expanded():
+    from app.utils.url_expander import expand_url
+
+    with offline_upstreams():
+        result = analyze_url("http://relief-fund-update.co.in/login")
+    assert "redirect_chain" not in result and "final_url" not in result
+    assert expand_url("https://pib.gov.in/factcheck.aspx").urls == ["https://pib.gov.in/factcheck.aspx"]
+
+
+def test_bulk_verify_streams_results_and_resumes_from_checkpoint(tmp_path):
+    import json
+    from app.services import bulk_verify
+
+    source, output = tmp_path / "links.jsonl", tmp_path / "scored.jsonl"
+    source.write_text("\n".join([
+        json.dumps({"id": "a", "url": "http://relief-fund-update.co.in/login"}),
+        json.dumps({"id": "b", "url": "https://pib.gov.in/factcheck.aspx"}),
+        "not json",
+        json.dumps({"request_id": "d", "url": "https://www.who.int/news"}),
+        json.dumps({"id": "e", "note": "neither a url nor a claim"}),
+    ]) + "\n")
+
+    with offline_upstreams():
+        stats = bulk_verify.run(str(source), str(output), workers=2, batch_size=2)
+        complete = output.read_bytes()
+        records = [json.loads(line) for line in complete.splitlines()]
+        # a run killed after the first batch, mid-way through writing the second
+        first_batch = b"".join(complete.splitlines(keepends=True)[:2])
+        bulk_verify.save_checkpoint(str(source), str(output), 2, len(first_batch))
+        output.write_bytes(first_batch + b'{"position": 2, "id"')
+        resumed = bulk_verify.run(str(source), str(output), workers=2, batch_size=2)
+        output.unlink()  # a stale checkpoint without its output starts over
+        restarted = bulk_verify.run(str(source), str(output), workers=2, batch_size=2)
+
+    assert stats["processed"] == 5 and stats["links"] == 3 and stats["failed"] == 2
+    assert [r["position"] for r in records] == [0, 1, 2, 3, 4]
+    assert [r["id"] for r in records] == ["a", "b", None, "d", "e"]
+    assert records[0]["result"]["status"] == "Flagged" and records[1]["result"]["trusted"] is True
+    assert "error" in records[2] and "error" in records[4]
+    assert resumed["resumed_at"] == 2 and resumed["processed"] == 3
+    assert restarted["resumed_at"] == 0 and restarted["processed"] == 5
+    assert output.read_bytes() == complete
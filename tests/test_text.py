@@ -0,0 +1,206 @@
+import asyncio
+import json
+
+from benchmarks.stub_server import offline_upstreams
+from app.utils.aio import close_http_client
+from app.utils.evidence import gather_evidence, match_claim_against_evidence
+from app.utils.scraper import fetch_factchecks, fetch_factchecks_async
+
+CLAIM = "government giving free ration to flood victims through whatsapp link"
+
+
+def test_fetch_factchecks_reads_pib_and_feeds():
+    with offline_upstreams():
+        hits = fetch_factchecks(CLAIM)
+
+    pib = [h for h in hits if h["source"] == "PIB"]
+    assert any(h["url"].endswith("flood-relief-ration-fake.aspx") and h["verdict"] == "Fake" for h in pib)
+    assert any(h["source"] == "AltNews" for h in hits)
+    assert len({h["url"] for h in hits}) == len(hits)
+
+
+def test_google_factcheck_rating_decides_match():
+    with offline_upstreams():
+        evidence = gather_evidence(CLAIM)
+
+    match = match_claim_against_evidence(CLAIM, evidence)
+
+    assert match["verdict"] == "verified_fake"
+    assert match["verified_by"] == "Alt News"
+
+
+def test_fetch_factchecks_async_matches_sync():
+    async def fetch():
+        try:
+            return await fetch_factchecks_async(CLAIM)
+        finally:
+            await close_http_client()
+
+    with offline_upstreams():
+        expected = fetch_factchecks(CLAIM)
+        hits = asyncio.run(fetch())
+
+    assert hits == expected
+
+
+def test_pib_titles_stop_at_first_heading_and_are_cached(tmp_path):
+    from app.utils import scraper
+    from app.utils.title_cache import TitleCache
+
+    reader = scraper._TitleReader()
+    page = b"<html><head><title>Index</title></head><body><h1> Claim is fake </h1>" + b"<p>x</p>" * 5000
+    chunks = [page[i:i + 64] for i in range(0, len(page), 64)]
+    fed = next(n for n, chunk in enumerate(chunks, 1) if reader.feed(chunk))
+    assert fed < 5 and reader.title() == "Claim is fake"
+
+    with offline_upstreams() as base:
+        scraper.TITLE_CACHE = TitleCache(str(tmp_path / "titles.db"))
+        url = f"{base}/factcheck/flood-relief-ration-fake.aspx"
+        title = scraper._resolve_titles([(url, "", "Unverified")], deadline=None)[0]
+    assert "fake" in title
+
+    # the fixture server is gone; a new cache on the same file still knows the title
+    assert TitleCache(str(tmp_path / "titles.db")).get(url) == title
+
+
+def test_pib_index_is_reparsed_only_when_it_changes():
+    from app.utils import scraper
+
+    page = b'<html><body><a href="/factcheck/a-fake.aspx">Flood relief link is fake</a><a href="/about">About</a>'
+    first = scraper._pib_links(page + b"</body></html>")
+    assert first == [(scraper.urljoin(scraper.PIB_URL, "/factcheck/a-fake.aspx"), "Flood relief link is fake", "Fake")]
+    assert scraper._pib_links(page + b"</body></html>") is first
+
+    changed = scraper._pib_links(page + b'<a href="/factcheck/b.aspx">Dam is safe</a></body></html>')
+    assert changed is not first and len(changed) == 2
+
+
+def test_cascade_stops_at_first_decisive_source(tmp_path, monkeypatch):
+    from app.utils import evidence
+    from app.utils.verdict_store import VerdictStore
+
+    with offline_upstreams():
+        found, match = evidence.cascade_evidence(CLAIM)
+    # Google Fact Check already rates the claim; scrapers and news are never queried
+    assert match["verdict"] == "verified_fake" and match["verified_by"] == "Alt News"
+    assert found["google_factcheck"] and not found["fact_checks"] and not found["news"]
+
+    store = VerdictStore(str(tmp_path / "verdicts.db"))
+    store.record_claim(CLAIM, "evidence", {"verdict": "Fake", "confidence": 1.0, "evidence_links": [
+        {"source": "PIB", "url": "https://pib.gov.in/factcheck/flood-relief-ration-fake.aspx", "verdict": "Fake"},
+    ]})
+    store.flush()
+    monkeypatch.setattr(evidence, "get_store", lambda: store)
+
+    # answered from the verdict store without any upstream call
+    found, match = evidence.cascade_evidence("Forwarded as received: " + CLAIM.upper())
+    assert match["verdict"] == "verified_fake" and match["verified_by"] == "PIB"
+    assert not found["google_factcheck"] and not found["news"]
+
+
+def _verify_text(monkeypatch):
+    """app.routers.verify_text without loading the classifier; the model verdict is stubbed."""
+    from app.utils.config import settings
+
+    monkeypatch.setattr(settings, "INFERENCE_SOCKET", settings.INFERENCE_SOCKET or "/nonexistent/inference.sock")
+    monkeypatch.setattr(settings, "VERDICT_STORE_ENABLED", False)
+    monkeypatch.setattr(settings, "CLAIM_DEDUP_ENABLED", False)
+    from app.routers import verify_text
+
+    async def predict(text):
+        return {"verdict": "Real", "confidence": 0.8}
+
+    monkeypatch.setattr(verify_text, "predict_claim_async", predict)
+    return verify_text
+
+
+def test_stream_sends_model_then_evidence_per_source_then_final(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.utils import evidence
+
+    verify_text = _verify_text(monkeypatch)
+
+    async def fact_checks(query, deadline=None):
+        await asyncio.sleep(0.1)
+        return [{"source": "PIB", "url": "https://pib.gov.in/factcheck/flood-relief-ration-fake.aspx", "verdict": "Fake"}]
+
+    async def news(query, deadline=None):
+        return [{"source": "news", "url": "https://example.com/flood", "verdict": None}]
+
+    monkeypatch.setattr(evidence, "ASYNC_EVIDENCE_SOURCES", {"fact_checks": fact_checks, "news": news})
+    app = FastAPI()
+    app.include_router(verify_text.router)
+    with TestClient(app) as client:
+        resp = client.post("/verify_text/stream", json={"text": CLAIM})
+
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    events = [json.loads(line) for line in resp.text.splitlines()]
+    assert [(e["event"], e.get("source")) for e in events] == [
+        ("model", None), ("evidence", "news"), ("evidence", "fact_checks"), ("final", None),
+    ]
+    assert events[0]["verdict"] == "Real"
+    # the PIB rating overrides the classifier
+    assert events[-1]["verdict"] == "Fake" and events[-1]["confidence"] == 1.0
+    assert len(events[-1]["evidence_links"]) == 2
+
+
+def test_cascade_endpoint_stops_scrapers_and_news_after_decisive_stage(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.services import text_verifier
+    from app.utils import evidence
+    from app.utils.config import settings
+
+    verify_text = _verify_text(monkeypatch)
+    monkeypatch.setattr(settings, "EVIDENCE_MODE", "cascade")
+    called = []
+
+    async def must_not_run(query, deadline=None):
+        called.append(query)
+        return []
+
+    # the later stages, and the model path's own news/scraper lookups
+    monkeypatch.setattr(evidence, "ASYNC_CASCADE_STAGES", [
+        (stage, key, must_not_run if stage in ("fact_checks", "news") else collect)
+        for stage, key, collect in evidence.ASYNC_CASCADE_STAGES
+    ])
+    monkeypatch.setattr(text_verifier, "search_news_async", must_not_run)
+    monkeypatch.setattr(text_verifier, "fetch_factchecks_async", must_not_run)
+    app = FastAPI()
+    app.include_router(verify_text.router)
+    with offline_upstreams(), TestClient(app) as client:
+        body = client.post("/verify_text/", json={"text": CLAIM}).json()
+
+    assert not called
+    # Google Fact Check rates the claim false: the classifier's "Real" is overridden
+    assert body["verdict"] == "Fake" and body["confidence"] == 1.0
+    assert body["evidence_links"] and all(e["source"] for e in body["evidence_links"])
+
+
+def test_evidence_endpoint_queries_each_source_once(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.services import text_verifier
+    from app.utils import evidence
+
+    verify_text = _verify_text(monkeypatch)
+    calls = []
+
+    def counted(key):
+        async def collect(query, deadline=None):
+            calls.append(key)
+            return [{"source": key, "url": f"https://example.com/{key}", "verdict": None}]
+        return collect
+
+    monkeypatch.setattr(evidence, "ASYNC_EVIDENCE_SOURCES", {key: counted(key) for key in ("fact_checks", "news")})
+    # the model path's own lookups would repeat the news and scraper requests
+    monkeypatch.setattr(text_verifier, "search_news_async", counted("news"))
+    monkeypatch.setattr(text_verifier, "fetch_factchecks_async", counted("fact_checks"))
+    app = FastAPI()
+    app.include_router(verify_text.router)
+    with TestClient(app) as client:
+        body = client.post("/verify_text/", json={"text": CLAIM}).json()
+
+    assert sorted(calls) == ["fact_checks", "news"]
+    assert body["verdict"] == "Real" and len(body["evidence_links"]) == 2
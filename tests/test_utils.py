@@ -0,0 +1,436 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+from app.services import inference
+from app.utils import evidence, profiling
+from app.utils.aio import monitor_loop_lag
+from app.utils.claim_index import ClaimIndex
+from app.utils.deadline import Deadline, run_with_timeout
+from app.utils.logging_config import DebugSamplingFilter, RedactSecretsFilter
+from app.utils.metrics import LOOP_LAG_SECONDS, Histogram
+from app.utils.verdict_store import VerdictStore
+
+
+def test_iter_evidence_yields_fastest_source_first(monkeypatch):
+    def slow(query, deadline=None):
+        time.sleep(0.2)
+        return [{"source": "PIB", "url": "https://pib.gov.in/x", "verdict": "Fake"}]
+
+    def fast(query, deadline=None):
+        return [{"source": "news", "url": "https://example.com/a", "verdict": None}]
+
+    monkeypatch.setattr(evidence, "EVIDENCE_SOURCES", {"fact_checks": slow, "news": fast})
+
+    events = list(evidence.iter_evidence("flood warning delhi"))
+
+    assert [key for key, _ in events] == ["news", "fact_checks"]
+    assert events[1][1][0]["verdict"] == "Fake"
+
+
+def test_gather_evidence_keeps_source_keys(monkeypatch):
+    monkeypatch.setattr(evidence, "EVIDENCE_SOURCES", {
+        "fact_checks": lambda q, deadline=None: [],
+        "news": lambda q, deadline=None: [{"url": "https://example.com/a"}],
+        "google_factcheck": lambda q, deadline=None: [],
+    })
+
+    result = evidence.gather_evidence("flood warning delhi")
+
+    assert set(result) == {"fact_checks", "news", "google_factcheck"}
+    assert result["news"][0]["url"] == "https://example.com/a"
+
+
+def test_deadline_caps_timeouts_to_remaining_budget():
+    deadline = Deadline(0.5)
+
+    assert deadline.timeout(10) <= 0.5
+    assert deadline.timeout(0.1) == 0.1
+    assert not deadline.expired()
+
+
+def test_run_with_timeout_skips_slow_call():
+    deadline = Deadline(0.05)
+
+    result = run_with_timeout("whois", time.sleep, 1, deadline=deadline, default="n/a")
+
+    assert result == "n/a"
+    assert deadline.report() == {"skipped_checks": ["whois"], "truncated_checks": []}
+
+
+def test_gather_evidence_with_spent_budget_skips_news():
+    deadline = Deadline(0)
+
+    result = evidence.gather_evidence("flood warning delhi", deadline=deadline)
+
+    assert result["news"] == []
+    assert "news" in deadline.skipped
+    assert "pib" in deadline.skipped
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("test_latency_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    hist.observe(0.05, "pib")
+    hist.observe(0.5, "pib")
+    hist.observe(5.0, "pib")
+
+    text = "\n".join(hist.render())
+
+    assert 'test_latency_seconds_bucket{stage="pib",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="pib",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{stage="pib",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{stage="pib"} 3' in text
+
+
+def test_redact_filter_masks_api_keys():
+    record = logging.LogRecord("urllib3", logging.DEBUG, __file__, 1,
+                               '"GET /v2/everything?q=flood&apiKey=%s HTTP/1.1" 200', ("2c1cbf8a",), None)
+
+    RedactSecretsFilter().filter(record)
+
+    assert record.getMessage() == '"GET /v2/everything?q=flood&apiKey=*** HTTP/1.1" 200'
+
+
+def test_debug_sampling_rate_follows_closest_configured_logger():
+    sampler = DebugSamplingFilter(rate=1.0, rates={"urllib3": 0.0, "app.utils": 0.0, "app.utils.scraper": 1.0})
+
+    def kept(name, level=logging.DEBUG):
+        return sampler.filter(logging.LogRecord(name, level, __file__, 1, "msg", None, None))
+
+    assert not kept("urllib3.connectionpool") and not kept("app.utils.evidence")
+    assert kept("app.utils.scraper") and kept("app.routers.jobs")
+    assert kept("urllib3.connectionpool", logging.INFO)
+
+
+def test_profiling_middleware_saves_header_triggered_profile(monkeypatch, tmp_path):
+    import asyncio
+
+    monkeypatch.setattr(profiling.settings, "PROFILE_DIR", str(tmp_path))
+
+    async def slow_app(scope, receive, send):
+        await receive()
+        time.sleep(0.05)
+
+    scope = {"type": "http", "method": "POST", "path": "/verify_text/", "headers": [(b"x-profile", b"1")]}
+
+    async def receive():
+        return {"type": "http.request", "body": b'{"text": "Dam  burst in Assam"}'}
+
+    idle = threading.Event()  # a parked thread is not part of the profile
+    waiter = threading.Thread(target=idle.wait)
+    waiter.start()
+    try:
+        asyncio.run(profiling.ProfilingMiddleware(slow_app)(scope, receive, None))
+    finally:
+        idle.set()
+        waiter.join()
+
+    entry = profiling.recent_profiles()[0]
+    assert entry["trigger"] == "header"
+    assert entry["claim_hash"] == profiling.claim_hash(b'{"text": "dam burst in assam"}')
+    stacks = (tmp_path / entry["name"]).read_text().splitlines()
+    assert any("slow_app" in stack for stack in stacks)
+    assert not any(stack.rsplit(" ", 1)[0].split(";")[-1].startswith("wait (threading.py") for stack in stacks)
+
+
+def test_loop_lag_probe_records_blocking_call():
+    async def block_loop():
+        probe = asyncio.create_task(monitor_loop_lag(interval_s=0.01))
+        await asyncio.sleep(0)
+        time.sleep(0.1)  # blocks the loop while the probe's timer is pending
+        await asyncio.sleep(0.05)
+        probe.cancel()
+
+    asyncio.run(block_loop())
+
+    lines = LOOP_LAG_SECONDS.render()
+    lag_sum = next(float(line.split()[-1]) for line in lines if line.startswith("crisisclarity_event_loop_lag_seconds_sum"))
+    assert lag_sum >= 0.08
+
+
+def test_inference_server_workers_share_preloaded_ops(tmp_path):
+    import multiprocessing
+    import os
+    import socket
+
+    socket_path = str(tmp_path / "infer.sock")
+    ops = {"predict": lambda req: {"verdict": "Fake", "confidence": len(req["text"]) / 100}}
+    server = multiprocessing.get_context("fork").Process(target=inference.serve, args=(socket_path, 2),
+                                                         kwargs={"ops": ops, "conn_timeout": 0.2})
+    server.start()
+    try:
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.05)
+
+        assert inference.call("predict", socket_path=socket_path, text="dam burst") == {"verdict": "Fake", "confidence": 0.09}
+        reply = asyncio.run(inference.call_async("ping", socket_path=socket_path))
+        assert reply["ops"] == ["predict"] and reply["pid"] != server.pid
+        with pytest.raises(inference.InferenceError, match="unknown op"):
+            inference.call("classify", socket_path=socket_path)
+
+        # clients that connect and never send hold each worker only until the connection timeout
+        silent = [socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) for _ in range(2)]
+        for sock in silent:
+            sock.connect(socket_path)
+        try:
+            assert inference.call("predict", socket_path=socket_path, timeout=5, text="x")["verdict"] == "Fake"
+        finally:
+            for sock in silent:
+                sock.close()
+    finally:
+        server.terminate()
+        server.join(5)
+    assert server.exitcode == 0
+    assert not os.path.exists(socket_path)
+
+
+def test_claim_index_matches_mutated_forwards_and_expires():
+    now = [0.0]
+    index = ClaimIndex(threshold=0.8, ttl_s=60, clock=lambda: now[0])
+    index.add("Government is giving free ration to all flood victims. Register through this WhatsApp link.", "Fake")
+
+    forwarded = "Forwarded as received: 🚨 GOVERNMENT is giving free ration to all flood victims!! Register through this WhatsApp link 🙏"
+    reordered = "Register through this WhatsApp link. Government is giving free ration to all flood victims."
+    assert index.lookup(forwarded) == (1.0, "Fake")
+    assert index.lookup(reordered)[1] == "Fake"
+    assert index.lookup("Dam burst in Assam, evacuate now") is None
+    # nothing left to compare once emojis and punctuation are stripped
+    index.add("🚨🚨🚨", "Fake")
+    assert index.lookup("🙏 !!") is None and len(index) == 1
+
+    now[0] = 61
+    assert index.lookup(forwarded) is None
+    assert len(index) == 0
+
+
+def test_normalize_claim_keeps_combining_marks():
+    from app.utils.claim_index import normalize_claim
+
+    # Devanagari vowel signs are combining marks, not punctuation
+    assert normalize_claim("Fwd: बाढ़ पीड़ितों को मुफ्त राशन!! 🙏🏽") == "बाढ़ पीड़ितों को मुफ्त राशन"
+    assert normalize_claim("बाढ़ पीड़ितों को मुफ्त राशन") != normalize_claim("बढ पड़ित को मफत रशन")
+    assert normalize_claim("Free ration ❤️ for flood-victims") == "free ration for flood victims"
+
+
+def test_verdict_store_batches_writes_and_serves_lookups(tmp_path):
+    store = VerdictStore(str(tmp_path / "verdicts.db"))
+    response = {
+        "verdict": "Fake", "confidence": 1.0, "skipped_checks": [], "truncated_checks": [],
+        "evidence_links": [{"source": "PIB", "url": "https://pib.gov.in/factcheck/1", "verdict": "Fake"}],
+    }
+    store.record_claim("Free ration for flood victims via WhatsApp link", "evidence", response,
+                       model={"verdict": "Real", "confidence": 0.6})
+    store.record_link({"url": "http://relief-fund-update.co.in/login", "domain": "relief-fund-update.co.in",
+                       "status": "Flagged", "trusted": False, "reasons": ["Insecure protocol (http)"]})
+    store.flush()
+
+    claim = store.latest_claim("FWD: free ration for flood victims via WhatsApp link!! 🙏", pipeline="evidence",
+                               complete_only=True)
+    assert claim["verdict"] == "Fake" and claim["model_verdict"] == "Real"
+    assert claim["evidence_links"] == response["evidence_links"]
+    assert store.latest_claim("Free ration for flood victims via WhatsApp link", pipeline="model") is None
+    assert store.links(domain="relief-fund-update.co.in")[0]["reasons"] == ["Insecure protocol (http)"]
+    assert store._reader().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # a malformed record fails its batch; flush() still returns and the writer carries on
+    store._enqueue("claims", None)
+    store.flush()
+    store.record_link({"url": "https://pib.gov.in/factcheck.aspx", "domain": "pib.gov.in", "status": "Trusted"})
+    store.flush()
+    assert store.links(domain="pib.gov.in")
+
+
+def test_factcard_images_are_cached_by_content_with_etags(monkeypatch, tmp_path):
+    import io
+    import zipfile
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from PIL import Image
+    from app.routers import factcard
+    from app.utils import factcard_renderer
+
+    cache = factcard_renderer.CardCache(str(tmp_path))
+    monkeypatch.setattr(factcard, "CARD_CACHE", cache)
+    monkeypatch.setattr(factcard_renderer, "CARD_CACHE", cache)
+    app = FastAPI()
+    app.include_router(factcard.router)
+    client = TestClient(app)
+    body = {"claim": "Dam burst in Assam", "verdict": "Fake", "confidence": 0.97,
+            "evidence_links": ["https://pib.gov.in/factcheck/1"]}
+
+    first = client.post("/generate_factcard/?format=png", json=body)
+    assert first.status_code == 200 and first.headers["content-type"] == "image/png"
+    assert Image.open(io.BytesIO(first.content)).size == (1200, 630)
+    etag = first.headers["etag"]
+    key = etag.strip('"')
+
+    # a conditional request is answered from the content key alone: no cache lookup, no render
+    monkeypatch.setattr(factcard, "render_cached", lambda *args: pytest.fail("rendered for a 304"))
+    assert client.post("/generate_factcard/?format=png", json=body, headers={"If-None-Match": etag}).status_code == 304
+    monkeypatch.setattr(factcard, "render_cached", factcard_renderer.render_cached)
+    assert client.post("/generate_factcard/?format=png", json=dict(body, verdict="True")).headers["etag"] != etag
+    assert client.get(first.headers["content-location"]).content == first.content
+    assert client.get(f"/factcards/{key}.webp").status_code == 404  # a PNG is never served as WebP
+    assert client.post("/generate_factcard/", json=body).json()["verdict"] == "Fake"  # JSON unchanged
+
+    bulk = client.post("/generate_factcard/bulk", json={"cards": [body, dict(body, claim="Bridge collapsed")]})
+    names = zipfile.ZipFile(io.BytesIO(bulk.content)).namelist()
+    assert names[0] == f"0000_{key}.png" and len(names) == 2
+
+    # the card directory is pruned oldest-first back under its cap
+    cards = sorted(tmp_path.glob("*.png"))
+    for age, card in enumerate(reversed(cards)):
+        os.utime(card, (time.time() - 60 * age, time.time() - 60 * age))
+    cache.max_disk_bytes = cards[-1].stat().st_size
+    assert cache.prune() == len(cards) - 1 and list(tmp_path.glob("*.png")) == cards[-1:]
+
+
+def test_compression_middleware_compresses_large_json_only(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from fastapi.testclient import TestClient
+    from app.utils import http_cache
+
+    app = FastAPI()
+    app.add_middleware(http_cache.CompressionMiddleware, minimum_size=500)
+
+    @app.get("/big")
+    def big():
+        return {"evidence_links": [{"url": f"https://factly.in/{i}", "verdict": "Fake"} for i in range(50)]}
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b'{"event": "model"}\n' * 100, b'{"event": "final"}\n']),
+                                 media_type="application/x-ndjson")
+
+    client = TestClient(app)
+    if http_cache.brotli is not None:
+        assert client.get("/big", headers={"Accept-Encoding": "gzip, br"}).headers["content-encoding"] == "br"
+    monkeypatch.setattr(http_cache, "brotli", None)
+    raw = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert raw.headers["content-encoding"] == "gzip" and "Accept-Encoding" in raw.headers["vary"]
+    assert raw.json()["evidence_links"][49]["url"] == "https://factly.in/49"
+    assert int(raw.headers["content-length"]) < len(raw.content)  # httpx decoded the body
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/stream", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_fast_json_encodes_numpy_and_models_like_stdlib():
+    import json
+    import numpy as np
+    from pydantic import BaseModel
+    from app.utils.serialization import dumps
+
+    class Item(BaseModel):
+        url: str
+
+    body = {"confidence": np.float32(0.5), "evidence_links": [Item(url="https://factly.in/x")], "claim": "बाढ़"}
+    assert json.loads(dumps(body)) == {"confidence": 0.5, "evidence_links": [{"url": "https://factly.in/x"}],
+                                       "claim": "बाढ़"}
+
+
+def test_link_profile_serves_links_without_importing_torch(tmp_path):
+    import json
+    import os
+    import subprocess
+    import sys
+
+    child = ("import json, sys; from app.main import app; "
+             "print(json.dumps([sorted(r.path for r in app.routes), 'torch' in sys.modules, 'transformers' in sys.modules]))")
+    env = {**os.environ, "APP_PROFILE": "link", "INFERENCE_SOCKET": "", "LOG_FILE": str(tmp_path / "app.log"),
+           "PROFILE_ENABLED": "false"}
+    out = subprocess.run([sys.executable, "-c", child], env=env, capture_output=True, text=True, check=True)
+    paths, torch_loaded, transformers_loaded = json.loads(out.stdout.splitlines()[-1])
+    profiled = subprocess.run([sys.executable, "-c", child], env={**env, "PROFILE_ENABLED": "true"},
+                              capture_output=True, text=True, check=True)
+
+    assert "/verify_link/" in paths and "/metrics" in paths
+    assert not any(p.startswith("/profiles") for p in paths)  # stack dumps only where profiling is on
+    assert "/profiles" in json.loads(profiled.stdout.splitlines()[-1])[0]
+    assert not any(p.startswith(("/verify_text", "/generate_factcard", "/verify_image")) for p in paths)
+    assert not torch_loaded and not transformers_loaded
+
+
+def test_jobs_are_acknowledged_at_once_and_long_polled(monkeypatch, tmp_path):
+    from contextlib import asynccontextmanager
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from benchmarks.stub_server import offline_upstreams
+    from app.routers import jobs
+    from app.utils.job_queue import JobQueue
+
+    path = str(tmp_path / "jobs.db")
+    # queued by a process that stopped before running it: the next one picks it up
+    leftover = JobQueue(path, jobs.RUNNERS).submit("link", {"url": "https://pib.gov.in/factcheck.aspx"})
+
+    monkeypatch.setattr(jobs, "_queue", JobQueue(path, jobs.RUNNERS, workers=2, poll_s=0.05))
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with jobs.lifespan():
+            yield
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(jobs.router)
+    with offline_upstreams(), TestClient(app) as client:
+        accepted = client.post("/jobs", json={"kind": "batch", "items": [
+            {"id": "a", "url": "http://relief-fund-update.co.in/login"}, {"id": "b", "note": "no url or text"},
+        ]})
+        assert accepted.status_code == 202 and accepted.json()["status"] == "queued"
+        assert accepted.headers["location"] == f"/jobs/{accepted.json()['id']}"
+        job = client.get(accepted.headers["location"], params={"wait": 10}).json()
+        earlier = client.get(f"/jobs/{leftover['id']}", params={"wait": 10}).json()
+        assert client.post("/jobs", json={"kind": "link"}).status_code == 422
+        assert client.get("/jobs/unknown").status_code == 404
+
+    assert job["status"] == "done" and job["attempts"] == 1
+    link, bad = job["result"]
+    assert link["id"] == "a" and link["kind"] == "link" and link["result"]["status"] == "Flagged"
+    assert bad["id"] == "b" and "error" in bad
+    assert earlier["status"] == "done" and earlier["result"]["trusted"] is True
+
+
+def test_job_workers_survive_errors_and_keep_jobs_claimed_during_shutdown(tmp_path):
+    from app.utils.job_queue import JobQueue
+
+    async def echo(payload):
+        return payload
+
+    queue = JobQueue(str(tmp_path / "jobs.db"), {"echo": echo}, workers=1, poll_s=0.02)
+    finish, failures = queue._finish, [RuntimeError("disk full")]
+
+    def flaky_finish(*args):
+        if failures:
+            raise failures.pop()
+        return finish(*args)
+
+    queue._finish = flaky_finish
+
+    async def scenario():
+        queue.start()
+        first = await queue.submit_async("echo", {"n": 1})
+        second = await queue.submit_async("echo", {"n": 2})
+        done = await queue.wait(second["id"], 5)
+        # a claim still in flight when the worker is cancelled ends up back in the queue
+        claim = queue._claim
+        queue._claim = lambda: time.sleep(0.2) or claim()
+        third = await queue.submit_async("echo", {"n": 3})
+        await asyncio.sleep(0.05)
+        await queue.stop()
+        return first, done, third
+
+    first, done, third = asyncio.run(scenario())
+    assert done["status"] == "done" and done["result"] == {"n": 2}
+    assert queue.get(first["id"])["status"] == "queued"  # its _finish failed; stop() put it back
+    assert queue.get(third["id"])["status"] == "queued" and queue.get(third["id"])["attempts"] == 0